@@ -7,6 +7,100 @@ Created: 2025-12-17
 Usage:
     pip install xai-sdk python-dotenv
     python scripts/grok-client.py
+    python scripts/grok-client.py --cache          # reuse identical completions
+    python scripts/grok-client.py product --name "Sac cuir" --category Maroquinerie \
+        --features "cuir pleine fleur" --price "89 EUR" --stream
+    python scripts/grok-client.py email --flow abandoned_cart --name "Sac cuir" --price "89 EUR"
+    python scripts/grok-client.py audit --data audit.json --stream
+    python scripts/grok-client.py bulk --catalog products.csv --rpm 60 --tpm 200000
+    python scripts/grok-client.py bulk --shopify --output outputs/descriptions.jsonl
+    python scripts/grok-client.py ask "Question..." --json     # one-shot (what scripts spawn)
+    python scripts/grok-client.py serve --socket /tmp/grok.sock   # warm daemon (or --port)
+    python scripts/grok-client.py daemon-bench --requests 10   # cold start vs warm call
+    python scripts/grok-client.py resilience-demo   # retries / fallback / circuit breaker on a stand-in
+
+Streaming:
+    CompletionStream yields the text as tokens arrive (interactive chat
+    always streams; generators with --stream). Time-to-first-token and
+    total time of every call are kept in CALL_TIMINGS.
+
+Bulk product descriptions (bulk):
+    Reads a CSV / JSONL catalog (sku, name, category, features, price, or
+    Shopify product objects) or fetches the store's products like the
+    Merchant feed script (--shopify). Products are described concurrently
+    under token buckets on requests and tokens per minute, failures are
+    retried with jittered exponential backoff, and every result is appended
+    to a JSONL file as soon as it completes; a restart skips the SKUs
+    already described there.
+
+Daemon (serve):
+    Keeps one initialized client (and its connection pool, and the cache
+    when enabled) alive and serves requests over a Unix socket or
+    127.0.0.1 HTTP, so callers skip interpreter startup, dotenv, xai_sdk
+    import and client construction on every request:
+      GET  /health                 status, active model, circuit states, uptime, request count
+      POST /complete               {"message", "system_prompt"?, "temperature"?, "max_tokens"?, "label"?}
+      POST /generate/<generator>   product_description | email_content | audit fields
+    Replies are {"content", "ok", "seconds"}; failures are 502/503 with
+    {"ok": false, "error", "error_type", "retryable"}. Node scripts use the
+    grok-daemon-client.cjs shim (falls back to spawning "ask").
+
+Conversation memory (chat):
+    The interactive chat remembers the conversation within a token budget
+    (--memory-budget, prompt side): recent turns are sent verbatim, and
+    when the budget would be exceeded the older turns are folded into a
+    running summary (one short model call) sent after the system prompt.
+    Each answer shows the tokens sent and the latency.
+
+Prefix caching:
+    Requests are laid out stable-first: SYSTEM_PROMPT, then the template
+    instructions, then the per-call data, so consecutive calls share a
+    long identical prefix the API can serve from its prompt cache. The
+    usage reported by the API (prompt, cached and completion tokens) is
+    captured for every call and aggregated per generator (USAGE,
+    print_usage()) to check that bulk runs actually hit the cache.
+
+Telemetry (on by default in the CLI, --no-telemetry or GROK_TELEMETRY=0):
+    Every call is logged to a rotating JSONL file (GROK_TELEMETRY_PATH):
+    model, template, latency, time to first token, tokens, estimated cost
+    (PRICING, override with GROK_PRICING='{"model": [in, cached, out]}' in
+    USD per million tokens) and error type. Request, token and cost
+    counters and latency histograms go to a Prometheus textfile
+    (GROK_PROM_PATH, for node_exporter's textfile collector; use one file
+    per concurrently running process).
+      python scripts/grok-client.py summary --days 7   # p50/p95 + daily totals
+
+Resilience:
+    Calls go through a fallback chain of models (GROK_MODELS, preferred
+    first). Failures are raised as typed GrokErrors (timeout, connection,
+    rate limit, server, auth, bad request); retryable ones are retried
+    with jittered backoff (GROK_RETRIES per model, Retry-After honoured),
+    then the next model is tried. Each model has a circuit breaker
+    (GROK_BREAKER_FAILURES consecutive failures open it for
+    GROK_BREAKER_COOLDOWN seconds) and a health window: a model whose p95
+    latency (GROK_P95_THRESHOLD) or error rate
+    (GROK_ERROR_RATE_THRESHOLD) is too high goes to the end of the chain.
+    GrokUnavailableError means no model answered. XAI_BASE_URL switches
+    to an OpenAI-compatible HTTP endpoint (proxy, or grok_standin.py for
+    tests); GROK_TIMEOUT bounds each attempt.
+
+Response cache (opt-in, --cache or GROK_CACHE=1):
+    Completions are keyed by model, system prompt hash, user message,
+    temperature and max_tokens. An in-memory LRU sits in front of a SQLite
+    store (GROK_CACHE_PATH) with a TTL and a maximum entry count; the same
+    input is never sent twice, even by concurrent callers.
+
+Modules (importable, next to this script; grok-client.py is the CLI):
+    grok_config      environment, defaults, SYSTEM_PROMPT and PROMPTS
+    grok_router      typed errors, RestClient / create_client, ModelRouter
+    grok_completion  chat_completion, CompletionStream, generators
+    grok_cache       response cache
+    grok_telemetry   call timings, usage per generator, telemetry
+    grok_memory      conversation memory
+    grok_bulk        bulk product descriptions
+    grok_daemon      warm daemon, daemon_request, daemon_bench
+    e.g. sys.path.insert(0, "automations/agency/core")
+         from grok_completion import chat_completion
 
 Configuration:
     Set XAI_API_KEY in .env file
@@ -16,164 +110,20 @@ Configuration:
 import os
 import sys
 import json
-from pathlib import Path
-from datetime import datetime
-
-# Load environment variables
-try:
-    from dotenv import load_dotenv
-    load_dotenv()
-except ImportError:
-    print("Warning: python-dotenv not installed. Install with: pip install python-dotenv")
-
-# Configuration
-XAI_API_KEY = os.getenv("XAI_API_KEY")
-OUTPUT_DIR = os.getenv("OUTPUT_DIR", "/Users/mac/Desktop/JO-AAA/outputs")
-
-# System Prompt for 3A Automation
-SYSTEM_PROMPT = """Tu es l'assistant IA de 3A Automation (AAA - AI Automation Agency), spécialisée en Automatisation E-commerce (B2C) et Workflows PME (B2B).
-
-## IDENTITÉ
-
-- Nom: 3A Automation (Automation, Analytics, AI)
-- Type: Agence d'Automatisation AI (AAA)
-- Site: https://3a-automation.com
-- Email: contact@3a-automation.com
-- Localisation: Maroc, servant MENA et monde entier
-- Langues: Français (principal), Anglais, Arabe (sur demande)
-
-## SPÉCIALISATION
-
-- Automatisation E-commerce (B2C) - TOUTES plateformes
-- Workflows PME (B2B) - TOUTES plateformes
-- Analytics & Tracking
-- Intégrations AI
-
-## EXPERTISE TECHNIQUE (TOUTES PLATEFORMES)
-
-E-commerce: Shopify, WooCommerce, Magento, PrestaShop, BigCommerce, etc.
-Email Marketing: Klaviyo, Mailchimp, Omnisend, HubSpot, Brevo, etc.
-Analytics: Google Analytics 4, Mixpanel, Amplitude, etc.
-Automation: n8n, Make, Zapier, scripts natifs Node.js
-Marketing: Meta Ads, Google Ads, TikTok Ads, LinkedIn Ads
-
-## SERVICES OFFERTS
-
-1. Automatisation E-commerce (TOUTES plateformes: sync, webhooks, flows)
-2. Workflows PME B2B (CRM, ERP, facturation, etc.)
-3. Analytics & Reporting (audits, dashboards GA4)
-4. AI Integration (génération contenu, SEO automatisé, Voice AI)
-
-OFFRE GRATUITE: Audit e-commerce complet
-URL: https://3a-automation.com/#contact
-
-## CIBLE CLIENT
-
-PME de tous secteurs (e-commerce, healthcare, B2B, retail)
-Revenue: €10k-500k/mois
-Budget: €300-1000/mois
-
-## PRINCIPES
-
-1. Factualité: Ne jamais faire de claims non vérifiés
-2. Transparence: Honnête sur ce qui est possible
-3. ROI Focus: Actions liées à résultats mesurables
-4. Pas de bullshit: Réponses directes, actionnables
-
-## FORMAT
-
-- Réponses courtes et actionnables
-- Listes pour la clarté
-- Exemples concrets
-- Pas d'emojis sauf demande explicite
-"""
-
-# Specialized prompts
-PROMPTS = {
-    "audit": """Analyse les données suivantes et génère un rapport d'audit avec:
-1. Points forts identifiés
-2. Problèmes critiques (priorité haute)
-3. Opportunités d'amélioration
-4. Recommandations actionnables avec estimation d'impact
-
-Données: {data}
-
-Format: Markdown structuré, factuel uniquement.""",
-
-    "email_content": """Génère le contenu email pour un flow {flow_type}.
-Produit: {product_name}
-Prix: {price}
-
-Retourne:
-- Subject line (50 chars max)
-- Preview text (90 chars max)
-- Body HTML structure avec CTA clair""",
-
-    "product_description": """Génère une description produit optimisée SEO pour:
-Produit: {product_name}
-Catégorie: {category}
-Caractéristiques: {features}
-Prix: {price}
-
-Format:
-- Titre optimisé (60 chars max)
-- Meta description (160 chars)
-- Description longue (500-800 mots)
-- 5 bullet points
-- Alt text image"""
-}
-
-
-def check_api_key():
-    """Verify xAI API key is configured"""
-    if not XAI_API_KEY:
-        print("\n" + "=" * 60)
-        print("ERREUR: XAI_API_KEY non configuré")
-        print("=" * 60)
-        print("\nPour configurer:")
-        print("1. Aller sur https://console.x.ai/api-keys")
-        print("2. Créer une nouvelle clé API")
-        print("3. Ajouter dans .env: XAI_API_KEY=your_key_here")
-        print("\n" + "=" * 60)
-        return False
-    return True
-
-
-def create_client():
-    """Initialize xAI client"""
-    try:
-        from xai_sdk import Client
-        return Client(api_key=XAI_API_KEY)
-    except ImportError:
-        print("\n" + "=" * 60)
-        print("ERREUR: xai-sdk non installé")
-        print("=" * 60)
-        print("\nInstaller avec:")
-        print("    pip install xai-sdk")
-        print("Ou avec uv:")
-        print("    uv add xai-sdk")
-        print("\n" + "=" * 60)
-        return None
-
-
-def chat_completion(client, user_message: str, system_prompt: str = None) -> str:
-    """Generate chat completion with 3A Automation context"""
-    if system_prompt is None:
-        system_prompt = SYSTEM_PROMPT
-
-    try:
-        response = client.chat.completions.create(
-            model="grok-4-1-fast-reasoning",  # FRONTIER model (Jan 2026)
-            messages=[
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_message}
-            ],
-            temperature=0.7,
-            max_tokens=2048
-        )
-        return response.choices[0].message.content
-    except Exception as e:
-        return f"Erreur API: {str(e)}"
+import time
+import signal
+import argparse
+
+from grok_config import (CACHE_PATH, CACHE_TTL, MEMORY_BUDGET, MEMORY_KEEP_TURNS, BULK_OUTPUT, BULK_CONCURRENCY,
+                         BULK_RPM, BULK_TPM, BULK_RETRIES, DAEMON_SOCKET, DAEMON_PORT, TELEMETRY_PATH)
+from grok_cache import open_cache, close_cache
+from grok_router import GrokError, check_api_key, create_client
+from grok_telemetry import CALL_TIMINGS, print_usage, open_telemetry, close_telemetry, telemetry_summary
+from grok_completion import (chat_completion, CompletionStream, generate_audit_analysis, generate_email_content,
+                             generate_product_description, resilience_demo)
+from grok_memory import ConversationMemory
+from grok_bulk import bulk_descriptions
+from grok_daemon import GrokDaemon, daemon_bench
 
 
 def test_connection(client):
@@ -187,52 +137,30 @@ def test_connection(client):
     print(f"\nEnvoi message test: '{test_message}'")
     print("-" * 40)
 
-    response = chat_completion(client, test_message)
+    try:
+        response, ok = chat_completion(client, test_message), True
+    except GrokError as e:
+        response, ok = f"Erreur API ({type(e).__name__}): {e}", False
 
     print(f"\nRéponse Grok:")
     print(response)
     print("\n" + "=" * 60)
-    print("CONNEXION OK" if "Erreur" not in response else "CONNEXION ÉCHOUÉE")
+    print("CONNEXION OK" if ok else "CONNEXION ÉCHOUÉE")
     print("=" * 60)
 
-    return "Erreur" not in response
+    return ok
 
 
-def generate_audit_analysis(client, data_json: str) -> str:
-    """Generate audit analysis from data"""
-    prompt = PROMPTS["audit"].format(data=data_json)
-    return chat_completion(client, prompt)
-
-
-def generate_email_content(client, flow_type: str, product_name: str, price: str) -> str:
-    """Generate email marketing content"""
-    prompt = PROMPTS["email_content"].format(
-        flow_type=flow_type,
-        product_name=product_name,
-        price=price
-    )
-    return chat_completion(client, prompt)
-
-
-def generate_product_description(client, product_name: str, category: str,
-                                   features: str, price: str) -> str:
-    """Generate SEO-optimized product description"""
-    prompt = PROMPTS["product_description"].format(
-        product_name=product_name,
-        category=category,
-        features=features,
-        price=price
-    )
-    return chat_completion(client, prompt)
-
-
-def interactive_chat(client):
-    """Interactive chat mode"""
+def interactive_chat(client, memory: ConversationMemory = None):
+    """Interactive chat mode (with token-budgeted conversation memory)"""
+    if memory is None:
+        memory = ConversationMemory(client)
     print("\n" + "=" * 60)
     print("3A AUTOMATION - CHAT INTERACTIF GROK")
     print("=" * 60)
     print("Tapez 'quit' pour quitter")
     print("Tapez 'help' pour les commandes disponibles")
+    print(f"Mémoire: {memory.budget} tokens max par requête, {memory.keep_turns} derniers échanges conservés")
     print("-" * 60)
 
     while True:
@@ -250,12 +178,33 @@ def interactive_chat(client):
                 print("\nCommandes disponibles:")
                 print("  quit  - Quitter le chat")
                 print("  help  - Afficher cette aide")
+                print("  reset - Oublier la conversation")
                 print("\nPosez n'importe quelle question sur l'automation,")
                 print("les analytics, ou l'IA pour PME.")
                 continue
 
-            response = chat_completion(client, user_input)
-            print(f"\n3A Assistant: {response}")
+            if user_input.lower() == 'reset':
+                memory.reset()
+                print("Conversation oubliée.")
+                continue
+
+            summary_calls = memory.summary_calls
+            history = memory.history_for(user_input)
+            tokens = memory.prompt_tokens(user_input, history)
+            print("\n3A Assistant: ", end="", flush=True)
+            stream = CompletionStream(client, user_input, history=history)
+            try:
+                for delta in stream:
+                    print(delta, end="", flush=True)
+            except GrokError as e:
+                print(f"\nErreur API ({type(e).__name__}): {e}", end="")
+            if stream.error is None:
+                memory.add(user_input, stream.text)
+            details = [f"~{tokens} tokens envoyés / {memory.budget}",
+                       f"{len(memory.turns)} échanges + résumé de {memory.folded}"]
+            if memory.summary_calls > summary_calls:
+                details.append("résumé mis à jour")
+            print(f"\n{stream.timing_line(*details)}")
 
         except KeyboardInterrupt:
             print("\n\nInterrompu. Au revoir!")
@@ -264,10 +213,87 @@ def interactive_chat(client):
 
 def main():
     """Main entry point"""
-    print("\n" + "=" * 60)
-    print("3A AUTOMATION - GROK CLIENT")
-    print("Projet: 3a-automations")
-    print("=" * 60)
+    parser = argparse.ArgumentParser(description="3A Automation - Grok client")
+    parser.add_argument("--cache", action="store_true", default=os.getenv("GROK_CACHE") == "1",
+                        help="Reuse identical completions (GROK_CACHE=1)")
+    parser.add_argument("--cache-path", default=CACHE_PATH, help="SQLite cache file")
+    parser.add_argument("--cache-ttl", type=int, default=CACHE_TTL, help="Cache lifetime in seconds")
+    parser.add_argument("--memory-budget", type=int, default=MEMORY_BUDGET,
+                        help="Chat: max prompt tokens per request (GROK_MEMORY_BUDGET)")
+    parser.add_argument("--memory-turns", type=int, default=MEMORY_KEEP_TURNS,
+                        help="Chat: recent exchanges always sent verbatim")
+    parser.add_argument("--no-telemetry", action="store_true", default=os.getenv("GROK_TELEMETRY") == "0",
+                        help="Do not log calls (GROK_TELEMETRY=0)")
+    sub = parser.add_subparsers(dest="command")
+    sub.add_parser("chat", help="Test the connection, then chat (default)")
+
+    product = sub.add_parser("product", help="SEO product description")
+    product.add_argument("--name", required=True)
+    product.add_argument("--category", required=True)
+    product.add_argument("--features", default="")
+    product.add_argument("--price", default="")
+
+    email = sub.add_parser("email", help="Email flow content")
+    email.add_argument("--flow", required=True, help="Flow type, e.g. abandoned_cart")
+    email.add_argument("--name", required=True)
+    email.add_argument("--price", default="")
+
+    audit = sub.add_parser("audit", help="Audit report from a JSON data file")
+    audit.add_argument("--data", required=True, help="JSON file with the audit data")
+
+    for generator in (product, email, audit):
+        generator.add_argument("--stream", action="store_true", help="Print tokens as they arrive")
+
+    bulk = sub.add_parser("bulk", help="Product descriptions for a whole catalog (resumable)")
+    source = bulk.add_mutually_exclusive_group(required=True)
+    source.add_argument("--catalog", help="CSV or JSONL catalog file")
+    source.add_argument("--shopify", action="store_true", help="Fetch the products of the .env Shopify store")
+    bulk.add_argument("--output", default=BULK_OUTPUT, help="JSONL results (appended, resumable)")
+    bulk.add_argument("--concurrency", type=int, default=BULK_CONCURRENCY)
+    bulk.add_argument("--rpm", type=float, default=BULK_RPM, help="Requests per minute")
+    bulk.add_argument("--tpm", type=float, default=BULK_TPM, help="Tokens per minute")
+    bulk.add_argument("--retries", type=int, default=BULK_RETRIES)
+    bulk.add_argument("--limit", type=int, help="Only the first N products")
+
+    ask = sub.add_parser("ask", help="One completion to stdout (for scripts)")
+    ask.add_argument("message")
+    ask.add_argument("--json", action="store_true", help="Print {content, ok, seconds} as JSON")
+
+    serve = sub.add_parser("serve", help="Warm daemon over a Unix socket or local HTTP")
+    serve.add_argument("--socket", default=DAEMON_SOCKET, help="Unix socket path (GROK_DAEMON_SOCKET)")
+    serve.add_argument("--port", type=int, default=DAEMON_PORT, help="HTTP port on 127.0.0.1 without --socket")
+
+    bench = sub.add_parser("daemon-bench", help="Cold one-shot process vs warm daemon latency")
+    bench.add_argument("--requests", type=int, default=10)
+    bench.add_argument("--message", default="Réponds seulement: OK")
+
+    summary = sub.add_parser("summary", help="Latency p50/p95, errors and daily totals from the telemetry log")
+    summary.add_argument("--days", type=int, help="Only the last N days")
+    summary.add_argument("--path", default=TELEMETRY_PATH, help="Telemetry JSONL file")
+
+    demo = sub.add_parser("resilience-demo", help="Retries, fallback and circuit breaker against a local stand-in")
+    demo.add_argument("--calls", type=int, default=10, help="Calls per phase")
+    args = parser.parse_args()
+
+    if args.command == "daemon-bench":
+        daemon_bench(args.requests, args.message)
+        return
+
+    if args.command == "summary":
+        if not telemetry_summary(args.path, args.days):
+            sys.exit(1)
+        return
+
+    if args.command == "resilience-demo":
+        if not resilience_demo(args.calls):
+            sys.exit(1)
+        return
+
+    if args.command != "ask":
+        print("\n" + "=" * 60)
+        print("3A AUTOMATION - GROK CLIENT")
+        print("Projet: 3a-automations")
+        print("=" * 60)
 
     # Check API key
     if not check_api_key():
@@ -278,12 +304,107 @@ def main():
     if not client:
         sys.exit(1)
 
-    # Test connection
-    if not test_connection(client):
-        sys.exit(1)
+    if args.cache:
+        open_cache(args.cache_path, args.cache_ttl)
+    if not args.no_telemetry:
+        open_telemetry()
+
+    try:
+        if args.command == "ask":
+            start = time.perf_counter()
+            try:
+                reply = {"content": chat_completion(client, args.message), "ok": True}
+            except GrokError as e:
+                reply = {"content": "", "ok": False, "error": str(e), "error_type": type(e).__name__,
+                         "retryable": e.retryable}
+            if args.json:
+                print(json.dumps({**reply, "seconds": round(time.perf_counter() - start, 4)}, ensure_ascii=False))
+            elif reply["ok"]:
+                print(reply["content"])
+            else:
+                print(f"Erreur API ({reply['error_type']}): {reply['error']}", file=sys.stderr)
+            if not reply["ok"]:
+                sys.exit(1)
+            return
+
+        if args.command == "serve":
+            try:
+                daemon = GrokDaemon(client, args.socket, args.port)
+            except OSError as e:
+                print(f"ERREUR: daemon non démarré: {e}")
+                sys.exit(1)
+            # Shut down cleanly (socket file removed) when a supervisor stops it
+            signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+            print(f"Daemon prêt sur {daemon.address} (Ctrl+C pour arrêter)")
+            try:
+                daemon.serve_forever()
+            except KeyboardInterrupt:
+                print("\nDaemon arrêté")
+            return
+
+        if args.command == "bulk":
+            if not bulk_descriptions(client, args):
+                sys.exit(1)
+            return
+
+        if args.command in ("product", "email", "audit"):
+            if not run_generator(client, args):
+                sys.exit(1)
+            return
+
+        # Test connection
+        if not test_connection(client):
+            sys.exit(1)
+
+        # Start interactive chat
+        interactive_chat(client, ConversationMemory(client, args.memory_budget, args.memory_turns))
+    finally:
+        if args.command != "ask":
+            print_usage()
+        # ask: stdout is only the answer (one JSON line with --json, parsed by the Node shim)
+        close_cache(sys.stderr if args.command == "ask" else None)
+        close_telemetry()
+
+
+def run_generator(client, args):
+    """Run one generator from the CLI; True on success"""
+    if args.command == "audit":
+        try:
+            with open(args.data, encoding="utf-8") as f:
+                data = f.read()
+        except OSError as e:
+            print(f"ERREUR: lecture de {args.data} impossible: {e}")
+            return False
 
-    # Start interactive chat
-    interactive_chat(client)
+    try:
+        if args.command == "product":
+            result = generate_product_description(client, args.name, args.category, args.features, args.price,
+                                                  stream=args.stream)
+        elif args.command == "email":
+            result = generate_email_content(client, args.flow, args.name, args.price, stream=args.stream)
+        else:
+            result = generate_audit_analysis(client, data, stream=args.stream)
+    except GrokError as e:
+        print(f"\nErreur API ({type(e).__name__}): {e}")
+        return False
+
+    print()
+    if not args.stream:
+        timing = CALL_TIMINGS[-1] if CALL_TIMINGS else None
+        print(result)
+        if timing:
+            usage = timing["usage"]
+            tokens = f" | {usage['prompt_tokens']} tokens prompt dont {usage['cached_tokens']} en cache" if usage else ""
+            print(f"\n[total: {timing['total']:.2f}s{tokens}]")
+        return True
+
+    try:
+        for delta in result:
+            print(delta, end="", flush=True)
+    except GrokError as e:
+        print(f"\nErreur API ({type(e).__name__}): {e}")
+    print(f"\n\n{result.timing_line()}")
+    return result.error is None
 
 
 if __name__ == "__main__":
@@ -0,0 +1,153 @@
+#!/usr/bin/env node
+/**
+ * 3A Automation - Grok daemon client shim
+ *
+ * Calls the warm Python daemon (grok-client.py serve) instead of spawning
+ * a new interpreter per request. When no daemon is listening, falls back
+ * to a one-shot `grok-client.py ask --json` process.
+ *
+ * Usage:
+ *     const grok = require('./grok-daemon-client.cjs');
+ *     const { content, ok } = await grok.complete('Question...');
+ *     // on failure: { ok: false, error, error_type (GrokTimeoutError, GrokUnavailableError...), retryable }
+ *     const reply = await grok.generate('product_description', {
+ *       product_name: 'Sac cuir', category: 'Maroquinerie', features: '...', price: '89 EUR'
+ *     });
+ *
+ *     node grok-daemon-client.cjs "Question..."
+ *
+ * Configuration:
+ *     GROK_DAEMON_SOCKET  Unix socket of the daemon (else 127.0.0.1:GROK_DAEMON_PORT)
+ *     GROK_DAEMON_PORT    HTTP port (default: 8765)
+ *     PYTHON              Interpreter for the fallback (default: python3)
+ */
+
+const http = require('http');
+const path = require('path');
+const { execFile } = require('child_process');
+
+const SOCKET = process.env.GROK_DAEMON_SOCKET;
+const PORT = parseInt(process.env.GROK_DAEMON_PORT || '8765', 10);
+const PYTHON = process.env.PYTHON || 'python3';
+const SCRIPT = path.join(__dirname, 'grok-client.py');
+const TIMEOUT_MS = 300000;
+
+// Keep connections to the daemon open between calls
+const agent = new http.Agent({ keepAlive: true });
+
+/**
+ * JSON request to the daemon; rejects with err.code ECONNREFUSED/ENOENT when it is not running
+ */
+function request(method, route, payload) {
+  const body = payload ? Buffer.from(JSON.stringify(payload)) : null;
+  const options = {
+    method,
+    path: route,
+    agent,
+    timeout: TIMEOUT_MS,
+    headers: body ? { 'Content-Type': 'application/json', 'Content-Length': body.length } : {}
+  };
+  if (SOCKET) {
+    options.socketPath = SOCKET;
+  } else {
+    options.host = '127.0.0.1';
+    options.port = PORT;
+  }
+
+  return new Promise((resolve, reject) => {
+    const req = http.request(options, (res) => {
+      const chunks = [];
+      res.on('data', (chunk) => chunks.push(chunk));
+      res.on('end', () => {
+        try {
+          resolve(JSON.parse(Buffer.concat(chunks).toString('utf8')));
+        } catch (error) {
+          reject(error);
+        }
+      });
+    });
+    req.on('timeout', () => req.destroy(new Error(`daemon timeout after ${TIMEOUT_MS}ms`)));
+    req.on('error', reject);
+    if (body) req.write(body);
+    req.end();
+  });
+}
+
+function isDaemonDown(error) {
+  return ['ECONNREFUSED', 'ENOENT', 'ECONNRESET'].includes(error.code);
+}
+
+/**
+ * Fallback without daemon: one Python process per call (slow cold start)
+ */
+function spawnAsk(message) {
+  return new Promise((resolve, reject) => {
+    execFile(PYTHON, [SCRIPT, 'ask', '--json', message], { timeout: TIMEOUT_MS, maxBuffer: 16 * 1024 * 1024 },
+      (error, stdout, stderr) => {
+        const lines = stdout.trim().split('\n');
+        try {
+          resolve(JSON.parse(lines[lines.length - 1]));
+        } catch (parseError) {
+          reject(error || new Error(`grok-client.py ask: ${stderr || stdout}`));
+        }
+      });
+  });
+}
+
+/**
+ * Chat completion with the 3A system prompt: { content, ok, seconds }, or { ok: false, error, error_type }
+ */
+async function complete(message, options = {}) {
+  try {
+    return await request('POST', '/complete', { message, ...options });
+  } catch (error) {
+    if (!isDaemonDown(error)) throw error;
+    return spawnAsk(message);
+  }
+}
+
+/**
+ * Prompt template generator (product_description, email_content, audit): { content, ok, seconds }
+ * Requires the daemon.
+ */
+async function generate(generator, fields) {
+  return request('POST', `/generate/${generator}`, fields);
+}
+
+/**
+ * Daemon status, or null when it is not running
+ */
+async function health() {
+  try {
+    return await request('GET', '/health');
+  } catch (error) {
+    if (isDaemonDown(error)) return null;
+    throw error;
+  }
+}
+
+if (require.main === module) {
+  const message = process.argv.slice(2).join(' ');
+  if (!message) {
+    console.log('Usage: node grok-daemon-client.cjs "Question..."');
+    process.exit(1);
+  }
+  const start = Date.now();
+  complete(message)
+    .then((reply) => {
+      if (reply.ok) {
+        console.log(reply.content);
+      } else {
+        console.error(`ERREUR API (${reply.error_type}): ${reply.error}`);
+      }
+      console.log(`\n[${Date.now() - start}ms]`);
+      agent.destroy();
+      process.exit(reply.ok ? 0 : 1);
+    })
+    .catch((error) => {
+      console.error(`ERREUR: ${error.message}`);
+      process.exit(1);
+    });
+}
+
+module.exports = { complete, generate, health };
@@ -0,0 +1,222 @@
+#!/usr/bin/env python3
+"""
+Resumable bulk product descriptions for the Grok/xAI client
+
+Reads a CSV / JSONL catalog (sku, name, category, features, price, or
+Shopify product objects) or fetches the store's products like the
+Merchant feed script. Products are described concurrently under token
+buckets on requests and tokens per minute, failures are retried with
+jittered exponential backoff, and every result is appended to a JSONL
+file as soon as it completes; a restart skips the SKUs already described.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import asyncio
+from pathlib import Path
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+
+from grok_config import (PROJECT_ROOT, MAX_TOKENS, SYSTEM_PROMPT, PROMPTS, BULK_CONCURRENCY, BULK_RPM, BULK_TPM,
+                         BULK_RETRIES)
+from grok_completion import routed_completion, estimate_tokens
+from grok_router import GrokError, backoff_delay
+from http_session import RateLimiter
+
+
+# Accepted catalog column names, by field
+CATALOG_COLUMNS = {
+    "sku": ("sku", "id", "handle"),
+    "product_name": ("product_name", "name", "title"),
+    "category": ("category", "product_type", "type"),
+    "features": ("features", "tags", "description"),
+    "price": ("price",)
+}
+
+
+def record_from_row(row: dict) -> dict:
+    """Catalog record from a CSV row / JSON object with any accepted column names"""
+    record = {}
+    for field, names in CATALOG_COLUMNS.items():
+        value = next((row[name] for name in names if row.get(name) not in (None, "")), "")
+        record[field] = ", ".join(map(str, value)) if isinstance(value, list) else str(value).strip()
+    return record
+
+
+def record_from_shopify(product: dict, currency: str = "") -> dict:
+    """Catalog record of a Shopify REST product"""
+    variants = product.get("variants") or [{}]
+    options = [f"{o['name']}: {', '.join(o.get('values', []))}" for o in product.get("options") or []
+               if o.get("name") and o.get("name") != "Title"]
+    features = options + [t.strip() for t in (product.get("tags") or "").split(",") if t.strip()]
+    if product.get("vendor"):
+        features.append(f"Marque: {product['vendor']}")
+    prices = [float(v["price"]) for v in variants if v.get("price")]
+    return {
+        "sku": variants[0].get("sku") or f"shopify-{product['id']}",
+        "product_name": product.get("title", ""),
+        "category": product.get("product_type", ""),
+        "features": ", ".join(features),
+        "price": f"{min(prices):.2f} {currency}".strip() if prices else ""
+    }
+
+
+def load_catalog(path: str) -> list:
+    """Catalog records from a CSV or JSONL file (Shopify product objects accepted)"""
+    records = []
+    with open(path, encoding="utf-8", newline="") as f:
+        if path.lower().endswith(".csv"):
+            records = [record_from_row(row) for row in csv.DictReader(f)]
+        else:
+            for line in f:
+                if line.strip():
+                    row = json.loads(line)
+                    records.append(record_from_shopify(row) if "variants" in row else record_from_row(row))
+    return records
+
+
+def fetch_shopify_catalog() -> list:
+    """Catalog records of the store configured for the Merchant feed script (.env)"""
+    sys.path.insert(0, str(PROJECT_ROOT / "automations" / "templates" / "google-merchant"))
+    import generate_merchant_center_feed as feed
+
+    store = feed.store_from_env()
+    print(f"Récupération des produits Shopify de {store['name']}...")
+    return [record_from_shopify(p, store["currency"]) for p in feed.fetch_products(store)]
+
+
+def load_finished(output: str) -> set:
+    """SKUs already described in an output file (failed ones are retried)"""
+    finished = set()
+    if not os.path.exists(output):
+        return finished
+    with open(output, encoding="utf-8") as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue  # line cut short by an interrupted run
+            if not result.get("error"):
+                finished.add(result["sku"])
+    return finished
+
+
+def describe_product(client, record: dict, request_limiter, token_limiter, retries: int = BULK_RETRIES) -> dict:
+    """Generate one description under the rate limits, retrying retryable failures (blocking)"""
+    prompt = PROMPTS["product_description"].format(
+        product_name=record["product_name"],
+        category=record["category"],
+        features=record["features"],
+        price=record["price"]
+    )
+    cost = estimate_tokens(SYSTEM_PROMPT) + estimate_tokens(prompt) + MAX_TOKENS
+    start = time.perf_counter()
+    text, model, error = None, None, None
+    # On top of the router's quick retries: ride out outages of the whole model chain
+    for attempt in range(retries + 1):
+        request_limiter.wait()
+        token_limiter.wait(cost)
+        try:
+            text, model = routed_completion(client, prompt, label="product_description")
+            error = None
+            break
+        except GrokError as e:
+            error = e
+        if not error.retryable:
+            break
+        if attempt < retries:
+            time.sleep(backoff_delay(attempt))
+
+    result = {
+        "sku": record["sku"],
+        "product_name": record["product_name"],
+        "model": model,
+        "attempts": attempt + 1,
+        "seconds": round(time.perf_counter() - start, 3),
+        "completed_at": datetime.now().isoformat(timespec="seconds")
+    }
+    if error is None:
+        result["description"] = text
+    else:
+        result["error"] = f"{type(error).__name__}: {error}"
+    return result
+
+
+async def run_bulk(client, records: list, output: str, concurrency: int = BULK_CONCURRENCY,
+                   rpm: float = BULK_RPM, tpm: float = BULK_TPM, retries: int = BULK_RETRIES) -> dict:
+    """Describe records concurrently, appending each result to output as it completes"""
+    finished = load_finished(output)
+    todo, seen = [], set(finished)
+    for record in records:
+        if record["sku"] and record["sku"] not in seen:
+            seen.add(record["sku"])
+            todo.append(record)
+    stats = {"total": len(records), "skipped": len(records) - len(todo), "done": 0, "failed": 0, "retried": 0}
+    print(f"{len(todo)} produits à décrire ({stats['skipped']} déjà faits ou sans SKU), "
+          f"{concurrency} en parallèle, {rpm:g} req/min, {tpm:g} tokens/min")
+    if not todo:
+        return stats
+
+    # Buckets hold ten seconds of budget, so bursts stay under the per-minute limits
+    request_limiter = RateLimiter(rpm / 60, max(1, rpm // 6))
+    token_limiter = RateLimiter(tpm / 60, max(1, tpm // 6))
+    # One thread per concurrent request (the default pool is sized by CPU count)
+    asyncio.get_running_loop().set_default_executor(ThreadPoolExecutor(max_workers=concurrency))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    start = time.perf_counter()
+    with open(output, "a+", encoding="utf-8") as out:
+        # Do not glue the first result to a line cut short by an interrupted run
+        if out.tell():
+            out.seek(out.tell() - 1)
+            if out.read(1) != "\n":
+                out.write("\n")
+
+        async def describe(record):
+            async with semaphore:
+                result = await asyncio.to_thread(describe_product, client, record,
+                                                 request_limiter, token_limiter, retries)
+            out.write(json.dumps(result, ensure_ascii=False) + "\n")
+            out.flush()
+            stats["failed" if "error" in result else "done"] += 1
+            stats["retried"] += result["attempts"] > 1
+            completed = stats["done"] + stats["failed"]
+            if completed % 25 == 0 or completed == len(todo):
+                elapsed = time.perf_counter() - start
+                rate = completed / elapsed * 60
+                eta = (len(todo) - completed) / (completed / elapsed)
+                print(f"  {completed}/{len(todo)}  {rate:.0f}/min  {stats['failed']} échecs  "
+                      f"ETA {eta / 60:.1f} min")
+
+        await asyncio.gather(*(describe(r) for r in todo))
+
+    stats["seconds"] = time.perf_counter() - start
+    stats["rate_wait"] = request_limiter.waited + token_limiter.waited
+    return stats
+
+
+def bulk_descriptions(client, args) -> bool:
+    """CLI bulk mode; True when every product was described"""
+    if args.shopify:
+        records = fetch_shopify_catalog()
+    else:
+        try:
+            records = load_catalog(args.catalog)
+        except (OSError, ValueError) as e:
+            print(f"ERREUR: lecture du catalogue {args.catalog} impossible: {e}")
+            return False
+    if args.limit:
+        records = records[:args.limit]
+
+    stats = asyncio.run(run_bulk(client, records, args.output, args.concurrency, args.rpm, args.tpm,
+                                 args.retries))
+    if "seconds" in stats:
+        print(f"\n{stats['done']} décrits, {stats['failed']} en échec, {stats['retried']} après retry, "
+              f"{stats['skipped']} ignorés en {stats['seconds']:.1f}s "
+              f"(attente rate limit: {stats['rate_wait']:.1f}s)")
+    print(f"Résultats: {args.output}")
+    return stats["failed"] == 0
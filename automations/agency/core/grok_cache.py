@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Opt-in response cache of the Grok/xAI client
+
+Completions are keyed by model, system prompt hash, user message,
+temperature and max_tokens. An in-memory LRU sits in front of a SQLite
+store (GROK_CACHE_PATH) with a TTL and a maximum entry count; key_lock()
+lets concurrent callers wait for a key being computed instead of sending
+the same input twice. open_cache() enables it for grok_completion.
+"""
+
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from pathlib import Path
+from collections import OrderedDict
+
+from grok_config import CACHE_PATH, CACHE_TTL, CACHE_MAX_ENTRIES, CACHE_MEMORY_SIZE
+
+
+class ResponseCache:
+    """Completions by request key: in-memory LRU in front of a SQLite store
+
+    Entries expire after ttl seconds; beyond max_entries the least recently
+    used ones are evicted.
+    """
+
+    def __init__(self, path=CACHE_PATH, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES,
+                 memory_size=CACHE_MEMORY_SIZE):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.memory_size = memory_size
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("""CREATE TABLE IF NOT EXISTS responses (
+            key TEXT PRIMARY KEY, model TEXT, response TEXT NOT NULL, created_at REAL, used_at REAL)""")
+        self.db.execute("CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at)")
+        self.memory = OrderedDict()
+        self.lock = threading.Lock()
+        self.inflight = {}
+        self.stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "expired": 0, "evicted": 0}
+
+    def get(self, key, count_miss=True):
+        """Cached response, or None when missing or expired"""
+        now = time.time()
+        with self.lock:
+            entry = self.memory.get(key)
+            if entry and now - entry[1] < self.ttl:
+                self.memory.move_to_end(key)
+                self.stats["memory_hits"] += 1
+                return entry[0]
+            row = self.db.execute("SELECT response, created_at FROM responses WHERE key = ?", (key,)).fetchone()
+            if row and now - row[1] < self.ttl:
+                self.db.execute("UPDATE responses SET used_at = ? WHERE key = ?", (now, key))
+                self._remember(key, row[0], row[1])
+                self.stats["disk_hits"] += 1
+                return row[0]
+            if row:
+                self.db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                self.memory.pop(key, None)
+                self.stats["expired"] += 1
+            if count_miss:
+                self.stats["misses"] += 1
+            return None
+
+    def put(self, key, model, response):
+        now = time.time()
+        with self.lock:
+            self.db.execute("INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?, ?)",
+                            (key, model, response, now, now))
+            self._remember(key, response, now)
+            count = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+            if count > self.max_entries:
+                self.db.execute("""DELETE FROM responses WHERE key IN (
+                    SELECT key FROM responses ORDER BY used_at LIMIT ?)""", (count - self.max_entries,))
+                self.stats["evicted"] += count - self.max_entries
+            self.db.commit()
+
+    def _remember(self, key, response, created_at):
+        self.memory[key] = (response, created_at)
+        self.memory.move_to_end(key)
+        if len(self.memory) > self.memory_size:
+            self.memory.popitem(last=False)
+
+    def key_lock(self, key):
+        """Lock held while a key is being computed, so concurrent callers wait for it"""
+        with self.lock:
+            return self.inflight.setdefault(key, threading.Lock())
+
+    def count_miss(self):
+        with self.lock:
+            self.stats["misses"] += 1
+
+    def release(self, key):
+        with self.lock:
+            self.inflight.pop(key, None)
+
+    def summary(self):
+        hits = self.stats["memory_hits"] + self.stats["disk_hits"]
+        lookups = hits + self.stats["misses"]
+        with self.lock:
+            entries = self.db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+        return {**self.stats, "hits": hits, "hit_rate": hits / lookups if lookups else 0.0, "entries": entries}
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+
+_cache = None
+
+
+def get_cache():
+    """The open ResponseCache, or None when caching is off"""
+    return _cache
+
+
+def open_cache(path=CACHE_PATH, ttl=CACHE_TTL, max_entries=CACHE_MAX_ENTRIES):
+    """Enable the response cache for chat_completion()"""
+    global _cache
+    _cache = ResponseCache(path, ttl, max_entries)
+    return _cache
+
+
+def close_cache(file=None):
+    """Print cache stats (to file, default stdout), then commit and close it"""
+    global _cache
+    if _cache is not None:
+        stats = _cache.summary()
+        print(f"\nCache: {stats['hits']} hits ({stats['memory_hits']} mémoire, {stats['disk_hits']} disque), "
+              f"{stats['misses']} misses, {stats['hit_rate']:.0%} hit rate, {stats['entries']} entrées", file=file)
+        _cache.close()
+        _cache = None
+
+
+def cache_key(model, system_prompt, user_message, temperature, max_tokens, history=None):
+    """Cache key of a completion request"""
+    system_hash = hashlib.sha256(system_prompt.encode("utf-8")).hexdigest()
+    request = [model, system_hash, user_message, temperature, max_tokens]
+    if history:
+        request.append(history)
+    return hashlib.sha256(json.dumps(request, ensure_ascii=False).encode("utf-8")).hexdigest()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Completions of the Grok/xAI client: blocking, streamed and the generators
+
+Every call goes through the model router (grok_router.get_router()), the
+response cache when open (grok_cache) and is recorded by grok_telemetry:
+  - chat_completion() / routed_completion(): one answer, cached
+  - CompletionStream: text deltas as they arrive, with time to first token
+  - generate_*(): templated generators (PROMPTS), GENERATORS for the daemon
+  - resilience_demo(): scripted failure scenarios against grok_standin.py
+"""
+
+import time
+
+from grok_config import MODEL, TEMPERATURE, MAX_TOKENS, CHARS_PER_TOKEN, SYSTEM_PROMPT, PROMPTS
+from grok_cache import get_cache, cache_key
+from grok_router import GrokError, RestClient, ModelRouter, classify_error, get_router, set_router
+from grok_telemetry import record_timing, usage_of, percentile
+
+
+def build_messages(system_prompt, user_message, history=None):
+    """Chat messages: system prompt, earlier conversation messages, then the user message"""
+    return ([{"role": "system", "content": system_prompt}] + list(history or [])
+            + [{"role": "user", "content": user_message}])
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text (for rate limiting only)"""
+    return len(text) // CHARS_PER_TOKEN + 1
+
+
+def chat_completion(client, user_message: str, system_prompt: str = None, model: str = None,
+                    temperature: float = TEMPERATURE, max_tokens: int = MAX_TOKENS, history: list = None,
+                    label: str = "chat") -> str:
+    """Generate chat completion with 3A Automation context (cached when open_cache() was called)
+
+    model: one model to use (retried, no fallback); default: the fallback chain (MODELS)
+    history: earlier messages ({"role", "content"}) sent between the system prompt and user_message
+    label: generator name the call's usage is aggregated under
+    Raises GrokError when no model could answer.
+    """
+    return routed_completion(client, user_message, system_prompt, model, temperature, max_tokens, history,
+                             label)[0]
+
+
+def routed_completion(client, user_message: str, system_prompt: str = None, model: str = None,
+                      temperature: float = TEMPERATURE, max_tokens: int = MAX_TOKENS, history: list = None,
+                      label: str = "chat"):
+    """chat_completion() returning (content, model that answered)"""
+    if system_prompt is None:
+        system_prompt = SYSTEM_PROMPT
+    models = [model] if model else None
+    router = get_router()
+    cache = get_cache()
+
+    def call(candidate):
+        return request_completion(client, user_message, system_prompt, candidate, temperature, max_tokens,
+                                  history=history, label=label)
+
+    if cache is None:
+        return router.complete(call, models)
+
+    # Keyed by the requested model (chain head): a fallback answer is reused like the primary's
+    model = model or router.models[0]
+    start = time.perf_counter()
+    key = cache_key(model, system_prompt, user_message, temperature, max_tokens, history)
+    cached = cache.get(key, count_miss=False)
+    if cached is not None:
+        elapsed = time.perf_counter() - start
+        record_timing(model, False, True, elapsed, elapsed, label)
+        return cached, model
+    # One request per key: concurrent callers wait and reuse its result
+    try:
+        with cache.key_lock(key):
+            cached = cache.get(key, count_miss=False)
+            if cached is not None:
+                elapsed = time.perf_counter() - start
+                record_timing(model, False, True, elapsed, elapsed, label)
+                return cached, model
+            cache.count_miss()
+            content, served = router.complete(call, models)
+            cache.put(key, served, content)
+            return content, served
+    finally:
+        cache.release(key)
+
+
+def request_completion(client, user_message, system_prompt, model, temperature, max_tokens, history=None,
+                       label="chat"):
+    """One API call to one model; raises a typed GrokError (retries and fallback are ModelRouter's)"""
+    start = time.perf_counter()
+    usage = None
+    error = None
+    try:
+        response = client.chat.completions.create(
+            model=model,
+            messages=build_messages(system_prompt, user_message, history),
+            temperature=temperature,
+            max_tokens=max_tokens
+        )
+        content = response.choices[0].message.content
+        usage = usage_of(response)
+    except Exception as e:
+        error = classify_error(e, model)
+    # Without streaming the first token arrives with the whole answer
+    elapsed = time.perf_counter() - start
+    record_timing(model, False, False, elapsed, elapsed, label, usage, type(error).__name__ if error else None)
+    if error:
+        raise error
+    return content
+
+
+class CompletionStream:
+    """Streaming chat completion: iterate to get text deltas as they arrive
+
+    After iteration, text holds the whole answer, ttft / total the time to
+    the first token and the total time (seconds), model the model that
+    answered. Failures before the first token are retried / failed over by
+    the router; a GrokError is raised (and kept in error) when no model
+    answered or when the stream breaks midway (text keeps the partial answer).
+    A cache hit is yielded in one piece.
+    """
+
+    def __init__(self, client, user_message: str, system_prompt: str = None, model: str = None,
+                 temperature: float = TEMPERATURE, max_tokens: int = MAX_TOKENS, history: list = None,
+                 label: str = "chat"):
+        self.client = client
+        self.user_message = user_message
+        self.history = history
+        self.label = label
+        self.system_prompt = SYSTEM_PROMPT if system_prompt is None else system_prompt
+        self.requested = model
+        self.model = model or get_router().models[0]
+        self.temperature = temperature
+        self.max_tokens = max_tokens
+        self.text = ""
+        self.ttft = None
+        self.total = None
+        self.error = None
+        self.cached = False
+        self.usage = None
+        self.start = None
+
+    def open(self, model):
+        """Start a stream on model and read it up to the first text delta: (chunks, delta)"""
+        attempt_start = time.perf_counter()
+        try:
+            chunks = iter(self.client.chat.completions.create(
+                model=model,
+                messages=build_messages(self.system_prompt, self.user_message, self.history),
+                temperature=self.temperature,
+                max_tokens=self.max_tokens,
+                stream=True,
+                # Usage (incl. cached prompt tokens) comes in a last chunk without choices
+                stream_options={"include_usage": True}
+            ))
+            for chunk in chunks:
+                self.usage = usage_of(chunk) or self.usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if delta:
+                    self.ttft = time.perf_counter() - self.start
+                    return chunks, delta
+            return chunks, ""
+        except Exception as e:
+            error = classify_error(e, model)
+        record_timing(model, True, False, None, time.perf_counter() - attempt_start, self.label, None,
+                      type(error).__name__)
+        raise error
+
+    def __iter__(self):
+        self.start = start = time.perf_counter()
+        key = None
+        cache = get_cache()
+        if cache is not None:
+            key = cache_key(self.model, self.system_prompt, self.user_message, self.temperature, self.max_tokens,
+                            self.history)
+            cached = cache.get(key)
+            if cached is not None:
+                self.text, self.cached = cached, True
+                self.ttft = self.total = time.perf_counter() - start
+                record_timing(self.model, True, True, self.ttft, self.total, self.label)
+                yield cached
+                return
+
+        parts = []
+        served = False
+        try:
+            (chunks, delta), self.model = get_router().complete(self.open, [self.requested] if self.requested else None)
+            served = True
+            if delta:
+                parts.append(delta)
+                yield delta
+            for chunk in chunks:
+                self.usage = usage_of(chunk) or self.usage
+                delta = chunk.choices[0].delta.content if chunk.choices else None
+                if not delta:
+                    continue
+                if self.ttft is None:
+                    self.ttft = time.perf_counter() - start
+                parts.append(delta)
+                yield delta
+        except Exception as e:
+            # Not retried once text is out: the caller already has part of the answer
+            self.error = classify_error(e, self.model)
+            raise self.error
+        finally:
+            self.text = "".join(parts)
+            self.total = time.perf_counter() - start
+            if served:  # failed attempts were recorded by open()
+                record_timing(self.model, True, False, self.ttft, self.total, self.label, self.usage,
+                              type(self.error).__name__ if self.error else None)
+
+        if key:
+            cache.put(key, self.model, self.text)
+
+    def timing_line(self, *details):
+        """Human-readable timings (and extra details), e.g. for the end of a streamed answer"""
+        if self.cached:
+            parts = [f"cache, {self.total:.2f}s"]
+        else:
+            ttft = f"{self.ttft:.2f}s" if self.ttft is not None else "-"
+            parts = [f"1er token: {ttft}", f"total: {self.total:.2f}s"]
+            if self.usage:
+                parts.append(f"{self.usage['prompt_tokens']} tokens prompt dont {self.usage['cached_tokens']} en cache")
+            if self.model != (self.requested or get_router().models[0]):
+                parts.append(f"servi par {self.model}")
+        return f"[{' | '.join(parts + list(details))}]"
+
+
+def complete(client, prompt: str, stream: bool = False, label: str = "chat"):
+    """chat_completion(), or a CompletionStream when stream is set"""
+    if stream:
+        return CompletionStream(client, prompt, label=label)
+    return chat_completion(client, prompt, label=label)
+
+
+def generate_audit_analysis(client, data_json: str, stream: bool = False):
+    """Generate audit analysis from data (a CompletionStream when stream is set)"""
+    prompt = PROMPTS["audit"].format(data=data_json)
+    return complete(client, prompt, stream, "audit")
+
+
+def generate_email_content(client, flow_type: str, product_name: str, price: str, stream: bool = False):
+    """Generate email marketing content (a CompletionStream when stream is set)"""
+    prompt = PROMPTS["email_content"].format(
+        flow_type=flow_type,
+        product_name=product_name,
+        price=price
+    )
+    return complete(client, prompt, stream, "email_content")
+
+
+def generate_product_description(client, product_name: str, category: str,
+                                   features: str, price: str, stream: bool = False):
+    """Generate SEO-optimized product description (a CompletionStream when stream is set)"""
+    prompt = PROMPTS["product_description"].format(
+        product_name=product_name,
+        category=category,
+        features=features,
+        price=price
+    )
+    return complete(client, prompt, stream, "product_description")
+
+
+# Generators served by the daemon: (function, request fields)
+GENERATORS = {
+    "product_description": (generate_product_description, ("product_name", "category", "features", "price")),
+    "email_content": (generate_email_content, ("flow_type", "product_name", "price")),
+    "audit": (generate_audit_analysis, ("data_json",))
+}
+
+
+def resilience_demo(calls: int = 10, timeout: float = 1.5) -> bool:
+    """Retries, fallback and circuit breaker against a local stand-in injecting latency and failures
+
+    Runs the same calls through scripted phases (primary slow, hanging,
+    failing, recovered, everything down) with short thresholds; True when
+    every phase behaved as expected.
+    """
+    from grok_standin import GrokStandIn
+
+    primary, fallback = MODEL, "grok-4-1-fast-non-reasoning"
+    healthy = {"latency": 0.05, "fail": 0.0, "hang": 0.0}
+    standin = GrokStandIn({primary: healthy, fallback: healthy}).start()
+    client = RestClient("standin", standin.url, timeout=timeout)
+    router = ModelRouter([primary, fallback], retries=1, p95_threshold=0.5, error_rate_threshold=0.5,
+                         breaker_failures=3, breaker_cooldown=2.0, window=3.0, min_calls=3, retry_base=0.05)
+    # (title, primary behaviour, fallback behaviour, check of the served models / errors)
+    phases = [
+        ("nominal", healthy, healthy, lambda served, errors: served == {primary: calls}),
+        ("primaire lent (0.8s)", {"latency": 0.8}, healthy,
+         lambda served, errors: served.get(primary, 0) <= router.min_calls and not errors),
+        ("primaire bloqué (timeouts)", {"latency": 0.05, "hang": 1.0, "hang_for": timeout * 2}, healthy,
+         lambda served, errors: served == {fallback: calls}),
+        ("primaire en panne (503)", {"hang": 0.0, "fail": 1.0}, healthy,
+         lambda served, errors: served == {fallback: calls}),
+        ("primaire rétabli", healthy, healthy, lambda served, errors: served.get(primary, 0) >= calls - 1),
+        ("tout en panne (503)", {"fail": 1.0}, {"fail": 1.0},
+         lambda served, errors: errors == {"GrokUnavailableError": calls})
+    ]
+
+    print(f"Stand-in xAI sur {standin.url}: {primary} -> {fallback}, {calls} appels par phase, timeout {timeout}s")
+    print(f"\n{'Phase':<28} {'Primaire':>8} {'Secours':>8} {'Échecs':>7} {'p50':>7} {'p95':>7} "
+          f"{'Req. API':>8}  Circuit primaire")
+    previous = set_router(router)
+    ok = True
+    try:
+        for number, (title, primary_behaviour, fallback_behaviour, check) in enumerate(phases, 1):
+            if number > 1:
+                # Let the previous phase's calls leave the health window and open circuits cool down
+                time.sleep(max(router.window, router.breaker_cooldown))
+            standin.set(primary, **primary_behaviour)
+            standin.set(fallback, **fallback_behaviour)
+            requests_before = sum(standin.requests.values())
+            served, errors, latencies = {}, {}, []
+            for index in range(calls):
+                start = time.perf_counter()
+                try:
+                    _, model = routed_completion(client, f"Phase {number}, appel {index + 1}: réponds OK",
+                                                 label="resilience")
+                    served[model] = served.get(model, 0) + 1
+                except GrokError as e:
+                    errors[type(e).__name__] = errors.get(type(e).__name__, 0) + 1
+                latencies.append(time.perf_counter() - start)
+            passed = check(served, errors)
+            ok = ok and passed
+            print(f"{number}. {title:<25} {served.get(primary, 0):>8} {served.get(fallback, 0):>8} "
+                  f"{sum(errors.values()):>7} {percentile(latencies, 50):>6.2f}s {percentile(latencies, 95):>6.2f}s "
+                  f"{sum(standin.requests.values()) - requests_before:>8}  "
+                  f"{router.stats()[primary]['state']:<10} {'OK' if passed else 'INATTENDU'}")
+
+        # Streams fail over too, as long as no token was sent
+        time.sleep(max(router.window, router.breaker_cooldown))
+        standin.set(primary, fail=1.0)
+        standin.set(fallback, fail=0.0)
+        stream = CompletionStream(client, "Stream: réponds OK", label="resilience")
+        text = "".join(stream)
+        print(f"\nStream, primaire en panne: {text.strip()!r} {stream.timing_line()}")
+        ok = ok and stream.model == fallback
+    finally:
+        set_router(previous)
+        standin.stop()
+
+    print("\nRésilience: " + ("comportement attendu dans toutes les phases" if ok else "ÉCART, voir ci-dessus"))
+    return ok
@@ -0,0 +1,185 @@
+#!/usr/bin/env python3
+"""
+Configuration of the Grok/xAI client modules (environment, defaults, prompts)
+
+Loads .env once and puts automations/lib on the import path; every
+grok_* module imports its settings from here. See grok-client.py for the
+environment variables.
+"""
+
+import os
+import sys
+import json
+from pathlib import Path
+
+# Load environment variables
+try:
+    from dotenv import load_dotenv
+    load_dotenv()
+except ImportError:
+    print("Warning: python-dotenv not installed. Install with: pip install python-dotenv")
+
+# Configuration
+XAI_API_KEY = os.getenv("XAI_API_KEY")
+OUTPUT_DIR = os.getenv("OUTPUT_DIR", "/Users/mac/Desktop/JO-AAA/outputs")
+PROJECT_ROOT = Path(__file__).resolve().parent.parent.parent.parent
+
+# Shared HTTP session and token bucket (automations/lib)
+sys.path.insert(0, str(PROJECT_ROOT / "automations" / "lib"))
+
+MODEL = "grok-4-1-fast-reasoning"  # FRONTIER model (Jan 2026)
+TEMPERATURE = 0.7
+MAX_TOKENS = 2048
+
+# Response cache (opt-in)
+CACHE_PATH = os.getenv("GROK_CACHE_PATH", str(PROJECT_ROOT / "outputs" / "grok-cache.sqlite"))
+CACHE_TTL = int(os.getenv("GROK_CACHE_TTL", 7 * 24 * 3600))       # seconds
+CACHE_MAX_ENTRIES = int(os.getenv("GROK_CACHE_MAX_ENTRIES", 50000))
+CACHE_MEMORY_SIZE = 1024                                          # in-process LRU entries
+
+# Bulk generation
+BULK_OUTPUT = str(PROJECT_ROOT / "outputs" / "product-descriptions.jsonl")
+BULK_CONCURRENCY = 8
+BULK_RPM = 60                # requests per minute
+BULK_TPM = 200000            # tokens per minute (prompt + max_tokens, as providers count them)
+BULK_RETRIES = 4
+BACKOFF_BASE = 2.0           # seconds, doubled per attempt
+BACKOFF_MAX = 60.0
+CHARS_PER_TOKEN = 4          # rough estimate for rate limiting
+
+# Telemetry
+TELEMETRY_PATH = os.getenv("GROK_TELEMETRY_PATH", str(PROJECT_ROOT / "outputs" / "grok-telemetry.jsonl"))
+PROM_PATH = os.getenv("GROK_PROM_PATH", str(PROJECT_ROOT / "outputs" / "grok-client.prom"))
+TELEMETRY_MAX_BYTES = 10 * 1024 * 1024   # rotate the JSONL file beyond this size
+TELEMETRY_BACKUPS = 5                    # rotated files kept (.1 ... .5)
+PROM_INTERVAL = 5.0                      # seconds between textfile rewrites
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120)
+
+# Estimated USD per million tokens: (input, cached input, output) - check console.x.ai
+PRICING = {
+    "grok-4-1-fast-reasoning": (0.20, 0.05, 0.50),
+    "grok-4-1-fast-non-reasoning": (0.20, 0.05, 0.50),
+    "grok-4": (3.00, 0.75, 15.00),
+    "grok-3-mini": (0.30, 0.075, 0.50),
+    **{model: tuple(prices) for model, prices in json.loads(os.getenv("GROK_PRICING", "{}")).items()}
+}
+
+# Conversation memory (interactive chat)
+MEMORY_BUDGET = int(os.getenv("GROK_MEMORY_BUDGET", 6000))   # prompt tokens per request
+MEMORY_KEEP_TURNS = 4                                        # recent turns never folded
+SUMMARY_MAX_TOKENS = 400
+
+# Resilience: fallback chain (preferred model first), retries and circuit breaker per model
+MODELS = [m.strip() for m in os.getenv("GROK_MODELS", f"{MODEL},grok-4-1-fast-non-reasoning").split(",") if m.strip()]
+XAI_BASE_URL = os.getenv("XAI_BASE_URL")       # OpenAI-compatible endpoint instead of xai_sdk (proxy, stand-in)
+REQUEST_TIMEOUT = float(os.getenv("GROK_TIMEOUT", 120))                 # seconds per attempt
+RETRIES = int(os.getenv("GROK_RETRIES", 2))                             # per model, retryable errors only
+RETRY_BASE = 0.5                                                        # seconds, doubled per retry
+P95_THRESHOLD = float(os.getenv("GROK_P95_THRESHOLD", 30))             # seconds: slower models go last
+ERROR_RATE_THRESHOLD = float(os.getenv("GROK_ERROR_RATE_THRESHOLD", 0.5))
+HEALTH_WINDOW = 300.0                                                   # seconds of calls behind p95 / error rate
+HEALTH_MIN_CALLS = 5                                                    # calls in the window before judging
+BREAKER_FAILURES = int(os.getenv("GROK_BREAKER_FAILURES", 5))          # consecutive failures opening the circuit
+BREAKER_COOLDOWN = float(os.getenv("GROK_BREAKER_COOLDOWN", 30))       # seconds before a probe call
+
+# Daemon
+DAEMON_SOCKET = os.getenv("GROK_DAEMON_SOCKET")
+DAEMON_PORT = int(os.getenv("GROK_DAEMON_PORT", 8765))
+DAEMON_TIMEOUT = 300         # seconds per request (long generations)
+
+# System Prompt for 3A Automation
+SYSTEM_PROMPT = """Tu es l'assistant IA de 3A Automation (AAA - AI Automation Agency), spécialisée en Automatisation E-commerce (B2C) et Workflows PME (B2B).
+
+## IDENTITÉ
+
+- Nom: 3A Automation (Automation, Analytics, AI)
+- Type: Agence d'Automatisation AI (AAA)
+- Site: https://3a-automation.com
+- Email: contact@3a-automation.com
+- Localisation: Maroc, servant MENA et monde entier
+- Langues: Français (principal), Anglais, Arabe (sur demande)
+
+## SPÉCIALISATION
+
+- Automatisation E-commerce (B2C) - TOUTES plateformes
+- Workflows PME (B2B) - TOUTES plateformes
+- Analytics & Tracking
+- Intégrations AI
+
+## EXPERTISE TECHNIQUE (TOUTES PLATEFORMES)
+
+E-commerce: Shopify, WooCommerce, Magento, PrestaShop, BigCommerce, etc.
+Email Marketing: Klaviyo, Mailchimp, Omnisend, HubSpot, Brevo, etc.
+Analytics: Google Analytics 4, Mixpanel, Amplitude, etc.
+Automation: n8n, Make, Zapier, scripts natifs Node.js
+Marketing: Meta Ads, Google Ads, TikTok Ads, LinkedIn Ads
+
+## SERVICES OFFERTS
+
+1. Automatisation E-commerce (TOUTES plateformes: sync, webhooks, flows)
+2. Workflows PME B2B (CRM, ERP, facturation, etc.)
+3. Analytics & Reporting (audits, dashboards GA4)
+4. AI Integration (génération contenu, SEO automatisé, Voice AI)
+
+OFFRE GRATUITE: Audit e-commerce complet
+URL: https://3a-automation.com/#contact
+
+## CIBLE CLIENT
+
+PME de tous secteurs (e-commerce, healthcare, B2B, retail)
+Revenue: €10k-500k/mois
+Budget: €300-1000/mois
+
+## PRINCIPES
+
+1. Factualité: Ne jamais faire de claims non vérifiés
+2. Transparence: Honnête sur ce qui est possible
+3. ROI Focus: Actions liées à résultats mesurables
+4. Pas de bullshit: Réponses directes, actionnables
+
+## FORMAT
+
+- Réponses courtes et actionnables
+- Listes pour la clarté
+- Exemples concrets
+- Pas d'emojis sauf demande explicite
+"""
+
+# Specialized prompts: fixed instructions first, per-call data last, so every
+# call of a template shares the longest possible prefix (prompt caching)
+PROMPTS = {
+    "audit": """Analyse les données ci-dessous et génère un rapport d'audit avec:
+1. Points forts identifiés
+2. Problèmes critiques (priorité haute)
+3. Opportunités d'amélioration
+4. Recommandations actionnables avec estimation d'impact
+
+Format: Markdown structuré, factuel uniquement.
+
+Données: {data}""",
+
+    "email_content": """Génère le contenu email du flow et du produit ci-dessous.
+
+Retourne:
+- Subject line (50 chars max)
+- Preview text (90 chars max)
+- Body HTML structure avec CTA clair
+
+Flow: {flow_type}
+Produit: {product_name}
+Prix: {price}""",
+
+    "product_description": """Génère une description produit optimisée SEO pour le produit ci-dessous.
+
+Format:
+- Titre optimisé (60 chars max)
+- Meta description (160 chars)
+- Description longue (500-800 mots)
+- 5 bullet points
+- Alt text image
+
+Produit: {product_name}
+Catégorie: {category}
+Caractéristiques: {features}
+Prix: {price}"""
+}
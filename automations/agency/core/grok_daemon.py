@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+Warm Grok/xAI daemon: one initialized client shared between requests
+
+Served over a Unix socket or 127.0.0.1 HTTP (grok-client.py serve);
+daemon_request() calls it, daemon_bench() compares it with a cold
+one-shot process per request. Routes:
+  GET  /health                 status, active model, circuit states, uptime, request count
+  POST /complete               {"message", "system_prompt"?, "temperature"?, "max_tokens"?, "label"?}
+  POST /generate/<generator>   product_description | email_content | audit fields
+"""
+
+import os
+import sys
+import json
+import stat
+import time
+import socket
+import tempfile
+import threading
+import subprocess
+import http.client
+import socketserver
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from grok_config import TEMPERATURE, MAX_TOKENS, DAEMON_SOCKET, DAEMON_PORT, DAEMON_TIMEOUT
+from grok_cache import get_cache
+from grok_completion import chat_completion, GENERATORS
+from grok_router import GrokError, GrokUnavailableError, get_router
+from grok_telemetry import usage_totals, percentile
+
+# CLI started by daemon_bench() (cold "ask" processes and the daemon)
+CLI_SCRIPT = Path(__file__).resolve().parent / "grok-client.py"
+
+
+class ThreadingUnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """HTTP server on a Unix socket, one thread per connection"""
+    daemon_threads = True
+
+
+def socket_in_use(socket_path) -> bool:
+    """True when something accepts connections on a Unix socket path"""
+    probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    probe.settimeout(1.0)
+    try:
+        probe.connect(socket_path)
+        return True
+    except (ConnectionRefusedError, FileNotFoundError):
+        return False
+    except socket.timeout:
+        return True  # listening, but busy
+    finally:
+        probe.close()
+
+
+class GrokDaemon:
+    """Long-running server sharing one client between requests
+
+    Raises OSError when the socket path (or port) is taken by a live
+    daemon or is not a socket; a stale socket file is replaced.
+    """
+
+    def __init__(self, client, socket_path=None, port=DAEMON_PORT):
+        self.client = client
+        self.started = time.time()
+        self.stats = {"requests": 0, "errors": 0, "seconds": 0.0}
+        self.lock = threading.Lock()
+        daemon = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, status, payload):
+                body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_GET(self):
+                if self.path == "/health":
+                    self.send_json(200, daemon.health())
+                else:
+                    self.send_json(404, {"error": f"unknown route {self.path}"})
+
+            def do_POST(self):
+                try:
+                    length = int(self.headers.get("Content-Length", 0))
+                    payload = json.loads(self.rfile.read(length) or b"{}")
+                    status, reply = daemon.handle(self.path, payload)
+                except ValueError as e:
+                    status, reply = 400, {"error": f"invalid JSON: {e}"}
+                self.send_json(status, reply)
+
+        if socket_path:
+            if os.path.exists(socket_path):
+                if not stat.S_ISSOCK(os.stat(socket_path).st_mode):
+                    raise FileExistsError(f"{socket_path} exists and is not a socket")
+                if socket_in_use(socket_path):
+                    raise OSError(f"a daemon is already listening on {socket_path}")
+                os.remove(socket_path)  # left by a daemon that did not shut down cleanly
+            self.server = ThreadingUnixHTTPServer(socket_path, Handler)
+            self.address = f"unix:{socket_path}"
+        else:
+            self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+            self.server.daemon_threads = True
+            self.address = f"http://127.0.0.1:{self.server.server_port}"
+        self.socket_path = socket_path
+
+    def handle(self, route, payload):
+        """(HTTP status, reply) of a POST request"""
+        start = time.perf_counter()
+        if route == "/complete":
+            if not payload.get("message"):
+                return 400, {"error": "message is required"}
+            request = lambda: chat_completion(self.client, payload["message"], payload.get("system_prompt"),
+                                              temperature=payload.get("temperature", TEMPERATURE),
+                                              max_tokens=payload.get("max_tokens", MAX_TOKENS),
+                                              label=str(payload.get("label", "chat")))
+        elif route.startswith("/generate/") and route[len("/generate/"):] in GENERATORS:
+            generator, fields = GENERATORS[route[len("/generate/"):]]
+            request = lambda: generator(self.client, **{field: str(payload.get(field, "")) for field in fields})
+        else:
+            return 404, {"error": f"unknown route {route}"}
+
+        try:
+            status, reply = 200, {"content": request(), "ok": True}
+        except GrokError as e:
+            # Upstream failure: 502, or 503 when every model is down / has its circuit open
+            status = 503 if isinstance(e, GrokUnavailableError) else 502
+            reply = {"content": "", "ok": False, "error": str(e), "error_type": type(e).__name__,
+                     "retryable": e.retryable}
+        seconds = time.perf_counter() - start
+        with self.lock:
+            self.stats["requests"] += 1
+            self.stats["errors"] += not reply["ok"]
+            self.stats["seconds"] += seconds
+        return status, {**reply, "seconds": round(seconds, 4)}
+
+    def health(self):
+        """Status, the model the next call goes to and the circuit state of every model of the chain
+
+        status is "degraded" when every circuit is open (calls fail fast
+        with GrokUnavailableError until a cooldown ends).
+        """
+        with self.lock:
+            stats = {**self.stats, "seconds": round(self.stats["seconds"], 3)}
+        router = get_router()
+        models = router.stats()
+        active = router.active_model()
+        return {"status": "ok" if active else "degraded", "model": active, "chain": router.models,
+                "circuits": {model: state["state"] for model, state in models.items()},
+                "uptime": round(time.time() - self.started, 1), "cache": get_cache() is not None, **stats,
+                "usage": usage_totals(), "models": models}
+
+    def serve_forever(self):
+        try:
+            self.server.serve_forever()
+        finally:
+            self.server.server_close()
+            if self.socket_path and os.path.exists(self.socket_path):
+                os.remove(self.socket_path)
+
+    def stop(self):
+        self.server.shutdown()
+
+
+class UnixHTTPConnection(http.client.HTTPConnection):
+    """http.client connection over a Unix socket"""
+
+    def __init__(self, socket_path, timeout=DAEMON_TIMEOUT):
+        super().__init__("localhost", timeout=timeout)
+        self.socket_path = socket_path
+
+    def connect(self):
+        self.sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.sock.settimeout(self.timeout)
+        self.sock.connect(self.socket_path)
+
+
+def daemon_request(route: str, payload: dict = None, socket_path: str = DAEMON_SOCKET, port: int = DAEMON_PORT,
+                   timeout: float = DAEMON_TIMEOUT) -> dict:
+    """Call a running daemon (raises OSError when none is listening)"""
+    if socket_path:
+        connection = UnixHTTPConnection(socket_path, timeout)
+    else:
+        connection = http.client.HTTPConnection("127.0.0.1", port, timeout=timeout)
+    try:
+        if payload is None:
+            connection.request("GET", route)
+        else:
+            connection.request("POST", route, json.dumps(payload).encode("utf-8"),
+                               {"Content-Type": "application/json"})
+        return json.loads(connection.getresponse().read())
+    finally:
+        connection.close()
+
+
+def daemon_bench(count: int, message: str) -> dict:
+    """Latency of a cold one-shot process per request vs calls to a warm daemon"""
+    env = {key: value for key, value in os.environ.items() if key != "GROK_CACHE"}
+    script = str(CLI_SCRIPT)
+    results = {"cold": [], "cold_api": [], "warm": [], "warm_api": []}
+
+    print(f"Cold: {count} x 'python grok-client.py ask' (démarrage + import + client + requête)")
+    for _ in range(count):
+        start = time.perf_counter()
+        run = subprocess.run([sys.executable, script, "ask", "--json", message], capture_output=True, text=True,
+                             env=env)
+        results["cold"].append(time.perf_counter() - start)
+        try:
+            results["cold_api"].append(json.loads(run.stdout.strip().splitlines()[-1])["seconds"])
+        except (ValueError, IndexError, KeyError):
+            print(f"ERREUR: ask a échoué: {(run.stdout + run.stderr).strip()[-300:]}")
+            return results
+
+    with tempfile.TemporaryDirectory() as tmp:
+        socket_path = os.path.join(tmp, "grok.sock")
+        start = time.perf_counter()
+        server = subprocess.Popen([sys.executable, script, "serve", "--socket", socket_path], env=env,
+                                  stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        try:
+            while True:
+                try:
+                    daemon_request("/health", socket_path=socket_path, timeout=5)
+                    break
+                except OSError:
+                    if server.poll() is not None or time.perf_counter() - start > 60:
+                        print("ERREUR: le daemon n'a pas démarré")
+                        return results
+                    time.sleep(0.05)
+            ready = time.perf_counter() - start
+
+            print(f"Warm: {count} requêtes au daemon (prêt en {ready:.2f}s, une seule fois)")
+            for _ in range(count):
+                start = time.perf_counter()
+                reply = daemon_request("/complete", {"message": message}, socket_path=socket_path)
+                results["warm"].append(time.perf_counter() - start)
+                results["warm_api"].append(reply["seconds"])
+        finally:
+            server.terminate()
+            server.wait()
+
+    print(f"\n{'':<6} {'p50':>8} {'p95':>8} {'moyenne':>9} {'surcoût/appel':>14}")
+    for label in ("cold", "warm"):
+        values = results[label]
+        overhead = (sum(values) - sum(results[f"{label}_api"])) / len(values)
+        print(f"{label:<6} {percentile(values, 50):>7.3f}s {percentile(values, 95):>7.3f}s "
+              f"{sum(values) / len(values):>8.3f}s {overhead:>13.3f}s")
+    cold_mean = sum(results["cold"]) / count
+    warm_mean = sum(results["warm"]) / count
+    print(f"\nDaemon: {cold_mean - warm_mean:.3f}s gagnées par appel ({cold_mean / warm_mean:.1f}x)")
+    return results
@@ -0,0 +1,103 @@
+#!/usr/bin/env python3
+"""
+Token-budgeted conversation memory for the interactive Grok chat
+
+Recent turns are sent verbatim; when the prompt would exceed the budget,
+the older turns are folded into a running summary (one short model call)
+sent after the system prompt.
+"""
+
+from grok_config import MEMORY_BUDGET, MEMORY_KEEP_TURNS, SUMMARY_MAX_TOKENS, CHARS_PER_TOKEN, SYSTEM_PROMPT
+from grok_completion import chat_completion, estimate_tokens
+from grok_router import GrokError
+
+
+# Header of the summary message sent after the system prompt
+SUMMARY_HEADER = "Résumé de la conversation précédente:\n"
+
+SUMMARY_PROMPT = """Mets à jour le résumé d'une conversation entre un client et l'assistant de 3A Automation.
+Conserve les faits, chiffres, plateformes, décisions, questions ouvertes et préférences du client.
+Réponds uniquement par le nouveau résumé, {words} mots maximum.
+
+Résumé actuel:
+{summary}
+
+Échanges à intégrer:
+{turns}"""
+
+
+class ConversationMemory:
+    """Bounded chat history: recent turns verbatim, older ones in a running summary
+
+    history_for(message) returns the messages to send before the user
+    message so that the whole prompt (system prompt included) stays under
+    budget tokens, folding the oldest turns into the summary when needed.
+    """
+
+    def __init__(self, client, budget: int = MEMORY_BUDGET, keep_turns: int = MEMORY_KEEP_TURNS,
+                 summary_tokens: int = SUMMARY_MAX_TOKENS, system_prompt: str = None):
+        self.client = client
+        self.budget = budget
+        self.keep_turns = keep_turns
+        self.summary_tokens = summary_tokens
+        self.system_prompt = SYSTEM_PROMPT if system_prompt is None else system_prompt
+        self.turns = []          # [(user, assistant)]
+        self.summary = ""
+        self.folded = 0          # turns folded into the summary so far
+        self.summary_calls = 0
+
+    def add(self, user_message: str, answer: str):
+        self.turns.append((user_message, answer))
+
+    def reset(self):
+        self.turns, self.summary, self.folded = [], "", 0
+
+    def messages(self):
+        """Summary and turns as chat messages"""
+        history = []
+        if self.summary:
+            history.append({"role": "system", "content": SUMMARY_HEADER + self.summary})
+        for user_message, answer in self.turns:
+            history.append({"role": "user", "content": user_message})
+            history.append({"role": "assistant", "content": answer})
+        return history
+
+    def prompt_tokens(self, user_message: str, history: list = None) -> int:
+        """Estimated prompt tokens of a request with this memory"""
+        history = self.messages() if history is None else history
+        return (estimate_tokens(self.system_prompt) + estimate_tokens(user_message)
+                + sum(estimate_tokens(m["content"]) for m in history))
+
+    def history_for(self, user_message: str) -> list:
+        """Messages to send before user_message, folding old turns to fit the budget"""
+        while self.turns and self.prompt_tokens(user_message) > self.budget:
+            # Fold everything older than the recent turns at once (one summary call);
+            # when the recent turns alone are too big, fold them one by one
+            count = len(self.turns) - self.keep_turns if len(self.turns) > self.keep_turns else 1
+            self.fold(count)
+        if self.summary and self.prompt_tokens(user_message) > self.budget:
+            # Summary too long for what is left of the budget: keep its beginning. The
+            # summary message costs estimate_tokens(header + summary), i.e. one token
+            # on top of its characters, so keep room - 1 tokens of characters minus the header
+            room = self.budget - self.prompt_tokens(user_message, self.messages()[1:])
+            self.summary = self.summary[:max(0, (room - 1) * CHARS_PER_TOKEN - len(SUMMARY_HEADER))]
+        return self.messages()
+
+    def fold(self, count: int):
+        """Merge the oldest count turns into the summary"""
+        folded, self.turns = self.turns[:count], self.turns[count:]
+        words = self.summary_tokens * 3 // 4
+        turns = "\n".join(f"Client: {u}\nAssistant: {a}" for u, a in folded)
+        self.summary_calls += 1
+        try:
+            summary = chat_completion(self.client, SUMMARY_PROMPT.format(words=words,
+                                                                         summary=self.summary or "(vide)",
+                                                                         turns=turns),
+                                      system_prompt="Tu résumes des conversations, fidèlement et brièvement.",
+                                      temperature=0.2, max_tokens=self.summary_tokens, label="summary")
+        except GrokError:
+            # No summary without the API: keep the start of each exchange
+            summary = "\n".join(filter(None, [self.summary] + [f"Client: {u[:200]} / Assistant: {a[:300]}"
+                                                                for u, a in folded]))
+        self.summary = summary.strip()[:self.summary_tokens * CHARS_PER_TOKEN]
+        self.folded += count
@@ -0,0 +1,389 @@
+#!/usr/bin/env python3
+"""
+Clients, typed errors and the model fallback chain of the Grok/xAI client
+
+  - GrokError and subclasses: failed calls, classified from xai_sdk gRPC,
+    HTTP and network errors (retryable or not)
+  - RestClient: OpenAI-compatible HTTP client (XAI_BASE_URL), create_client()
+  - ModelRouter: fallback chain with retries, a circuit breaker and a
+    latency / error-rate health window per model; get_router() is the
+    router every completion goes through
+"""
+
+import json
+import time
+import random
+import threading
+from types import SimpleNamespace
+from collections import deque
+
+from grok_config import (XAI_API_KEY, MODELS, XAI_BASE_URL, REQUEST_TIMEOUT, RETRIES, RETRY_BASE, P95_THRESHOLD,
+                         ERROR_RATE_THRESHOLD, HEALTH_WINDOW, HEALTH_MIN_CALLS, BREAKER_FAILURES, BREAKER_COOLDOWN,
+                         BACKOFF_BASE, BACKOFF_MAX)
+from grok_telemetry import percentile
+from http_session import PooledSession, parse_retry_after
+
+
+class GrokError(Exception):
+    """Failed API call; retryable errors may succeed on a retry or another model"""
+    retryable = False
+
+    def __init__(self, message, model=None, status=None, retry_after=None):
+        super().__init__(message)
+        self.model = model
+        self.status = status
+        self.retry_after = retry_after  # seconds asked by the server (429 Retry-After)
+
+
+class GrokTimeoutError(GrokError):
+    retryable = True
+
+
+class GrokConnectionError(GrokError):
+    retryable = True
+
+
+class GrokRateLimitError(GrokError):
+    retryable = True
+
+
+class GrokServerError(GrokError):
+    retryable = True
+
+
+class GrokAuthError(GrokError):
+    """Missing, invalid or unauthorized API key"""
+
+
+class GrokBadRequestError(GrokError):
+    """Request rejected as such (invalid argument, unknown model...)"""
+
+
+class GrokCircuitOpenError(GrokError):
+    """Model skipped: its circuit breaker is open after repeated failures"""
+    retryable = True
+
+
+class GrokUnavailableError(GrokError):
+    """No model of the fallback chain answered; errors holds the last error of each model"""
+
+    def __init__(self, errors):
+        last = {}
+        for error in errors:
+            last[error.model] = error
+        self.errors = list(last.values())
+        detail = "; ".join(f"{model}: {type(e).__name__} {e}" for model, e in last.items())
+        super().__init__(f"aucun modèle disponible ({detail or 'chaîne vide'})")
+        self.retryable = any(e.retryable for e in self.errors)
+
+
+# gRPC status (xai_sdk) -> error class
+GRPC_ERRORS = {
+    "DEADLINE_EXCEEDED": GrokTimeoutError,
+    "UNAVAILABLE": GrokConnectionError,
+    "RESOURCE_EXHAUSTED": GrokRateLimitError,
+    "INTERNAL": GrokServerError,
+    "UNAUTHENTICATED": GrokAuthError,
+    "PERMISSION_DENIED": GrokAuthError,
+    "INVALID_ARGUMENT": GrokBadRequestError,
+    "NOT_FOUND": GrokBadRequestError
+}
+
+
+def error_for_status(status: int, message: str, model: str = None, retry_after: float = None) -> GrokError:
+    """GrokError subclass of an HTTP error status"""
+    if status == 429:
+        error_class = GrokRateLimitError
+    elif status in (401, 403):
+        error_class = GrokAuthError
+    elif status in (408, 504):
+        error_class = GrokTimeoutError
+    elif status >= 500:
+        error_class = GrokServerError
+    else:
+        error_class = GrokBadRequestError
+    return error_class(message, model=model, status=status, retry_after=retry_after)
+
+
+def classify_error(error: Exception, model: str = None) -> GrokError:
+    """Typed GrokError of an exception raised by a client (xai_sdk gRPC, HTTP or network)"""
+    if isinstance(error, GrokError):
+        error.model = error.model or model
+        return error
+    message = str(error) or type(error).__name__
+    response = getattr(error, "response", None)
+    status = getattr(error, "status_code", None) or getattr(response, "status_code", None)
+    if isinstance(status, int):
+        headers = getattr(response, "headers", None) or {}
+        return error_for_status(status, message, model, parse_retry_after(headers.get("Retry-After")))
+    code = getattr(error, "code", None)
+    if callable(code):
+        try:
+            name = code().name
+        except Exception:
+            name = None
+        if name in GRPC_ERRORS:
+            return GRPC_ERRORS[name](message, model=model)
+    name = type(error).__name__
+    if isinstance(error, TimeoutError) or "Timeout" in name:
+        return GrokTimeoutError(message, model=model)
+    if isinstance(error, ConnectionError) or "Connection" in name:
+        return GrokConnectionError(message, model=model)
+    return GrokError(message, model=model)
+
+
+class RestClient:
+    """Chat completions over an OpenAI-compatible HTTP API (XAI_BASE_URL, e.g. a proxy or grok_standin.py)
+
+    Same client.chat.completions.create() surface as the SDK client. HTTP
+    errors are raised as typed GrokErrors; retries are left to ModelRouter.
+    """
+
+    def __init__(self, api_key: str, base_url: str, timeout: float = REQUEST_TIMEOUT):
+        self.base_url = base_url.rstrip("/")
+        self.session = PooledSession(timeout=(min(5.0, timeout), timeout), max_retries=0,
+                                     headers={"Authorization": f"Bearer {api_key}"})
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    @staticmethod
+    def parse(text):
+        return json.loads(text, object_hook=lambda obj: SimpleNamespace(**obj))
+
+    def create(self, stream=False, **request):
+        """Completion object, or an iterator of chunks when stream is set"""
+        response = self.session.post(f"{self.base_url}/chat/completions", json={**request, "stream": stream},
+                                     stream=stream)
+        if response.status_code >= 400:
+            try:
+                message = response.json()["error"]["message"]
+            except (ValueError, KeyError, TypeError):
+                message = response.text[:200] or response.reason
+            response.close()
+            raise error_for_status(response.status_code, f"HTTP {response.status_code}: {message}",
+                                   request.get("model"), parse_retry_after(response.headers.get("Retry-After")))
+        if not stream:
+            return self.parse(response.text)
+        return self.events(response)
+
+    def events(self, response):
+        """Chunks of a server-sent events stream"""
+        with response:
+            for line in response.iter_lines(decode_unicode=True):
+                if not line or not line.startswith("data:"):
+                    continue
+                data = line[len("data:"):].strip()
+                if data == "[DONE]":
+                    break
+                yield self.parse(data)
+
+
+def check_api_key():
+    """Verify xAI API key is configured"""
+    if not XAI_API_KEY:
+        print("\n" + "=" * 60)
+        print("ERREUR: XAI_API_KEY non configuré")
+        print("=" * 60)
+        print("\nPour configurer:")
+        print("1. Aller sur https://console.x.ai/api-keys")
+        print("2. Créer une nouvelle clé API")
+        print("3. Ajouter dans .env: XAI_API_KEY=your_key_here")
+        print("\n" + "=" * 60)
+        return False
+    return True
+
+
+def create_client():
+    """Initialize xAI client (a RestClient when XAI_BASE_URL is set)"""
+    if XAI_BASE_URL:
+        return RestClient(XAI_API_KEY, XAI_BASE_URL)
+    try:
+        from xai_sdk import Client
+        return Client(api_key=XAI_API_KEY, timeout=REQUEST_TIMEOUT)
+    except ImportError:
+        print("\n" + "=" * 60)
+        print("ERREUR: xai-sdk non installé")
+        print("=" * 60)
+        print("\nInstaller avec:")
+        print("    pip install xai-sdk")
+        print("Ou avec uv:")
+        print("    uv add xai-sdk")
+        print("\n" + "=" * 60)
+        return None
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE) -> float:
+    """Jittered exponential backoff before retry number attempt + 1"""
+    return min(BACKOFF_MAX, base * 2 ** attempt) * random.uniform(0.5, 1.0)
+
+
+class CircuitBreaker:
+    """Circuit of one model: opens after `failures` consecutive failures, lets one probe through after cooldown"""
+
+    def __init__(self, failures: int = BREAKER_FAILURES, cooldown: float = BREAKER_COOLDOWN):
+        self.failures = failures
+        self.cooldown = cooldown
+        self.consecutive = 0
+        self.opened_at = None
+        self.probing = False
+        self.lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.cooldown else "open"
+
+    def allow(self) -> bool:
+        """True when a call may go to the model (closed, or the single half-open probe)"""
+        with self.lock:
+            state = self.state
+            if state == "closed":
+                return True
+            if state == "half-open" and not self.probing:
+                self.probing = True
+                return True
+            return False
+
+    def succeeded(self):
+        with self.lock:
+            self.consecutive, self.opened_at, self.probing = 0, None, False
+
+    def failed(self):
+        with self.lock:
+            self.consecutive += 1
+            if self.probing or self.consecutive >= self.failures:
+                self.opened_at = time.monotonic()
+            self.probing = False
+
+
+class ModelHealth:
+    """Latency and outcome of the recent calls to one model (time window)"""
+
+    def __init__(self, window: float = HEALTH_WINDOW):
+        self.window = window
+        self.calls = deque()  # (monotonic time, seconds, ok)
+        self.lock = threading.Lock()
+
+    def record(self, seconds: float, ok: bool):
+        with self.lock:
+            self.calls.append((time.monotonic(), seconds, ok))
+
+    def snapshot(self) -> dict:
+        """{"calls", "p95", "error_rate"} over the window"""
+        with self.lock:
+            horizon = time.monotonic() - self.window
+            while self.calls and self.calls[0][0] < horizon:
+                self.calls.popleft()
+            calls = list(self.calls)
+        latencies = [seconds for _, seconds, _ in calls]
+        return {"calls": len(calls), "p95": round(percentile(latencies, 95), 3) if latencies else None,
+                "error_rate": sum(not ok for _, _, ok in calls) / len(calls) if calls else 0.0}
+
+
+class ModelRouter:
+    """Model fallback chain with retries, a circuit breaker and health stats per model
+
+    complete(call) tries the models healthiest first: a model whose circuit
+    is open is skipped, one whose p95 latency or error rate is over its
+    threshold goes to the end of the chain (it is tried again once its slow
+    or failed calls have left the health window). Retryable errors are
+    retried on the same model with jittered backoff (Retry-After honoured),
+    then the next model is tried; other errors are raised at once.
+    """
+
+    def __init__(self, models: list = None, retries: int = RETRIES, p95_threshold: float = P95_THRESHOLD,
+                 error_rate_threshold: float = ERROR_RATE_THRESHOLD, breaker_failures: int = BREAKER_FAILURES,
+                 breaker_cooldown: float = BREAKER_COOLDOWN, window: float = HEALTH_WINDOW,
+                 min_calls: int = HEALTH_MIN_CALLS, retry_base: float = RETRY_BASE):
+        self.models = list(models or MODELS)
+        self.retries = retries
+        self.p95_threshold = p95_threshold
+        self.error_rate_threshold = error_rate_threshold
+        self.breaker_failures = breaker_failures
+        self.breaker_cooldown = breaker_cooldown
+        self.window = window
+        self.min_calls = min_calls
+        self.retry_base = retry_base
+        self.breakers = {}
+        self.health = {}
+        self.lock = threading.Lock()
+
+    def state_of(self, model):
+        """(CircuitBreaker, ModelHealth) of a model"""
+        with self.lock:
+            if model not in self.breakers:
+                self.breakers[model] = CircuitBreaker(self.breaker_failures, self.breaker_cooldown)
+                self.health[model] = ModelHealth(self.window)
+            return self.breakers[model], self.health[model]
+
+    def degraded(self, model) -> bool:
+        """True when the model's recent p95 latency or error rate is over its threshold"""
+        health = self.state_of(model)[1].snapshot()
+        if health["calls"] < self.min_calls:
+            return False
+        return health["p95"] > self.p95_threshold or health["error_rate"] > self.error_rate_threshold
+
+    def candidates(self, models: list = None) -> list:
+        """Models in trial order: chain order, degraded ones last"""
+        return sorted(models or self.models, key=self.degraded)
+
+    def active_model(self, models: list = None):
+        """Model the next call would go to: first candidate whose circuit is not open (None if all are)"""
+        return next((model for model in self.candidates(models) if self.state_of(model)[0].state != "open"), None)
+
+    def complete(self, call, models: list = None):
+        """(result, model) of the first model for which call(model) succeeds
+
+        call raises GrokError on failure. Raises the first non-retryable
+        error, or GrokUnavailableError when every model failed.
+        """
+        errors = []
+        for model in self.candidates(models):
+            breaker, health = self.state_of(model)
+            for attempt in range(self.retries + 1):
+                if not breaker.allow():
+                    errors.append(GrokCircuitOpenError(f"circuit ouvert ({breaker.consecutive} échecs)", model))
+                    break
+                start = time.perf_counter()
+                try:
+                    result = call(model)
+                except GrokError as e:
+                    if not e.retryable:
+                        breaker.succeeded()  # the model answered: the request itself is at fault
+                        raise
+                    breaker.failed()
+                    health.record(time.perf_counter() - start, False)
+                    errors.append(e)
+                    # A timed-out attempt already cost the whole timeout: go to the next model
+                    if isinstance(e, GrokTimeoutError) or attempt == self.retries:
+                        break
+                    delay = e.retry_after if e.retry_after is not None else backoff_delay(attempt, self.retry_base)
+                    time.sleep(min(delay, BACKOFF_MAX))
+                    continue
+                breaker.succeeded()
+                health.record(time.perf_counter() - start, True)
+                return result, model
+        raise GrokUnavailableError(errors)
+
+    def stats(self) -> dict:
+        """{model: {"state", "degraded", "calls", "p95", "error_rate"}} of the chain"""
+        stats = {}
+        for model in self.models:
+            breaker, health = self.state_of(model)
+            stats[model] = {"state": breaker.state, "degraded": self.degraded(model), **health.snapshot()}
+        return stats
+
+
+_router = ModelRouter()
+
+
+def get_router():
+    """The ModelRouter completions go through"""
+    return _router
+
+
+def set_router(router):
+    """Route completions through another ModelRouter (e.g. a test chain); returns the previous one"""
+    global _router
+    previous, _router = _router, router
+    return previous
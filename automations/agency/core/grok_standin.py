@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""
+Local xAI (OpenAI-compatible) chat completions stand-in for grok-client.py
+
+Serves POST /v1/chat/completions on 127.0.0.1 with per-model behaviour
+that can be changed while it runs, to exercise retries, the circuit
+breaker and the model fallback chain without the real API:
+  - latency:  seconds before answering (or before the first streamed token)
+  - fail:     share of requests answered with `status` (default 503)
+  - status:   error status returned on failure (429 adds Retry-After: 1)
+  - hang:     share of requests that sleep `hang_for` seconds (client timeouts)
+
+Streams (stream=true) are sent as server-sent events, with a last usage
+chunk when stream_options.include_usage is set. Usage reports the system
+prompt as cached prompt tokens once it has been seen.
+
+Usage:
+  python grok_standin.py --model grok-4-1-fast-reasoning:latency=2,fail=0.3 \
+                         --model grok-4-1-fast-non-reasoning:latency=0.2
+  XAI_BASE_URL=http://127.0.0.1:<port>/v1 python grok-client.py ask "..."
+
+  python grok-client.py resilience-demo   # scripted failure scenarios against it
+"""
+
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+DEFAULT_BEHAVIOUR = {"latency": 0.05, "fail": 0.0, "status": 503, "hang": 0.0, "hang_for": 30.0}
+
+CHARS_PER_TOKEN = 4
+
+
+class GrokStandIn:
+    """Threaded OpenAI-compatible server with configurable latency and failures per model"""
+
+    def __init__(self, models=None, seed=1):
+        self.models = {name: {**DEFAULT_BEHAVIOUR, **behaviour} for name, behaviour in (models or {}).items()}
+        self.requests = {}
+        self.seen_prefixes = set()
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def log_message(self, *args):
+                pass
+
+            def handle_one_request(self):
+                try:
+                    super().handle_one_request()
+                except (BrokenPipeError, ConnectionResetError):
+                    self.close_connection = True  # the client gave up (timeout)
+
+            def send_json(self, status, payload, headers=None):
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+
+            def do_POST(self):
+                length = int(self.headers.get("Content-Length", 0))
+                request = json.loads(self.rfile.read(length) or b"{}")
+                if self.path.rstrip("/") != "/v1/chat/completions":
+                    self.send_json(404, {"error": {"message": f"unknown route {self.path}"}})
+                    return
+                model = request.get("model")
+                behaviour, outcome = standin.decide(model)
+                if outcome == "unknown":
+                    self.send_json(404, {"error": {"message": f"model {model} not found"}})
+                    return
+                if outcome == "hang":
+                    time.sleep(behaviour["hang_for"])
+                time.sleep(behaviour["latency"])
+                if outcome == "fail":
+                    headers = {"Retry-After": "1"} if behaviour["status"] == 429 else None
+                    self.send_json(behaviour["status"], {"error": {"message": f"injected {behaviour['status']}"}},
+                                   headers)
+                    return
+
+                content = f"[{model}] OK: " + " ".join(str(m.get("content", ""))[:40]
+                                                      for m in request.get("messages", [])[-1:])
+                usage = standin.usage(request, content)
+                if request.get("stream"):
+                    self.stream(model, content, usage, (request.get("stream_options") or {}).get("include_usage"))
+                else:
+                    self.send_json(200, {
+                        "id": "standin", "object": "chat.completion", "model": model,
+                        "choices": [{"index": 0, "message": {"role": "assistant", "content": content},
+                                     "finish_reason": "stop"}],
+                        "usage": usage
+                    })
+
+            def stream(self, model, content, usage, include_usage):
+                self.send_response(200)
+                self.send_header("Content-Type", "text/event-stream")
+                self.send_header("Connection", "close")
+                self.end_headers()
+                events = [{"choices": [{"index": 0, "delta": {"content": word + " "}}]} for word in content.split()]
+                if include_usage:
+                    events.append({"choices": [], "usage": usage})
+                for event in events:
+                    self.wfile.write(f"data: {json.dumps({'model': model, **event})}\n\n".encode("utf-8"))
+                    self.wfile.flush()
+                    time.sleep(0.005)
+                self.wfile.write(b"data: [DONE]\n\n")
+                self.close_connection = True
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}/v1"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def set(self, model, **behaviour):
+        """Change a model's behaviour while running"""
+        with self.lock:
+            self.models.setdefault(model, dict(DEFAULT_BEHAVIOUR)).update(behaviour)
+
+    def decide(self, model):
+        """(behaviour, 'ok' | 'fail' | 'hang' | 'unknown') for one request"""
+        with self.lock:
+            if model not in self.models:
+                return None, "unknown"
+            behaviour = dict(self.models[model])
+            self.requests[model] = self.requests.get(model, 0) + 1
+            draw = self.rng.random()
+        if draw < behaviour["hang"]:
+            return behaviour, "hang"
+        if draw < behaviour["hang"] + behaviour["fail"]:
+            return behaviour, "fail"
+        return behaviour, "ok"
+
+    def usage(self, request, content):
+        messages = request.get("messages", [])
+        prompt = sum(len(str(m.get("content", ""))) for m in messages) // CHARS_PER_TOKEN
+        system = "".join(str(m.get("content", "")) for m in messages[:1] if m.get("role") == "system")
+        with self.lock:
+            cached = len(system) // CHARS_PER_TOKEN if system in self.seen_prefixes else 0
+            self.seen_prefixes.add(system)
+        return {"prompt_tokens": prompt, "completion_tokens": len(content) // CHARS_PER_TOKEN,
+                "total_tokens": prompt + len(content) // CHARS_PER_TOKEN,
+                "prompt_tokens_details": {"cached_tokens": cached}}
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def parse_model(value):
+    """'name:latency=2,fail=0.3' -> (name, {'latency': 2.0, 'fail': 0.3})"""
+    name, _, options = value.partition(":")
+    behaviour = {}
+    for option in filter(None, options.split(",")):
+        key, _, number = option.partition("=")
+        if key not in DEFAULT_BEHAVIOUR:
+            raise argparse.ArgumentTypeError(f"unknown option {key} (use {', '.join(DEFAULT_BEHAVIOUR)})")
+        behaviour[key] = int(number) if key == "status" else float(number)
+    return name, behaviour
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local xAI chat completions stand-in")
+    parser.add_argument("--model", type=parse_model, action="append", default=[],
+                        help="name[:latency=S,fail=P,status=N,hang=P,hang_for=S] (repeatable)")
+    args = parser.parse_args()
+
+    models = dict(args.model) or {"grok-4-1-fast-reasoning": {}, "grok-4-1-fast-non-reasoning": {}}
+    standin = GrokStandIn(models).start()
+    print(f"🤖 xAI stand-in on {standin.url} ({', '.join(models)})")
+    try:
+        standin.thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,319 @@
+#!/usr/bin/env python3
+"""
+Call timings, per-generator usage and telemetry of the Grok/xAI client
+
+  - CALL_TIMINGS: timings of the latest calls (time to first token, total)
+  - USAGE: API usage per generator label, print_usage()
+  - Telemetry: per-call events to a rotating JSONL file, counters and
+    latency histograms to a Prometheus textfile (open_telemetry())
+  - telemetry_summary(): p50/p95 per model/template and daily totals
+"""
+
+import os
+import json
+import time
+import threading
+from pathlib import Path
+from datetime import datetime, timedelta
+from collections import deque
+
+from grok_config import (TELEMETRY_PATH, PROM_PATH, TELEMETRY_MAX_BYTES, TELEMETRY_BACKUPS, PROM_INTERVAL,
+                         LATENCY_BUCKETS, PRICING)
+
+# Timings of the latest calls: {"model", "label", "stream", "cached", "ttft", "total", "usage"}
+CALL_TIMINGS = deque(maxlen=1000)
+
+# API usage per generator label (chat, product_description, ...), see record_timing()
+USAGE = {}
+_usage_lock = threading.Lock()
+
+
+def percentile(values: list, p: float) -> float:
+    """p-th percentile (0-100) of values, nearest rank"""
+    ordered = sorted(values)
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, max(0, round(p / 100 * len(ordered) + 0.5) - 1))]
+
+
+def _field(obj, name):
+    """Attribute or key of an API object (SDK objects and plain dicts alike)"""
+    if obj is None:
+        return None
+    return obj.get(name) if isinstance(obj, dict) else getattr(obj, name, None)
+
+
+def usage_of(response):
+    """{"prompt_tokens", "cached_tokens", "completion_tokens"} reported with a response, or None"""
+    usage = _field(response, "usage")
+    if usage is None:
+        return None
+    return {
+        "prompt_tokens": int(_field(usage, "prompt_tokens") or 0),
+        # Prompt tokens served from the provider's prefix cache (billed at a discount)
+        "cached_tokens": int(_field(_field(usage, "prompt_tokens_details"), "cached_tokens") or 0),
+        "completion_tokens": int(_field(usage, "completion_tokens") or 0)
+    }
+
+
+def record_timing(model, stream, cached, ttft, total, label="chat", usage=None, error=None):
+    """Keep the timing of one call in CALL_TIMINGS, add its usage to USAGE, log it to telemetry; return it
+
+    cached: answered from the local response cache (no API call, not in USAGE)
+    error: exception class name of a failed call
+    """
+    timing = {"model": model, "label": label, "stream": stream, "cached": cached, "ttft": ttft, "total": total,
+              "usage": usage, "error": error}
+    CALL_TIMINGS.append(timing)
+    if _telemetry is not None:
+        _telemetry.record(timing)
+    if not cached:
+        with _usage_lock:
+            totals = USAGE.setdefault(label, {
+                "calls": 0, "seconds": 0.0, "prompt_tokens": 0, "cached_tokens": 0, "completion_tokens": 0,
+                "prefix_hit_calls": 0, "prefix_hit_seconds": 0.0})
+            totals["calls"] += 1
+            totals["seconds"] += total
+            if usage:
+                for key in ("prompt_tokens", "cached_tokens", "completion_tokens"):
+                    totals[key] += usage[key]
+                if usage["cached_tokens"]:
+                    totals["prefix_hit_calls"] += 1
+                    totals["prefix_hit_seconds"] += total
+    return timing
+
+
+def usage_totals():
+    """Copy of USAGE: {label: {"calls", "seconds", "prompt_tokens", "cached_tokens", ...}}"""
+    with _usage_lock:
+        return {label: dict(totals) for label, totals in USAGE.items()}
+
+
+def print_usage():
+    """Per-generator API usage: prompt tokens served from the prefix cache and latency with/without"""
+    usage = usage_totals()
+    if not usage:
+        return
+    print(f"\n{'Générateur':<20} {'Appels':>6} {'Prompt':>9} {'Cachés':>9} {'%':>4} {'Complétion':>10} "
+          f"{'Lat. moy':>9} {'avec cache':>10} {'sans':>7}")
+    for label, t in sorted(usage.items()):
+        share = t["cached_tokens"] / t["prompt_tokens"] if t["prompt_tokens"] else 0.0
+        misses = t["calls"] - t["prefix_hit_calls"]
+        with_hit = f"{t['prefix_hit_seconds'] / t['prefix_hit_calls']:.2f}s" if t["prefix_hit_calls"] else "-"
+        without = f"{(t['seconds'] - t['prefix_hit_seconds']) / misses:.2f}s" if misses else "-"
+        print(f"{label:<20} {t['calls']:>6} {t['prompt_tokens']:>9} {t['cached_tokens']:>9} {share:>4.0%} "
+              f"{t['completion_tokens']:>10} {t['seconds'] / t['calls']:>8.2f}s {with_hit:>10} {without:>7}")
+
+
+def estimate_cost(model, usage):
+    """Estimated USD cost of a call from its usage (None for unknown models or usage)"""
+    prices = PRICING.get(model)
+    if not prices or not usage:
+        return None
+    uncached = usage["prompt_tokens"] - usage["cached_tokens"]
+    return (uncached * prices[0] + usage["cached_tokens"] * prices[1]
+            + usage["completion_tokens"] * prices[2]) / 1_000_000
+
+
+def prom_escape(value):
+    """Prometheus label value escaping"""
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def prom_labels(**labels):
+    """Prometheus label set, e.g. {model="grok-4",template="chat"}"""
+    return "{" + ",".join(f'{key}="{prom_escape(value)}"' for key, value in labels.items()) + "}"
+
+
+class Telemetry:
+    """Per-call events to a rotating JSONL file; counters and histograms to a Prometheus textfile"""
+
+    def __init__(self, path=TELEMETRY_PATH, prom_path=PROM_PATH, max_bytes=TELEMETRY_MAX_BYTES,
+                 backups=TELEMETRY_BACKUPS):
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = str(path)
+        self.prom_path = str(prom_path) if prom_path else None
+        self.max_bytes = max_bytes
+        self.backups = backups
+        self.lock = threading.Lock()
+        self.file = open(self.path, "a", encoding="utf-8")
+        self.counters = {}     # (metric, labels) -> value
+        self.histograms = {}   # (metric, labels) -> [bucket counts, sum, count]
+        self.prom_written = 0.0
+
+    def record(self, timing):
+        usage = timing["usage"] or {}
+        cost = 0.0 if timing["cached"] else estimate_cost(timing["model"], timing["usage"])
+        event = {
+            "ts": datetime.now().astimezone().isoformat(timespec="milliseconds"),
+            "model": timing["model"],
+            "template": timing["label"],
+            "stream": timing["stream"],
+            "cached": timing["cached"],
+            "status": "error" if timing["error"] else "ok",
+            "error": timing["error"],
+            "latency": round(timing["total"], 4),
+            "ttft": round(timing["ttft"], 4) if timing["ttft"] is not None else None,
+            "prompt_tokens": usage.get("prompt_tokens"),
+            "cached_tokens": usage.get("cached_tokens"),
+            "completion_tokens": usage.get("completion_tokens"),
+            "cost_usd": round(cost, 8) if cost is not None else None
+        }
+        with self.lock:
+            self.file.write(json.dumps(event) + "\n")
+            self.file.flush()
+            if self.file.tell() >= self.max_bytes:
+                self._rotate()
+            self._count(event)
+            if time.monotonic() - self.prom_written >= PROM_INTERVAL:
+                self._write_prom()
+
+    def _rotate(self):
+        self.file.close()
+        for n in range(self.backups - 1, 0, -1):
+            if os.path.exists(f"{self.path}.{n}"):
+                os.replace(f"{self.path}.{n}", f"{self.path}.{n + 1}")
+        os.replace(self.path, f"{self.path}.1")
+        self.file = open(self.path, "a", encoding="utf-8")
+
+    def _count(self, event):
+        labels = prom_labels(model=event["model"], template=event["template"])
+        status = prom_labels(model=event["model"], template=event["template"], status=event["status"],
+                             error=event["error"] or "", source="cache" if event["cached"] else "api")
+        self._add("grok_requests_total", status, 1)
+        if event["cached"]:
+            return
+        for kind in ("prompt", "cached", "completion"):
+            tokens = event[f"{kind}_tokens"]
+            if tokens:
+                self._add("grok_tokens_total", prom_labels(model=event["model"], template=event["template"],
+                                                           kind=kind), tokens)
+        if event["cost_usd"]:
+            self._add("grok_cost_usd_total", labels, event["cost_usd"])
+        self._observe("grok_request_duration_seconds", labels, event["latency"])
+        if event["ttft"] is not None:
+            self._observe("grok_time_to_first_token_seconds", labels, event["ttft"])
+
+    def _add(self, metric, labels, value):
+        self.counters[(metric, labels)] = self.counters.get((metric, labels), 0) + value
+
+    def _observe(self, metric, labels, value):
+        buckets, total, count = self.histograms.get((metric, labels), ([0] * len(LATENCY_BUCKETS), 0.0, 0))
+        buckets = [n + (value <= bound) for n, bound in zip(buckets, LATENCY_BUCKETS)]
+        self.histograms[(metric, labels)] = (buckets, total + value, count + 1)
+
+    def _write_prom(self):
+        if not self.prom_path:
+            return
+        lines = []
+        for metric, kind in (("grok_requests_total", "counter"), ("grok_tokens_total", "counter"),
+                             ("grok_cost_usd_total", "counter")):
+            lines.append(f"# TYPE {metric} {kind}")
+            lines += [f"{metric}{labels} {value:g}" for (name, labels), value in sorted(self.counters.items())
+                      if name == metric]
+        for metric in ("grok_request_duration_seconds", "grok_time_to_first_token_seconds"):
+            lines.append(f"# TYPE {metric} histogram")
+            for (name, labels), (buckets, total, count) in sorted(self.histograms.items()):
+                if name != metric:
+                    continue
+                for bound, n in zip(LATENCY_BUCKETS, buckets):
+                    lines.append(f'{metric}_bucket{labels[:-1]},le="{bound}"}} {n}')
+                lines.append(f'{metric}_bucket{labels[:-1]},le="+Inf"}} {count}')
+                lines.append(f"{metric}_sum{labels} {total:.6f}")
+                lines.append(f"{metric}_count{labels} {count}")
+        # Atomic replace: the collector never reads a half-written file
+        tmp_path = f"{self.prom_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write("\n".join(lines) + "\n")
+        os.replace(tmp_path, self.prom_path)
+        self.prom_written = time.monotonic()
+
+    def close(self):
+        with self.lock:
+            self._write_prom()
+            self.file.close()
+
+
+_telemetry = None
+
+
+def open_telemetry(path=TELEMETRY_PATH, prom_path=PROM_PATH):
+    """Log every call (JSONL + Prometheus textfile)"""
+    global _telemetry
+    _telemetry = Telemetry(path, prom_path)
+    return _telemetry
+
+
+def close_telemetry():
+    """Write the final Prometheus textfile and close the log"""
+    global _telemetry
+    if _telemetry is not None:
+        _telemetry.close()
+        _telemetry = None
+
+
+def read_telemetry(path=TELEMETRY_PATH, since=None):
+    """Telemetry events of path and its rotated files, oldest first (optionally since a datetime)"""
+    files = [f"{path}.{n}" for n in range(TELEMETRY_BACKUPS, 0, -1)] + [path]
+    events = []
+    for name in files:
+        if not os.path.exists(name):
+            continue
+        with open(name, encoding="utf-8") as f:
+            for line in f:
+                try:
+                    event = json.loads(line)
+                except ValueError:
+                    continue
+                if since is None or datetime.fromisoformat(event["ts"]) >= since:
+                    events.append(event)
+    return events
+
+
+def telemetry_summary(path=TELEMETRY_PATH, days=None):
+    """Print latency percentiles per model/template, errors by type and daily totals"""
+    since = datetime.now().astimezone() - timedelta(days=days) if days else None
+    events = read_telemetry(path, since)
+    if not events:
+        print(f"Aucun appel enregistré dans {path}")
+        return False
+
+    groups = {}
+    for event in events:
+        groups.setdefault((event["model"], event["template"]), []).append(event)
+    print(f"{len(events)} appels ({events[0]['ts'][:16]} -> {events[-1]['ts'][:16]})\n")
+    print(f"{'Modèle':<28} {'Template':<20} {'Appels':>6} {'Cache':>5} {'Err':>4} {'p50':>7} {'p95':>7} "
+          f"{'TTFT p50':>8} {'Tokens':>9} {'Coût $':>9}")
+    for (model, template), group in sorted(groups.items()):
+        api = [e for e in group if not e["cached"]]
+        latencies = [e["latency"] for e in api if e["status"] == "ok"]
+        ttfts = [e["ttft"] for e in api if e["status"] == "ok" and e["ttft"] is not None]
+        tokens = sum((e["prompt_tokens"] or 0) + (e["completion_tokens"] or 0) for e in api)
+        cost = sum(e["cost_usd"] or 0 for e in api)
+        print(f"{model:<28} {template:<20} {len(group):>6} {len(group) - len(api):>5} "
+              f"{sum(e['status'] == 'error' for e in group):>4} {percentile(latencies, 50):>6.2f}s "
+              f"{percentile(latencies, 95):>6.2f}s {percentile(ttfts, 50):>7.2f}s {tokens:>9} {cost:>9.4f}")
+
+    errors = {}
+    for event in events:
+        if event["error"]:
+            errors[event["error"]] = errors.get(event["error"], 0) + 1
+    if errors:
+        print("\nErreurs: " + ", ".join(f"{name} x{count}" for name, count in
+                                         sorted(errors.items(), key=lambda item: -item[1])))
+
+    days_totals = {}
+    for event in events:
+        day = days_totals.setdefault(event["ts"][:10], {"calls": 0, "errors": 0, "tokens": 0, "cached": 0,
+                                                          "cost": 0.0, "seconds": 0.0})
+        day["calls"] += 1
+        day["errors"] += event["status"] == "error"
+        day["tokens"] += (event["prompt_tokens"] or 0) + (event["completion_tokens"] or 0)
+        day["cached"] += event["cached_tokens"] or 0
+        day["cost"] += event["cost_usd"] or 0
+        day["seconds"] += 0 if event["cached"] else event["latency"]
+    print(f"\n{'Jour':<10} {'Appels':>6} {'Err':>4} {'Tokens':>10} {'Cachés':>9} {'Coût $':>9} {'Temps LLM':>10}")
+    for date, day in sorted(days_totals.items()):
+        print(f"{date:<10} {day['calls']:>6} {day['errors']:>4} {day['tokens']:>10} {day['cached']:>9} "
+              f"{day['cost']:>9.4f} {day['seconds'] / 60:>9.1f}m")
+    return True
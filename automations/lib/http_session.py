@@ -0,0 +1,247 @@
+#!/usr/bin/env python3
+"""
+Shared pooled HTTP session for the Python REST automations
+3A Automation - Technology Shelf
+
+One requests.Session per process, reused by every REST call:
+  - keep-alive connection pooling (no TCP/TLS handshake per page)
+  - gzip/deflate negotiation
+  - connect/read timeouts on every request
+  - retries on 429/5xx and network errors, honouring Retry-After
+    (idempotent methods only; POST/PATCH only when the connection failed
+    before the request was sent, unless the caller passes retry=True)
+  - per-host request, retry, error and latency counters
+  - RateLimiter: thread-safe token bucket for per-account API limits
+
+Usage:
+    sys.path.insert(0, str(project_root / 'automations' / 'lib'))
+    from http_session import get_session
+
+    session = get_session()
+    response = session.get(url, headers=headers, params=params)
+    response.raise_for_status()
+    ...
+    session.print_stats()
+
+Environment Variables (optional):
+  - HTTP_CONNECT_TIMEOUT: seconds (default: 5)
+  - HTTP_READ_TIMEOUT: seconds (default: 30)
+  - HTTP_MAX_RETRIES: retries per request (default: 4)
+  - HTTP_POOL_SIZE: connections kept per host (default: 10)
+"""
+
+import os
+import time
+import random
+import threading
+from email.utils import parsedate_to_datetime
+from datetime import datetime, timezone
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.exceptions import NewConnectionError
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+CONNECT_TIMEOUT = float(os.getenv('HTTP_CONNECT_TIMEOUT', '5'))
+READ_TIMEOUT = float(os.getenv('HTTP_READ_TIMEOUT', '30'))
+MAX_RETRIES = int(os.getenv('HTTP_MAX_RETRIES', '4'))
+POOL_SIZE = int(os.getenv('HTTP_POOL_SIZE', '10'))
+
+# Status codes worth retrying
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Methods safe to send twice; others (POST, PATCH) may have been applied
+# before a timeout or 5xx, so they are only retried on request (retry=True)
+IDEMPOTENT_METHODS = {'GET', 'HEAD', 'OPTIONS', 'PUT', 'DELETE'}
+
+# Backoff bounds (seconds)
+BACKOFF_BASE = 0.5
+BACKOFF_MAX = 60.0
+
+# ============================================================================
+# SESSION
+# ============================================================================
+
+
+def not_sent(error):
+    """True when a network error happened before the request was sent (connect failure)"""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    reason = getattr(error.args[0], 'reason', None) if error.args else None
+    return isinstance(reason, NewConnectionError)
+
+
+def parse_retry_after(value):
+    """Parse a Retry-After header (delta-seconds or HTTP date) into seconds"""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+        return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+    except (TypeError, ValueError):
+        return None
+
+
+class PooledSession:
+    """requests.Session wrapper with pooling, timeouts, retries and counters"""
+
+    def __init__(self, timeout=None, max_retries=None, pool_size=None, headers=None):
+        self.timeout = timeout or (CONNECT_TIMEOUT, READ_TIMEOUT)
+        self.max_retries = MAX_RETRIES if max_retries is None else max_retries
+        pool_size = pool_size or POOL_SIZE
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers.update({'Accept-Encoding': 'gzip, deflate'})
+        if headers:
+            self.session.headers.update(headers)
+
+        self._stats = {}
+        self._lock = threading.Lock()
+
+    def _record(self, host, latency, retried=False, failed=False):
+        """Update the per-host counters"""
+        with self._lock:
+            stats = self._stats.setdefault(host, {
+                'requests': 0, 'retries': 0, 'errors': 0,
+                'total_latency': 0.0, 'max_latency': 0.0
+            })
+            stats['requests'] += 1
+            stats['retries'] += int(retried)
+            stats['errors'] += int(failed)
+            stats['total_latency'] += latency
+            stats['max_latency'] = max(stats['max_latency'], latency)
+
+    def _backoff(self, attempt, response=None):
+        """Seconds to wait before the next attempt"""
+        if response is not None:
+            retry_after = parse_retry_after(response.headers.get('Retry-After'))
+            if retry_after is not None:
+                return min(retry_after, BACKOFF_MAX)
+        # Exponential backoff with full jitter
+        return random.uniform(0, min(BACKOFF_MAX, BACKOFF_BASE * (2 ** attempt)))
+
+    def request(self, method, url, retry=None, **kwargs):
+        """Send a request, retrying on 429/5xx and network errors
+
+        retry: retry on any failure (True), or only on connect failures
+        (False); default: True for idempotent methods, False for POST/PATCH,
+        which a read timeout or 5xx may have left applied on the server.
+        Returns the last response (callers still call raise_for_status) or
+        re-raises the last network error once retries are exhausted.
+        """
+        kwargs.setdefault('timeout', self.timeout)
+        host = urlsplit(url).netloc
+        retry_any = method.upper() in IDEMPOTENT_METHODS if retry is None else retry
+
+        attempt = 0
+        while True:
+            start = time.perf_counter()
+            try:
+                response = self.session.request(method, url, **kwargs)
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                retry = attempt < self.max_retries and (retry_any or not_sent(e))
+                self._record(host, time.perf_counter() - start, retried=retry, failed=not retry)
+                if not retry:
+                    raise
+                time.sleep(self._backoff(attempt))
+                attempt += 1
+                continue
+
+            retry = retry_any and response.status_code in RETRY_STATUSES and attempt < self.max_retries
+            self._record(host, time.perf_counter() - start, retried=retry,
+                         failed=response.status_code >= 400 and not retry)
+            if not retry:
+                return response
+
+            delay = self._backoff(attempt, response)
+            response.close()
+            time.sleep(delay)
+            attempt += 1
+
+    def get(self, url, **kwargs):
+        """GET with pooling, timeout and retries"""
+        return self.request('GET', url, **kwargs)
+
+    def post(self, url, **kwargs):
+        """POST with pooling and timeout; retried only on connect failures unless retry=True"""
+        return self.request('POST', url, **kwargs)
+
+    def head(self, url, **kwargs):
+        """HEAD with pooling, timeout and retries"""
+        return self.request('HEAD', url, **kwargs)
+
+    def stats(self):
+        """Per-host counters: requests, retries, errors, avg/max latency (ms)"""
+        with self._lock:
+            return {
+                host: {
+                    'requests': s['requests'],
+                    'retries': s['retries'],
+                    'errors': s['errors'],
+                    'avg_latency_ms': round(1000 * s['total_latency'] / s['requests'], 1),
+                    'max_latency_ms': round(1000 * s['max_latency'], 1)
+                }
+                for host, s in self._stats.items()
+            }
+
+    def print_stats(self):
+        """Print the per-host counters"""
+        for host, s in self.stats().items():
+            print(f"🌐 {host}: {s['requests']} requests, {s['retries']} retries, "
+                  f"{s['errors']} errors, avg {s['avg_latency_ms']} ms, max {s['max_latency_ms']} ms")
+
+    def close(self):
+        """Close pooled connections"""
+        self.session.close()
+
+
+class RateLimiter:
+    """Thread-safe token bucket: `rate` calls per second, bursts of `burst`"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = float(rate)
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.waited = 0.0
+        self._lock = threading.Lock()
+
+    def wait(self, cost=1):
+        """Block until a call costing `cost` tokens is allowed (no-op when rate <= 0)"""
+        if self.rate <= 0:
+            return
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            delay = 0.0
+            if self.tokens < cost:
+                delay = (cost - self.tokens) / self.rate
+            self.tokens -= cost
+            self.waited += delay
+        if delay:
+            time.sleep(delay)
+
+
+_shared_session = None
+_shared_lock = threading.Lock()
+
+
+def get_session():
+    """Process-wide shared PooledSession"""
+    global _shared_session
+    with _shared_lock:
+        if _shared_session is None:
+            _shared_session = PooledSession()
+        return _shared_session
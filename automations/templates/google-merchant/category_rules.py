@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+Google product category classifier - table-driven
+
+A rule table maps keywords found in the item title, and in the Shopify
+product type, to Google taxonomy ids. Every keyword of every rule is
+compiled into one trie-shaped regex per field, scanned once per title, so
+the cost stays flat as the table grows to thousands of rules. The matching
+rule with the highest priority wins (ties: first in the table).
+
+Matching is case-insensitive substring matching ('coat' matches
+'Raincoat'), like the if/elif chain it replaces.
+
+Rules file (JSON, CATEGORY_RULES=path/to/rules.json):
+  {
+    "default": "166",
+    "rules": [
+      {"category": "5598", "priority": 40, "keywords": ["coat", "jacket"]},
+      {"category": "222", "priority": 20, "product_types": ["electronic"]}
+    ]
+  }
+
+Usage:
+    classifier = load_classifier(path)       # None: built-in DEFAULT_RULES
+    classifier.classify(title, product_type) # -> '5598'
+"""
+
+import re
+import json
+import hashlib
+from functools import lru_cache
+
+# ============================================================================
+# DEFAULT RULES
+# ============================================================================
+
+DEFAULT_CATEGORY = '166'  # Apparel & Accessories
+
+DEFAULT_RULES = [
+    {'category': '5598', 'priority': 40, 'keywords': ['coat', 'jacket'],
+     'label': 'Clothing > Outerwear > Coats & Jackets'},
+    {'category': '100', 'priority': 30, 'keywords': ['bag', 'backpack'],
+     'label': 'Luggage & Bags'},
+    {'category': '222', 'priority': 20, 'product_types': ['electronic'],
+     'label': 'Electronics'},
+    {'category': '491', 'priority': 10, 'keywords': ['medical', 'health'],
+     'label': 'Health & Beauty'},
+]
+
+# ============================================================================
+# MATCHER
+# ============================================================================
+
+
+def trie_pattern(words):
+    """Regex source matching the longest of words at a position, trie-shaped
+
+    Alternatives at each node start with distinct characters, so the regex
+    engine walks one path per position instead of trying every word.
+    """
+    trie = {}
+    for word in words:
+        node = trie
+        for char in word:
+            node = node.setdefault(char, {})
+        node[''] = True
+
+    def emit(node):
+        terminal = '' in node
+        branches = [re.escape(char) + emit(child) for char, child in sorted(node.items()) if char]
+        if not branches:
+            return ''
+        body = branches[0] if len(branches) == 1 else '(?:' + '|'.join(branches) + ')'
+        if terminal:
+            # Longest match wins; shorter keywords on the path are implied
+            return '(?:' + body + ')?'
+        return body
+
+    return emit(trie)
+
+
+class KeywordMatcher:
+    """All keywords occurring in a text, in one regex scan"""
+
+    def __init__(self, keywords):
+        keywords = sorted({k.lower() for k in keywords if k})
+        self.keywords = keywords
+        self.regex = re.compile('(?=(' + trie_pattern(keywords) + '))') if keywords else None
+        # A match of keyword K at a position also matches every keyword that is a prefix of K
+        keyword_set = set(keywords)
+        self.implied = {k: [k[:i] for i in range(1, len(k) + 1) if k[:i] in keyword_set] for k in keywords}
+
+    def find(self, text):
+        """Set of keywords occurring in text (case-insensitive)"""
+        if self.regex is None or not text:
+            return set()
+        found = set()
+        for match in self.regex.finditer(text.lower()):
+            longest = match.group(1)
+            if longest not in found:
+                found.update(self.implied[longest])
+        return found
+
+# ============================================================================
+# CLASSIFIER
+# ============================================================================
+
+
+class CategoryClassifier:
+    """Compiled rule table: classify(title, product_type) -> taxonomy id"""
+
+    def __init__(self, rules=None, default=DEFAULT_CATEGORY):
+        self.default = str(default)
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+
+        # keyword -> best (priority, -table order, category) per field
+        self.title_rules = {}
+        self.type_rules = {}
+        for order, rule in enumerate(self.rules):
+            rank = (rule.get('priority', 0), -order, str(rule['category']))
+            for field, index in (('keywords', self.title_rules), ('product_types', self.type_rules)):
+                for keyword in rule.get(field, []):
+                    keyword = keyword.lower()
+                    if keyword and (keyword not in index or rank > index[keyword]):
+                        index[keyword] = rank
+
+        self.title_matcher = KeywordMatcher(self.title_rules)
+        self.type_matcher = KeywordMatcher(self.type_rules)
+
+    def classify(self, title, product_type=''):
+        """Google taxonomy id of the highest-priority matching rule"""
+        best = None
+        for keyword in self.title_matcher.find(title):
+            rank = self.title_rules[keyword]
+            if best is None or rank > best:
+                best = rank
+        for keyword in self.type_matcher.find(product_type):
+            rank = self.type_rules[keyword]
+            if best is None or rank > best:
+                best = rank
+        return best[2] if best else self.default
+
+
+def rules_fingerprint(path=None):
+    """Short hash of a rules file (or the built-in table), for cache keys"""
+    if path:
+        with open(path, 'rb') as f:
+            data = f.read()
+    else:
+        data = json.dumps([DEFAULT_CATEGORY, DEFAULT_RULES], sort_keys=True).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()[:12]
+
+
+@lru_cache(maxsize=None)
+def load_classifier(path=None):
+    """Classifier for a rules file, compiled once per process (None: defaults)"""
+    if not path:
+        return CategoryClassifier()
+    with open(path, 'r', encoding='utf-8') as f:
+        table = json.load(f)
+    return CategoryClassifier(table.get('rules', []), table.get('default', DEFAULT_CATEGORY))
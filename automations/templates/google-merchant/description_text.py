@@ -0,0 +1,173 @@
+#!/usr/bin/env python3
+"""
+Product description cleaner: Shopify body_html -> Merchant Center text
+
+  - precompiled substitutions with constant replacements (no per-tag
+    Python callback): <script>/<style> blocks, comments and inline tags
+    dropped in one pass, then the remaining block-level tags turned into
+    a space so paragraphs and list items do not run together
+  - HTML entities decoded (&amp; &eacute; &#8217; ...)
+  - whitespace runs (incl. &nbsp;) collapsed to a single space
+  - truncated to the Merchant limit on a character boundary (never inside
+    a combining sequence), at the last word break when one is close
+
+Results are memoized by a hash of the body: in process (all variants and
+markets of a product share it) and, with open_memo(), across runs in a
+small SQLite file, so unchanged product pages are never re-parsed.
+
+Usage:
+    from description_text import clean_description
+    text = clean_description(product['body_html'], fallback=product['title'])
+"""
+
+import re
+import html
+import sqlite3
+import hashlib
+import threading
+import unicodedata
+from collections import OrderedDict
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Google max description length (characters)
+MAX_LENGTH = 5000
+
+# Bump when the cleaning output changes: invalidates persisted results
+CLEANER_VERSION = '1'
+
+# In-process memo size (distinct bodies)
+MEMO_SIZE = 4096
+
+# Look this far back from the limit for a word break
+WORD_BREAK_WINDOW = 100
+
+_BLOCK_TAGS = ('address|article|aside|blockquote|br|dd|div|dl|dt|figcaption|figure|footer|h[1-6]|'
+               'header|hr|li|main|nav|ol|p|pre|section|table|tbody|td|tfoot|th|thead|tr|ul')
+
+# Whole script/style blocks, comments, and every tag that is not block-level.
+# Case-insensitive only where it matters: a global IGNORECASE is ~4x slower.
+_DROP = re.compile(
+    r'<((?i:script|style))\b[^>]*>.*?</(?i:\1)\s*>'
+    r'|<!--.*?-->'
+    rf'|<(?!/?(?i:{_BLOCK_TAGS})\b)[^>]*>',
+    re.DOTALL
+)
+# What is left of the markup: block-level tags
+_BLOCK = re.compile(r'<[^>]*>')
+
+# ============================================================================
+# CLEANING
+# ============================================================================
+
+
+def truncate(text, limit=MAX_LENGTH):
+    """Cut text to at most limit characters without splitting a character sequence"""
+    if len(text) <= limit:
+        return text
+    end = limit
+    # Do not separate a base character from its combining marks
+    while end > 0 and unicodedata.combining(text[end]):
+        end -= 1
+    space = text.rfind(' ', max(0, end - WORD_BREAK_WINDOW), end + 1)
+    if space > 0:
+        end = space
+    return text[:end].rstrip()
+
+
+def html_to_text(body, limit=MAX_LENGTH):
+    """Plain text of an HTML fragment: tags stripped, entities decoded, whitespace collapsed"""
+    if not body:
+        return ''
+    text = _BLOCK.sub(' ', _DROP.sub('', body)) if '<' in body else body
+    if '&' in text:
+        text = html.unescape(text)
+    # str.split() collapses every Unicode whitespace run, &nbsp; included
+    return truncate(' '.join(text.split()), limit)
+
+# ============================================================================
+# MEMO
+# ============================================================================
+
+
+def body_hash(body, limit=MAX_LENGTH):
+    """Memo key of a body for the current cleaner version and limit"""
+    return hashlib.blake2b(f'{CLEANER_VERSION}:{limit}:{body}'.encode('utf-8'), digest_size=16).hexdigest()
+
+
+class DescriptionMemo:
+    """SQLite store of cleaned descriptions keyed by body hash"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.db = sqlite3.connect(self.path, check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.execute('CREATE TABLE IF NOT EXISTS descriptions (hash TEXT PRIMARY KEY, text TEXT NOT NULL)')
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        with self.lock:
+            row = self.db.execute('SELECT text FROM descriptions WHERE hash = ?', (key,)).fetchone()
+        if row:
+            self.hits += 1
+            return row[0]
+        self.misses += 1
+        return None
+
+    def put(self, key, text):
+        with self.lock:
+            self.db.execute('INSERT OR REPLACE INTO descriptions VALUES (?, ?)', (key, text))
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+_persistent = None
+
+
+def open_memo(path):
+    """Persist cleaned descriptions across runs in path (SQLite)"""
+    global _persistent
+    _persistent = DescriptionMemo(path)
+    return _persistent
+
+
+def close_memo():
+    """Commit and close the persistent memo, if any"""
+    global _persistent
+    if _persistent is not None:
+        _persistent.close()
+        _persistent = None
+
+
+def clean_description(body, fallback='', limit=MAX_LENGTH):
+    """Memoized html_to_text() of a product body (fallback when it has no text)"""
+    if not body:
+        return truncate(fallback, limit)
+
+    key = body_hash(body, limit)
+    with _memo_lock:
+        text = _memo.get(key)
+        if text is not None:
+            _memo.move_to_end(key)
+    if text is None:
+        text = _persistent.get(key) if _persistent is not None else None
+        if text is None:
+            text = html_to_text(body, limit)
+            if _persistent is not None:
+                _persistent.put(key, text)
+        with _memo_lock:
+            _memo[key] = text
+            if len(_memo) > MEMO_SIZE:
+                _memo.popitem(last=False)
+
+    return text or truncate(fallback, limit)
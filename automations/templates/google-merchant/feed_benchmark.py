@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Merchant feed benchmarks
+
+Synthetic catalogs (see shopify_standin.py), no Shopify store needed.
+
+Usage:
+  # Render scaling: 1 worker vs a process pool on a 500k-variant catalog
+  python feed_benchmark.py workers --products 100000 --variants 5 --workers 1 2 4 8
+
+  # Category classifier: 10k keyword rules x 100k titles vs a linear scan
+  python feed_benchmark.py categories --rules 10000 --titles 100000
+
+  # Description cleaning on long rich-text product pages
+  python feed_benchmark.py descriptions --products 2000
+
+  # Whole pipeline against the local REST stand-in: fetch / render / write
+  # throughput, saved as JSON and compared to a previous release
+  python feed_benchmark.py pipeline --products 20000 --variants 1 8 --json bench.json
+  python feed_benchmark.py pipeline --baseline bench.json --tolerance 0.15
+  python feed_benchmark.py pipeline --profile pipeline.prof --tracemalloc
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import pstats
+import random
+import cProfile
+import argparse
+import platform
+import tempfile
+import subprocess
+import tracemalloc
+from datetime import datetime, timezone
+
+from feed_writer import FeedWriter
+from feed_render import render_products, render_parallel, iter_chunks
+from shopify_standin import make_catalog, ShopifyStandIn, WORDS
+from category_rules import CategoryClassifier
+import description_text
+
+STORE = {'url': 'https://bench.example.com', 'name': 'Bench Store', 'currency': 'USD'}
+
+# ============================================================================
+# WORKERS SCALING
+# ============================================================================
+
+
+def render_feed(catalog, path, workers):
+    """Render a catalog to path with N workers; return (seconds, items)"""
+    start = time.perf_counter()
+    with FeedWriter(path, STORE['name'], STORE['url'], 'Benchmark') as writer:
+        if workers > 1:
+            results = (markets[0] for markets in render_parallel(catalog, [STORE], workers))
+        else:
+            results = (render_products(chunk, STORE) for chunk in iter_chunks(catalog))
+        for fragments, item_count, _ in results:
+            if item_count:
+                writer.write_fragments(fragments, item_count)
+    return time.perf_counter() - start, writer.items
+
+
+def bench_workers(products, variants, worker_counts):
+    """Print render throughput and speedup for each worker count"""
+    print(f"🧪 Building synthetic catalog: {products} products x {variants} variants...")
+    catalog = make_catalog(products, variants)
+    print(f"   CPUs available: {os.cpu_count()}")
+    print()
+    print(f"{'Workers':>7} {'Items':>9} {'Seconds':>9} {'Items/s':>10} {'Speedup':>8}")
+
+    results = {}
+    baseline = None
+    with tempfile.TemporaryDirectory() as tmp:
+        for workers in worker_counts:
+            seconds, items = render_feed(catalog, os.path.join(tmp, f'feed-{workers}.xml'), workers)
+            baseline = baseline or seconds
+            results[workers] = {'seconds': seconds, 'items': items}
+            print(f"{workers:>7} {items:>9} {seconds:>9.2f} {items / seconds:>10.0f} {baseline / seconds:>7.2f}x")
+
+        # Ordered merge: every worker count must produce the same file
+        outputs = {open(os.path.join(tmp, f'feed-{w}.xml'), 'rb').read() for w in worker_counts}
+        print(f"\n{'✅' if len(outputs) == 1 else '❌'} Outputs identical across worker counts")
+    return results
+
+# ============================================================================
+# CATEGORY CLASSIFIER
+# ============================================================================
+
+
+def synthetic_rules(count, seed=7):
+    """count rules of 1-3 random pseudo-word keywords each"""
+    rng = random.Random(seed)
+    letters = 'abcdefghijklmnopqrstuvwxyz'
+    rules = []
+    for i in range(count):
+        keywords = [''.join(rng.choice(letters) for _ in range(rng.randint(4, 9)))
+                    for _ in range(rng.randint(1, 3))]
+        rules.append({'category': str(1000 + i), 'priority': rng.randint(0, 100), 'keywords': keywords})
+    return rules
+
+
+def synthetic_titles(count, rules, seed=11):
+    """Product-like titles; about a third contain a rule keyword"""
+    rng = random.Random(seed)
+    titles = []
+    for i in range(count):
+        words = [rng.choice(WORDS).title() for _ in range(rng.randint(3, 6))]
+        if i % 3 == 0:
+            words.insert(rng.randrange(len(words)), rng.choice(rng.choice(rules)['keywords']).title())
+        titles.append(' '.join(words) + f' {i}')
+    return titles
+
+
+def classify_linear(rules, title):
+    """Reference: one substring test per keyword (the old if/elif approach)"""
+    title = title.lower()
+    best = None
+    for order, rule in enumerate(rules):
+        if any(k in title for k in rule['keywords']):
+            rank = (rule['priority'], -order)
+            if best is None or rank > best[0]:
+                best = (rank, rule['category'])
+    return best[1] if best else '166'
+
+
+def bench_categories(rule_count, title_count, linear_sample=1000):
+    """Time compiling and running the classifier; compare to a linear scan"""
+    rules = synthetic_rules(rule_count)
+    titles = synthetic_titles(title_count, rules)
+
+    start = time.perf_counter()
+    classifier = CategoryClassifier(rules)
+    compile_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    results = [classifier.classify(title) for title in titles]
+    classify_seconds = time.perf_counter() - start
+
+    sample = titles[:linear_sample]
+    start = time.perf_counter()
+    expected = [classify_linear(rules, title) for title in sample]
+    linear_seconds = (time.perf_counter() - start) * len(titles) / len(sample)
+
+    matched = sum(1 for r in results if r != classifier.default)
+    print(f"🧪 {rule_count} rules x {title_count} titles ({matched} matched a rule)")
+    print(f"   Compile:    {compile_seconds:.2f}s")
+    print(f"   Classifier: {classify_seconds:.2f}s ({title_count / classify_seconds:,.0f} titles/s)")
+    print(f"   Linear:     {linear_seconds:.2f}s (extrapolated from {len(sample)} titles)")
+    print(f"   Speedup:    {linear_seconds / classify_seconds:.0f}x")
+    print(f"\n{'✅' if results[:len(sample)] == expected else '❌'} Classifier agrees with the linear scan")
+    return {'compile': compile_seconds, 'classify': classify_seconds, 'linear': linear_seconds}
+
+# ============================================================================
+# DESCRIPTIONS
+# ============================================================================
+
+
+def rich_text_page(rng, paragraphs):
+    """A long Shopify-style product page: headings, lists, tables, entities, inline styles"""
+    def sentence():
+        return ' '.join(rng.choice(WORDS) for _ in range(rng.randint(8, 20)))
+    parts = ['<div class="product-description" style="font-family: Arial;">']
+    for i in range(paragraphs):
+        kind = i % 5
+        if kind == 0:
+            parts.append(f'<h2 data-mce-style="color: #333;">{sentence().title()} &ndash; {i}</h2>')
+        elif kind == 1:
+            parts.append('<ul>' + ''.join(f'<li><strong>{rng.choice(WORDS)}</strong>&nbsp;: {sentence()}</li>'
+                                          for _ in range(4)) + '</ul>')
+        elif kind == 2:
+            parts.append('<table><tbody>' + ''.join(
+                f'<tr><td>{rng.choice(WORDS)}</td><td>{rng.randint(1, 99)}&nbsp;cm</td></tr>'
+                for _ in range(3)) + '</tbody></table>')
+        elif kind == 3:
+            parts.append(f'<p><span style="font-weight: 400;">{sentence()} caf&eacute; &amp; '
+                         f'cr&egrave;me&#8230;</span><br>\n  {sentence()}</p>')
+        else:
+            parts.append(f'<!-- section {i} --><p>{sentence()} <a href="/collections/{i}">{sentence()}</a></p>')
+    parts.append('<script type="application/ld+json">{"@type": "Product"}</script></div>')
+    return '\n'.join(parts)
+
+
+def legacy_description(body, title):
+    """The previous cleaning: tags stripped, entities and whitespace left as is"""
+    description = body or title
+    description = re.sub(r'<[^>]+>', '', description)
+    return description[:5000]
+
+
+def bench_descriptions(products, paragraphs=120):
+    """Time description cleaning: legacy regex, new cleaner, memoized across runs"""
+    rng = random.Random(3)
+    bodies = [rich_text_page(rng, paragraphs) for _ in range(products)]
+    average_kb = sum(len(b) for b in bodies) / len(bodies) / 1024
+    print(f"🧪 {products} rich-text product pages, {average_kb:.0f} KB on average")
+
+    results = {}
+    for label, clean in (('legacy', lambda body: legacy_description(body, 'Title')),
+                         ('cleaner', description_text.html_to_text)):
+        start = time.perf_counter()
+        for body in bodies:
+            clean(body)
+        results[label] = time.perf_counter() - start
+
+    with tempfile.TemporaryDirectory() as tmp:
+        memo_path = os.path.join(tmp, 'descriptions.sqlite')
+        for label in ('first_run', 'next_run'):
+            # A new run starts with an empty in-process memo
+            description_text._memo.clear()
+            description_text.open_memo(memo_path)
+            start = time.perf_counter()
+            for body in bodies:
+                description_text.clean_description(body, 'Title')
+            results[label] = time.perf_counter() - start
+            description_text.close_memo()
+
+    for label, title in (('legacy', 'Legacy regex (tags only)'), ('cleaner', 'Cleaner, no memo'),
+                         ('first_run', 'Memoized, first run'), ('next_run', 'Memoized, next run (SQLite)')):
+        print(f"   {title:<30} {results[label]:7.2f}s  {products / results[label]:>9,.0f} pages/s")
+    print(f"\n🚀 Unchanged pages on the next run: {results['cleaner'] / results['next_run']:.0f}x faster "
+          f"than cleaning, {results['legacy'] / results['next_run']:.1f}x vs the legacy regex")
+    return results
+
+# ============================================================================
+# PIPELINE (FETCH / RENDER / WRITE)
+# ============================================================================
+
+# Throughput metrics compared against a baseline (higher is better)
+PIPELINE_METRICS = ('items_per_s', 'mb_per_s')
+
+
+class Stage:
+    """Time one pipeline stage; optionally profile it and trace its peak memory"""
+
+    def __init__(self, name, profiler=None, trace=False):
+        self.name = name
+        self.profiler = profiler
+        self.trace = trace
+        self.result = {}
+
+    def __enter__(self):
+        if self.trace:
+            tracemalloc.start()
+        if self.profiler:
+            self.profiler.enable()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.result['seconds'] = time.perf_counter() - self.start
+        if self.profiler:
+            self.profiler.disable()
+        if self.trace:
+            self.result['peak_mb'] = tracemalloc.get_traced_memory()[1] / 1e6
+            tracemalloc.stop()
+
+    def record(self, items, size):
+        """Store items and bytes processed; derive the rates"""
+        seconds = self.result['seconds']
+        self.result.update({
+            'items': items,
+            'mb': size / 1e6,
+            'items_per_s': items / seconds if seconds else 0.0,
+            'mb_per_s': size / 1e6 / seconds if seconds else 0.0
+        })
+        return self.result
+
+
+def git_revision():
+    """Short commit of the working tree, if any"""
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__)), timeout=10).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        return None
+
+
+def bench_pipeline(products, variants, paragraphs, missing_images, page_latency, profile_path=None, trace=False):
+    """Fetch (REST stand-in), render and write a synthetic catalog, stage by stage
+
+    fetch:      fetch_products() paging through the stand-in (MB = JSON received)
+    render:     item fragments from the fetched products (MB = XML rendered)
+    write:      the rendered fragments streamed through FeedWriter (MB = file size)
+    end_to_end: generate_merchant_center_feed() on a fresh fetch, as in production
+    """
+    import generate_merchant_center_feed as feed
+
+    variant_range = tuple(variants) if len(variants) == 2 else variants[0]
+    body = (lambda rng: rich_text_page(rng, paragraphs)) if paragraphs else None
+    print(f"🧪 Building synthetic catalog: {products} products, {'-'.join(map(str, variants))} variants, "
+          f"{paragraphs or 'short'} paragraphs, {missing_images:.0%} without image...")
+    catalog = make_catalog(products, variant_range, body=body, missing_images=missing_images)
+    variant_count = sum(len(p['variants']) for p in catalog)
+
+    standin = ShopifyStandIn(catalog, page_latency=page_latency).start()
+    store, errors = feed.normalize_store({'domain': 'bench.myshopify.com', 'token': 'bench-token',
+                                          'url': STORE['url'], 'name': STORE['name'], 'admin_url': standin.url})
+    store['limiter'].rate = 0  # measure our code, not the Shopify rate limit
+    market = store['markets'][0]
+    profiler = cProfile.Profile() if profile_path else None
+    stages = {}
+
+    # Each stage starts with an empty description memo, like a new run
+    description_text._memo.clear()
+    with Stage('fetch', profiler, trace) as stage:
+        fetched = list(feed.fetch_products(store))
+    stages['fetch'] = stage.record(sum(len(p['variants']) for p in fetched), standin.bytes_sent)
+    stages['fetch']['pages'] = standin.requests['rest']
+
+    description_text._memo.clear()
+    with Stage('render', profiler, trace) as stage:
+        rendered = [render_products(chunk, market) for chunk in iter_chunks(fetched)]
+    stages['render'] = stage.record(sum(count for _, count, _ in rendered),
+                                    sum(len(fragments.encode('utf-8')) for fragments, _, _ in rendered))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        with Stage('write', profiler, trace) as stage:
+            with FeedWriter(os.path.join(tmp, 'write.xml'), STORE['name'], STORE['url'], 'Benchmark') as writer:
+                for fragments, count, _ in rendered:
+                    if count:
+                        writer.write_fragments(fragments, count)
+        stages['write'] = stage.record(writer.items, writer.bytes)
+        del rendered, fetched
+
+        description_text._memo.clear()
+        with Stage('end_to_end', profiler, trace) as stage:
+            with FeedWriter(os.path.join(tmp, 'feed.xml'), STORE['name'], STORE['url'], 'Benchmark') as writer:
+                feed.generate_merchant_center_feed(feed.fetch_products(store), writer, market)
+        stages['end_to_end'] = stage.record(writer.items, writer.bytes)
+    standin.stop()
+
+    print(f"   {len(catalog)} products, {variant_count} variants, "
+          f"{sum(1 for p in catalog if not p.get('image'))} without image, {stages['fetch']['pages']} REST pages")
+    print()
+    print(f"{'Stage':<11} {'Items':>9} {'Seconds':>9} {'Items/s':>10} {'MB':>9} {'MB/s':>8}"
+          f"{' Peak MB':>9}" * trace)
+    for name, r in stages.items():
+        print(f"{name:<11} {r['items']:>9} {r['seconds']:>9.2f} {r['items_per_s']:>10.0f} {r['mb']:>9.1f} "
+              f"{r['mb_per_s']:>8.1f}" + (f"{r['peak_mb']:>9.1f}" if trace else ''))
+
+    if profiler:
+        profiler.dump_stats(profile_path)
+        print(f"\n📈 Profile saved: {profile_path} (top functions by cumulative time)")
+        pstats.Stats(profiler).sort_stats('cumulative').print_stats(15)
+
+    return {
+        'benchmark': 'pipeline',
+        'created_at': datetime.now(timezone.utc).isoformat(timespec='seconds'),
+        'revision': git_revision(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count(),
+        'params': {'products': products, 'variants': variants, 'paragraphs': paragraphs,
+                   'missing_images': missing_images, 'page_latency': page_latency,
+                   'profiled': bool(profiler), 'tracemalloc': trace},
+        'stages': stages
+    }
+
+
+def compare_pipeline(results, baseline, tolerance):
+    """Print stage throughput vs a baseline run; return the regressions beyond tolerance"""
+    if baseline['params'] != results['params']:
+        print("⚠️  Baseline was run with other parameters: "
+              f"{json.dumps(baseline['params'], sort_keys=True)}")
+    print(f"\n📊 vs baseline {baseline.get('revision') or '?'} ({baseline.get('created_at')}), "
+          f"tolerance {tolerance:.0%}")
+    regressions = []
+    for name, stage in results['stages'].items():
+        before = baseline['stages'].get(name)
+        if not before:
+            continue
+        for metric in PIPELINE_METRICS:
+            if not before.get(metric):
+                continue
+            change = stage[metric] / before[metric] - 1
+            regressed = change < -tolerance
+            if regressed:
+                regressions.append(f"{name}.{metric}")
+            print(f"   {'❌' if regressed else '✅'} {name:<11} {metric:<12} "
+                  f"{before[metric]:>10.1f} -> {stage[metric]:>10.1f} ({change:+.1%})")
+    return regressions
+
+
+def save_json(data, path):
+    """Write JSON atomically"""
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(data, f, indent=2)
+    os.replace(tmp_path, path)
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merchant feed benchmarks')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    workers = sub.add_parser('workers', help='Process-pool render scaling')
+    workers.add_argument('--products', type=int, default=100000)
+    workers.add_argument('--variants', type=int, default=5)
+    workers.add_argument('--workers', type=int, nargs='+', default=[1, 2, 4, 8])
+
+    categories = sub.add_parser('categories', help='Category classifier vs linear keyword scan')
+    categories.add_argument('--rules', type=int, default=10000)
+    categories.add_argument('--titles', type=int, default=100000)
+
+    descriptions = sub.add_parser('descriptions', help='Description cleaning on long rich-text pages')
+    descriptions.add_argument('--products', type=int, default=2000)
+
+    pipeline = sub.add_parser('pipeline', help='Fetch / render / write throughput against the REST stand-in')
+    pipeline.add_argument('--products', type=int, default=20000)
+    pipeline.add_argument('--variants', type=int, nargs='+', default=[1, 8], metavar='N',
+                          help='Variants per product, or a MIN MAX range (default: 1 8)')
+    pipeline.add_argument('--paragraphs', type=int, default=40,
+                          help='Rich-text paragraphs per body_html, 0 for short bodies (default: 40)')
+    pipeline.add_argument('--missing-images', type=float, default=0.1,
+                          help='Share of products without an image (default: 0.1)')
+    pipeline.add_argument('--page-latency', type=float, default=0.0, help='Simulated latency per REST page')
+    pipeline.add_argument('--profile', metavar='FILE', help='Profile the stages with cProfile, stats to FILE')
+    pipeline.add_argument('--tracemalloc', action='store_true', help='Report the peak traced memory per stage')
+    pipeline.add_argument('--json', metavar='FILE', help='Save the results as JSON')
+    pipeline.add_argument('--baseline', metavar='FILE', help='Compare to a previous --json result')
+    pipeline.add_argument('--tolerance', type=float, default=0.15,
+                          help='Allowed throughput drop vs the baseline (default: 0.15)')
+
+    args = parser.parse_args()
+    if args.command == 'workers':
+        bench_workers(args.products, args.variants, args.workers)
+    elif args.command == 'categories':
+        bench_categories(args.rules, args.titles)
+    elif args.command == 'descriptions':
+        bench_descriptions(args.products)
+    elif args.command == 'pipeline':
+        if len(args.variants) not in (1, 2):
+            parser.error('--variants takes a count or a MIN MAX range')
+        baseline = None
+        if args.baseline:
+            try:
+                with open(args.baseline) as f:
+                    baseline = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"❌ Cannot read baseline {args.baseline}: {e}")
+                sys.exit(1)
+        results = bench_pipeline(args.products, args.variants, args.paragraphs, args.missing_images,
+                                 args.page_latency, args.profile, args.tracemalloc)
+        if args.json:
+            save_json(results, args.json)
+            print(f"\n💾 Results saved: {args.json}")
+        if baseline:
+            regressions = compare_pipeline(results, baseline, args.tolerance)
+            if regressions:
+                print(f"\n❌ Throughput regression: {', '.join(regressions)}")
+                sys.exit(1)
+            print("\n✅ No regression beyond tolerance")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,218 @@
+#!/usr/bin/env python3
+"""
+Change-detecting Merchant feed publishing
+
+The feed is rendered to a temp file next to its final path, then published
+only if its content changed since the last run:
+
+  - content hash: SHA-256 of the uncompressed XML (FeedWriter.hexdigest())
+  - unchanged feed: temp file dropped, published file and its mtime left
+    alone, no upload hook, so Google's scheduled fetch sees nothing new
+  - changed feed: atomic rename over the published file, optional .gz copy
+    (reproducible bytes: no name/mtime in the gzip header), then hook
+  - <feed>.hook-pending marks a changed feed whose upload hook has not
+    succeeded yet: the hook runs again on the next run, even if the feed
+    is unchanged by then
+  - <feed>.manifest.json records sha256, bytes, items, generated_at
+  - sharded feeds: each <feed stem>-partNNN.xml is published the same way
+    and <feed stem>.index.json lists the parts; parts left over from a
+    larger previous run are removed
+
+Usage:
+    tmp_path = publish_tmp_path(output_file)
+    with FeedWriter(tmp_path, ...) as writer:
+        ...
+    changed = publish_feed(writer, tmp_path, output_file, gzip_copy=True)
+"""
+
+import os
+import re
+import gzip
+import json
+import shutil
+from datetime import datetime, timezone
+
+# ============================================================================
+# MANIFEST
+# ============================================================================
+
+
+def manifest_path(output_file):
+    """<feed>.manifest.json next to the published feed"""
+    return f"{output_file}.manifest.json"
+
+
+def load_manifest(output_file):
+    """Manifest of the last published feed ({} when none)"""
+    path = manifest_path(output_file)
+    if not os.path.exists(path):
+        return {}
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(manifest, output_file):
+    """Atomically write the feed manifest"""
+    path = manifest_path(output_file)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+# ============================================================================
+# PUBLISH
+# ============================================================================
+
+
+def pending_hook_path(path):
+    """Marker of a published feed (or index) whose upload hook has not succeeded yet"""
+    return f"{path}.hook-pending"
+
+
+def publish_tmp_path(output_file):
+    """Temp path in the same directory, so the final rename is atomic"""
+    return f"{output_file}.tmp"
+
+
+def write_gzip_copy(path, gz_path):
+    """Atomically write a reproducible gzip copy of path; return its size"""
+    tmp_path = f"{gz_path}.tmp"
+    with open(path, 'rb') as src, open(tmp_path, 'wb') as raw:
+        with gzip.GzipFile(filename='', mode='wb', fileobj=raw, compresslevel=6, mtime=0) as dst:
+            shutil.copyfileobj(src, dst, 1 << 20)
+    os.replace(tmp_path, gz_path)
+    return os.path.getsize(gz_path)
+
+
+def publish_feed(writer, tmp_path, output_file, gzip_copy=False, products=None):
+    """Publish a rendered feed if its content changed
+
+    writer: the closed FeedWriter that wrote tmp_path (hash, bytes, items).
+    Returns True if the feed was (re)published, False if unchanged.
+    """
+    output_file = str(output_file)
+    gz_path = f"{output_file}.gz"
+    manifest = load_manifest(output_file)
+    sha256 = writer.hexdigest()
+    now = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+
+    unchanged = manifest.get('sha256') == sha256 and os.path.exists(output_file)
+    if unchanged:
+        os.remove(tmp_path)
+        # First --gzip run on an unchanged feed: the copy is still missing
+        if gzip_copy and not os.path.exists(gz_path):
+            manifest['gzip'] = {'path': os.path.basename(gz_path),
+                                'bytes': write_gzip_copy(output_file, gz_path)}
+        manifest['checked_at'] = now
+        save_manifest(manifest, output_file)
+        return False
+
+    os.replace(tmp_path, output_file)
+    manifest = {
+        'path': os.path.basename(output_file),
+        'sha256': sha256,
+        'bytes': writer.bytes,
+        'items': writer.items,
+        'products': products,
+        'generated_at': now,
+        'checked_at': now
+    }
+    if gzip_copy:
+        manifest['gzip'] = {'path': os.path.basename(gz_path),
+                            'bytes': write_gzip_copy(output_file, gz_path)}
+    elif os.path.exists(gz_path):
+        # A stale copy would be served with the old content
+        os.remove(gz_path)
+    save_manifest(manifest, output_file)
+    return True
+
+# ============================================================================
+# SHARDS
+# ============================================================================
+
+
+def shard_path(output_file, number):
+    """Part file of a sharded feed: <stem>-part001.xml"""
+    output_file = str(output_file)
+    stem = output_file[:-len('.xml')] if output_file.endswith('.xml') else output_file
+    return f"{stem}-part{number:03d}.xml"
+
+
+def index_path(output_file):
+    """<stem>.index.json listing the parts of a sharded feed"""
+    return re.sub(r'\.xml$', '', str(output_file)) + '.index.json'
+
+
+def remove_feed(path):
+    """Delete a published feed file with its gzip copy and manifest"""
+    for stale in (path, f"{path}.gz", manifest_path(path), pending_hook_path(path)):
+        if os.path.exists(stale):
+            os.remove(stale)
+
+
+def remove_shards(output_file):
+    """Delete the parts and index of a previously sharded feed, if any"""
+    index_file = index_path(output_file)
+    if not os.path.exists(index_file):
+        return
+    with open(index_file, 'r') as f:
+        index = json.load(f)
+    directory = os.path.dirname(str(output_file))
+    for part in index.get('parts', []):
+        remove_feed(os.path.join(directory, part['path']))
+    os.remove(index_file)
+    if os.path.exists(pending_hook_path(index_file)):
+        os.remove(pending_hook_path(index_file))
+
+
+def publish_shards(writer, output_file, gzip_copy=False, products=None):
+    """Publish every part of a closed ShardedFeedWriter and write the index
+
+    Parts are written to publish_tmp_path(shard_path(output_file, n)).
+    Returns (True if any part or the part list changed, index dict).
+    """
+    index_file = index_path(output_file)
+    previous = {}
+    if os.path.exists(index_file):
+        with open(index_file, 'r') as f:
+            previous = json.load(f)
+
+    changed = []
+    parts = []
+    for number, part in enumerate(writer.parts, 1):
+        path = shard_path(output_file, number)
+        if publish_feed(part, part.output, path, gzip_copy=gzip_copy):
+            changed.append(path)
+        parts.append({'path': os.path.basename(path), 'items': part.items,
+                      'bytes': part.bytes, 'sha256': part.hexdigest()})
+
+    # A catalog that shrank leaves parts behind, and an unsharded feed from
+    # earlier runs: either would duplicate items
+    current = {part['path'] for part in parts}
+    directory = os.path.dirname(str(output_file))
+    for part in previous.get('parts', []):
+        if part['path'] not in current:
+            remove_feed(os.path.join(directory, part['path']))
+    remove_feed(str(output_file))
+
+    index = {
+        'parts': parts,
+        'items': writer.items,
+        'bytes': writer.bytes,
+        'products': products,
+        'max_items': writer.max_items,
+        'max_bytes': writer.max_bytes,
+        'generated_at': previous.get('generated_at'),
+        'checked_at': datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+    }
+    changed = bool(changed) or previous.get('parts') != parts
+    if changed:
+        index['generated_at'] = index['checked_at']
+    tmp_path = f"{index_file}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, index_file)
+    return changed, index
@@ -0,0 +1,169 @@
+#!/usr/bin/env python3
+"""
+Merchant Center item rendering - per product/variant
+
+Pure functions (no environment or network access at import), so they can
+run in worker processes: generate_merchant_center_feed.py --workers N
+renders chunks of products in a process pool and merges the fragments
+back in catalog order.
+"""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from feed_writer import render_item
+from category_rules import load_classifier
+from description_text import clean_description
+
+# Products per chunk sent to a worker process
+CHUNK_SIZE = 200
+
+
+def build_variant_items(product, store):
+    """Yield the Merchant Center item dict of each variant of a product
+
+    store: {'url', 'name', 'currency', 'shop_currency', 'country',
+    'category_rules'} of the feed (one store market) being generated;
+    category_rules is a rules file path (None: built-in table). Variants
+    without a price in the market currency are left out.
+    """
+    classifier = load_classifier(store.get('category_rules'))
+    # Plain text, entities decoded, max 5000 chars; memoized by body hash
+    description = clean_description(product['body_html'], fallback=product['title'])
+
+    image_link = product['image']['src'] if product.get('image') else ''
+
+    # Product type and brand
+    product_type = product.get('product_type') or 'General'
+    brand = product.get('vendor') or store['name']
+
+    for variant in product['variants']:
+        # Required fields
+        product_id = item_id(product, variant, store)
+        title = product['title']
+        if len(product['variants']) > 1 and variant['title'] != 'Default Title':
+            title = f"{product['title']} - {variant['title']}"
+
+        link = f"{store['url']}/products/{product['handle']}"
+        if len(product['variants']) > 1:
+            link += f"?variant={variant['id']}"
+
+        # Price
+        amount = variant_price(variant, store['currency'], store.get('shop_currency'))
+        if amount is None:
+            continue
+        price = f"{amount} {store['currency']}"
+        availability = variant_availability(variant)
+
+        # Google product category (rule table, see category_rules.py)
+        google_category = classifier.classify(title, product_type)
+
+        yield {
+            'id': product_id,
+            'title': title[:150],
+            'description': description,
+            'link': link,
+            'image_link': image_link,
+            'availability': availability,
+            'price': price,
+            'condition': 'new',  # all products new
+            'google_product_category': google_category,
+            'product_type': product_type,
+            'brand': brand,
+            'age_group': 'adult',
+            'gender': 'unisex',
+            # GTIN optional but recommended
+            'gtin': variant.get('barcode') or '',
+        }
+
+
+def build_supplemental_items(product, store):
+    """Yield the supplemental (id, price, availability) item of each variant
+
+    Only needs product id and variants, e.g. from a fields=id,variants fetch.
+    """
+    for variant in product['variants']:
+        amount = variant_price(variant, store['currency'], store.get('shop_currency'))
+        if amount is None:
+            continue
+        yield {
+            'id': item_id(product, variant, store),
+            'price': f"{amount} {store['currency']}",
+            'availability': variant_availability(variant)
+        }
+
+
+def variant_availability(variant):
+    """Merchant availability from the variant inventory"""
+    return "in stock" if (variant.get('inventory_quantity') or 0) > 0 else "out of stock"
+
+
+def item_id(product, variant, store):
+    """Merchant item id: shopify_<country>_<product id>_<variant id>"""
+    return f"shopify_{store.get('country', 'US')}_{product['id']}_{variant['id']}"
+
+
+def variant_price(variant, currency, shop_currency=None):
+    """Variant price in currency: the shop price, or its presentment price
+
+    Presentment prices come with the X-Shopify-Api-Features:
+    include-presentment-prices header. None when the market has no price.
+    """
+    if shop_currency is None or currency == shop_currency:
+        return variant['price']
+    for presentment in variant.get('presentment_prices') or []:
+        price = presentment.get('price') or {}
+        if price.get('currency_code') == currency:
+            return price.get('amount')
+    return None
+
+
+def render_markets(products, stores):
+    """render_products() of the same products for each store market"""
+    return [render_products(products, store) for store in stores]
+
+
+def render_products(products, store):
+    """Render the <item> fragments of active products, in order
+
+    Returns (fragments joined by newlines, item count, active product count).
+    """
+    fragments = []
+    product_count = 0
+    for product in products:
+        if product['status'] != 'active':
+            continue
+        product_count += 1
+        for item in build_variant_items(product, store):
+            fragments.append(render_item(item))
+    return '\n'.join(fragments), len(fragments), product_count
+
+
+def iter_chunks(products, size=CHUNK_SIZE):
+    """Group an iterable of products into lists of `size`"""
+    chunk = []
+    for product in products:
+        chunk.append(product)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def render_parallel(products, stores, workers, chunk_size=CHUNK_SIZE):
+    """Render products in a process pool, yielding render_markets() results in catalog order
+
+    stores: the store markets to render each chunk for (one fetch, many feeds).
+
+    At most 2 x workers chunks are in flight, so memory stays bounded even
+    when products arrive faster than they are rendered.
+    """
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for chunk in iter_chunks(products, chunk_size):
+            pending.append(pool.submit(render_markets, chunk, stores))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
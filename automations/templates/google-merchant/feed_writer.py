@@ -0,0 +1,491 @@
+#!/usr/bin/env python3
+"""
+Streaming Google Merchant Center RSS 2.0 feed writer
+
+Items are escaped and written to the output (plain or gzip) as soon as
+they are rendered, so memory stays constant whatever the catalog size.
+
+  - precompiled escaping fast path: clean strings are written untouched,
+    '&', '<', '>', '"' are escaped, XML-illegal control chars dropped
+  - no CDATA sections: a ']]>' in a description cannot break the document
+  - validate_feed() re-reads a feed and checks it against the RSS 2.0 /
+    g: (http://base.google.com/ns/1.0) structure Merchant Center expects
+  - ShardedFeedWriter rolls over to a new part file past an item count or
+    byte size, for catalogs above Merchant Center file limits
+
+Usage:
+    with FeedWriter(path, title, link, description) as writer:
+        for item in items:
+            writer.write_item(item)   # dict of g: field -> value
+
+    python feed_writer.py --validate outputs/google-merchant-feed-mystore.xml
+    python feed_writer.py --self-check   # '&', '<', ']]>' ... round-trip
+"""
+
+import os
+import re
+import sys
+import gzip
+import hashlib
+import argparse
+import tempfile
+import xml.etree.ElementTree as ET
+from xml.sax.saxutils import unescape
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+G_NAMESPACE = 'http://base.google.com/ns/1.0'
+
+# Fields every item must carry. g:image_link is not required (products
+# without an image are still listed, Merchant Center reports them); when
+# present, validate_feed() checks it is an absolute http(s) URL like g:link
+REQUIRED_FIELDS = ('id', 'title', 'description', 'link', 'availability', 'price', 'condition')
+
+# Supplemental (price/stock) feeds only carry these
+SUPPLEMENTAL_FIELDS = ('id', 'price', 'availability')
+
+CLOSING = '\n</channel>\n</rss>\n'
+
+AVAILABILITY_VALUES = {'in stock', 'out of stock', 'preorder', 'backorder'}
+CONDITION_VALUES = {'new', 'refurbished', 'used'}
+
+PRICE_PATTERN = re.compile(r'^\d+(\.\d+)? [A-Z]{3}$')
+URL_PATTERN = re.compile(r'^https?://[^\s/]+\S*$')
+URL_FIELDS = ('link', 'image_link')
+
+# Values that break naive XML writing, for --self-check
+HOSTILE_VALUES = [
+    'Tom & Jerry <Limited> "Edition"',
+    'Ends with ]]> inside <![CDATA[ ]]> and ]]',
+    'a < b && c > d',
+    'Bell \x07 and form feed \x0c dropped',
+    '&amp; already escaped &lt;b&gt;',
+]
+
+# ============================================================================
+# ESCAPING
+# ============================================================================
+
+# Anything that needs work: markup chars or XML 1.0 illegal control chars
+_NEEDS_ESCAPE = re.compile(r'[&<>"\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+_ILLEGAL_CHARS = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+
+
+def escape_xml(value):
+    """Escape a value for XML text content (fast path for clean strings)"""
+    text = value if isinstance(value, str) else str(value)
+    if not _NEEDS_ESCAPE.search(text):
+        return text
+    text = _ILLEGAL_CHARS.sub('', text)
+    return (text.replace('&', '&amp;')
+                .replace('<', '&lt;')
+                .replace('>', '&gt;')
+                .replace('"', '&quot;'))
+
+
+def render_item(item):
+    """Render an item dict (g: field -> value) as an <item> XML fragment
+
+    Empty values are omitted; list values repeat the field
+    (e.g. additional_image_link).
+    """
+    parts = ['<item>']
+    for field, value in item.items():
+        if value is None or value == '':
+            continue
+        if isinstance(value, (list, tuple)):
+            for v in value:
+                parts.append(f'<g:{field}>{escape_xml(v)}</g:{field}>')
+        else:
+            parts.append(f'<g:{field}>{escape_xml(value)}</g:{field}>')
+    parts.append('</item>')
+    return '\n'.join(parts)
+
+# ============================================================================
+# WRITER
+# ============================================================================
+
+
+class FeedWriter:
+    """Write a Merchant Center RSS feed item by item
+
+    output: file path (.gz suffix or compress=True for gzip) or an open
+    text stream.
+    """
+
+    def __init__(self, output, title, link, description, compress=None):
+        self.output = output
+        self.title = title
+        self.link = link
+        self.description = description
+        self.items = 0
+        self.bytes = 0
+        self.sha256 = hashlib.sha256()
+
+        if hasattr(output, 'write'):
+            self.stream = output
+            self._owns_stream = False
+        else:
+            if compress is None:
+                compress = str(output).endswith('.gz')
+            if compress:
+                self.stream = gzip.open(output, 'wt', encoding='utf-8', compresslevel=6)
+            else:
+                self.stream = open(output, 'w', encoding='utf-8')
+            self._owns_stream = True
+
+        self._write('\n'.join([
+            '<?xml version="1.0" encoding="UTF-8"?>',
+            f'<rss xmlns:g="{G_NAMESPACE}" version="2.0">',
+            '<channel>',
+            f'<title>{escape_xml(title)}</title>',
+            f'<link>{escape_xml(link)}</link>',
+            f'<description>{escape_xml(description)}</description>',
+        ]))
+
+    def _write(self, text):
+        """Write raw text, count its UTF-8 size and hash it"""
+        self.stream.write(text)
+        data = text.encode('utf-8')
+        self.bytes += len(data)
+        self.sha256.update(data)
+
+    def hexdigest(self):
+        """SHA-256 of the uncompressed feed written so far"""
+        return self.sha256.hexdigest()
+
+    def write_item(self, item):
+        """Render and write one item dict"""
+        self.write_fragment(render_item(item))
+
+    def write_fragment(self, fragment):
+        """Write an already rendered <item> fragment"""
+        self._write('\n')
+        self._write(fragment)
+        self.items += 1
+
+    def write_fragments(self, fragments, count):
+        """Write a block of `count` newline-joined <item> fragments"""
+        self._write('\n')
+        self._write(fragments)
+        self.items += count
+
+    def close(self):
+        """Write the closing tags and close the output"""
+        if self.stream is None:
+            return
+        self._write(CLOSING)
+        if self._owns_stream:
+            self.stream.close()
+        else:
+            self.stream.flush()
+        self.stream = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        elif self._owns_stream and self.stream is not None:
+            self.stream.close()
+            self.stream = None
+
+
+class ShardedFeedWriter:
+    """FeedWriter that starts a new part past max_items or max_bytes
+
+    part_path(n) gives the file of part n (1-based). Every part is a
+    complete feed with the same channel header. Parts are available in
+    .parts (FeedWriters, .output is the part file) once closed.
+    """
+
+    def __init__(self, part_path, title, link, description, max_items=None, max_bytes=None, compress=None):
+        self.part_path = part_path
+        self.header = (title, link, description)
+        self.max_items = max_items
+        self.max_bytes = max_bytes
+        self.compress = compress
+        self.parts = []
+        self.current = None
+        self._open_part()
+
+    def _open_part(self):
+        self.current = FeedWriter(self.part_path(len(self.parts) + 1), *self.header, compress=self.compress)
+        self.parts.append(self.current)
+
+    def _room_for(self, size):
+        """Rotate to a new part unless the current one can take one more item of `size` bytes"""
+        part = self.current
+        if not part.items:
+            return
+        full = ((self.max_items and part.items >= self.max_items) or
+                (self.max_bytes and part.bytes + size + len(CLOSING) > self.max_bytes))
+        if full:
+            part.close()
+            self._open_part()
+
+    @property
+    def items(self):
+        return sum(part.items for part in self.parts)
+
+    @property
+    def bytes(self):
+        return sum(part.bytes for part in self.parts)
+
+    def write_item(self, item):
+        self.write_fragment(render_item(item))
+
+    def write_fragment(self, fragment):
+        self._room_for(len(fragment.encode('utf-8')) + 1 if self.max_bytes else 0)
+        self.current.write_fragment(fragment)
+
+    def write_fragments(self, fragments, count):
+        if not self.max_bytes and self.current.items + count <= (self.max_items or count):
+            self.current.write_fragments(fragments, count)
+            return
+        # Items never contain a raw '<' (escaped), so this only splits between items
+        for i, fragment in enumerate(fragments.split('\n<item>')):
+            self.write_fragment(fragment if i == 0 else '<item>' + fragment)
+
+    def close(self):
+        if self.current is not None:
+            self.current.close()
+            self.current = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            for part in self.parts:
+                part.__exit__(exc_type, exc, tb)
+            self.current = None
+
+# ============================================================================
+# POST-PROCESSING
+# ============================================================================
+
+# FeedWriter puts every g: field of an item on its own line
+_FIELD_LINE = re.compile(r'^<g:(\w+)>(.*)</g:\1>$')
+
+
+def iter_item_fields(path, fields=None):
+    """Yield {field: value} for each item of a plain feed written by FeedWriter
+
+    fields: only read these g: fields (e.g. ids and URLs, without the
+    descriptions); default: all of them.
+    """
+    wanted = set(fields) if fields else None
+    item = None
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.rstrip('\n')
+            if line == '<item>':
+                item = {}
+            elif line == '</item>':
+                yield item
+                item = None
+            elif item is not None:
+                match = _FIELD_LINE.match(line)
+                if match and (wanted is None or match.group(1) in wanted):
+                    item.setdefault(match.group(1), unescape(match.group(2), {'&quot;': '"'}))
+
+
+def filter_feed(writer, drop_ids):
+    """Rewrite the plain feed of a closed FeedWriter without the items whose g:id is in drop_ids
+
+    The result is byte-identical to a feed written without those items;
+    the writer's items, bytes and hash are updated to match.
+    """
+    path = writer.output
+    tmp_path = f"{path}.filtered"
+    sha256 = hashlib.sha256()
+    size = items = 0
+    with open(path, 'r', encoding='utf-8') as src, open(tmp_path, 'w', encoding='utf-8') as dst:
+        block = None
+        for line in src:
+            if line == '<item>\n':
+                block = [line]
+                continue
+            if block is None:
+                chunk = line
+            else:
+                block.append(line)
+                if line != '</item>\n':
+                    continue
+                id_line = next((l for l in block if l.startswith('<g:id>')), '')
+                match = _FIELD_LINE.match(id_line.rstrip('\n'))
+                item_id = unescape(match.group(2), {'&quot;': '"'}) if match else None
+                chunk = '' if item_id in drop_ids else ''.join(block)
+                items += bool(chunk)
+                block = None
+            if chunk:
+                dst.write(chunk)
+                data = chunk.encode('utf-8')
+                size += len(data)
+                sha256.update(data)
+    os.replace(tmp_path, path)
+    writer.items, writer.bytes, writer.sha256 = items, size, sha256
+    return writer
+
+# ============================================================================
+# VALIDATION
+# ============================================================================
+
+
+def validate_feed(path, max_errors=50, required=REQUIRED_FIELDS):
+    """Check a feed against the RSS 2.0 / g: namespace structure
+
+    Streams the file (plain or .gz). Returns (item_count, errors).
+    required: g: fields every item must carry (SUPPLEMENTAL_FIELDS for
+    supplemental feeds).
+    """
+    g = f'{{{G_NAMESPACE}}}'
+    errors = []
+    items = 0
+    seen_ids = set()
+
+    opener = gzip.open if str(path).endswith('.gz') else open
+    try:
+        with opener(path, 'rb') as f:
+            context = ET.iterparse(f, events=('start', 'end'))
+            _, root = next(context)
+            if root.tag != 'rss' or root.get('version') != '2.0':
+                errors.append(f"root must be <rss version=\"2.0\">, got <{root.tag}>")
+
+            depth_channel = False
+            channel_fields = set()
+            for event, elem in context:
+                if event == 'start':
+                    if elem.tag == 'channel':
+                        depth_channel = True
+                    continue
+
+                if elem.tag in ('title', 'link', 'description') and depth_channel:
+                    channel_fields.add(elem.tag)
+                elif elem.tag == 'item':
+                    items += 1
+                    fields = {child.tag[len(g):]: (child.text or '') for child in elem
+                              if child.tag.startswith(g)}
+                    label = fields.get('id') or f'#{items}'
+                    for field in required:
+                        if not fields.get(field):
+                            errors.append(f"item {label}: missing g:{field}")
+                    if fields.get('availability') and fields['availability'] not in AVAILABILITY_VALUES:
+                        errors.append(f"item {label}: invalid g:availability '{fields['availability']}'")
+                    if fields.get('condition') and fields['condition'] not in CONDITION_VALUES:
+                        errors.append(f"item {label}: invalid g:condition '{fields['condition']}'")
+                    for field in URL_FIELDS:
+                        if fields.get(field) and not URL_PATTERN.match(fields[field]):
+                            errors.append(f"item {label}: invalid g:{field} '{fields[field]}'")
+                    if fields.get('price') and not PRICE_PATTERN.match(fields['price']):
+                        errors.append(f"item {label}: invalid g:price '{fields['price']}'")
+                    if len(fields.get('title', '')) > 150:
+                        errors.append(f"item {label}: g:title longer than 150 chars")
+                    if len(fields.get('description', '')) > 5000:
+                        errors.append(f"item {label}: g:description longer than 5000 chars")
+                    if fields.get('id') in seen_ids:
+                        errors.append(f"item {label}: duplicate g:id")
+                    seen_ids.add(fields.get('id'))
+                    # Keep memory flat on large feeds
+                    elem.clear()
+                    root.clear()
+                if len(errors) >= max_errors:
+                    errors.append("too many errors, stopping")
+                    break
+
+            for field in ('title', 'link', 'description'):
+                if field not in channel_fields:
+                    errors.append(f"channel: missing <{field}>")
+
+    except ET.ParseError as e:
+        errors.append(f"not well-formed XML: {e}")
+
+    return items, errors
+
+
+
+def self_check():
+    """Write a feed of HOSTILE_VALUES titles/descriptions and check it round-trips
+
+    Returns a list of problems (empty when the feed is well-formed, valid,
+    and every value reads back as written, minus illegal control chars).
+    """
+    problems = []
+    items = [{'id': f'hostile-{i}', 'title': value[:150], 'description': value,
+              'link': f'https://example.com/p/{i}?a=1&b=2', 'image_link': f'https://example.com/i/{i}.jpg',
+              'availability': 'in stock', 'price': '10.00 CAD', 'condition': 'new'}
+             for i, value in enumerate(HOSTILE_VALUES)]
+
+    with tempfile.TemporaryDirectory() as tmp:
+        for name in ('self-check.xml', 'self-check.xml.gz'):
+            path = os.path.join(tmp, name)
+            with FeedWriter(path, 'Q&A <store>', 'https://example.com/?x=1&y=2', 'a ]]> b') as writer:
+                for item in items:
+                    writer.write_item(item)
+
+            count, errors = validate_feed(path)
+            problems += [f"{name}: {error}" for error in errors]
+            if count != len(items):
+                problems.append(f"{name}: {count} items read back, {len(items)} written")
+            if errors:
+                continue
+
+            opener = gzip.open if name.endswith('.gz') else open
+            with opener(path, 'rb') as f:
+                parsed = ET.parse(f).getroot()
+            g = f'{{{G_NAMESPACE}}}'
+            for item, elem in zip(items, parsed.iter('item')):
+                for field in ('title', 'description', 'link'):
+                    expected = _ILLEGAL_CHARS.sub('', item[field])
+                    if elem.findtext(g + field) != expected:
+                        problems.append(f"{name}: g:{field} of {item['id']} reads back as "
+                                        f"{elem.findtext(g + field)!r}, expected {expected!r}")
+            if name.endswith('.xml'):
+                for item, fields in zip(items, iter_item_fields(path)):
+                    if fields.get('description') != _ILLEGAL_CHARS.sub('', item['description']):
+                        problems.append(f"{name}: iter_item_fields misreads {item['id']}")
+
+    return problems
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Validate a Google Merchant Center feed')
+    mode = parser.add_mutually_exclusive_group(required=True)
+    mode.add_argument('--validate', metavar='FEED', help='Feed file (.xml or .xml.gz)')
+    mode.add_argument('--self-check', action='store_true',
+                      help="Check that '&', '<', ']]>' and control chars in values still give a valid feed")
+    parser.add_argument('--supplemental', action='store_true',
+                        help='Supplemental feed: only g:id, g:price and g:availability required')
+    args = parser.parse_args()
+
+    if args.self_check:
+        problems = self_check()
+        if problems:
+            print(f"❌ Escaping self-check failed ({len(problems)} problem(s)):")
+            for problem in problems:
+                print(f"   - {problem}")
+            sys.exit(1)
+        print(f"✅ Escaping self-check passed: {len(HOSTILE_VALUES)} hostile values, plain and gzip")
+        return
+
+    items, errors = validate_feed(args.validate, required=SUPPLEMENTAL_FIELDS if args.supplemental else REQUIRED_FIELDS)
+    if errors:
+        print(f"❌ {len(errors)} problem(s) in {args.validate} ({items} items):")
+        for error in errors:
+            print(f"   - {error}")
+        sys.exit(1)
+    print(f"✅ Feed valid: {items} items")
+
+
+if __name__ == '__main__':
+    main()
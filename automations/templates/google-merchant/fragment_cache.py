@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Per-variant <item> fragment cache for incremental Merchant feed generation
+
+A SQLite store (one file per store) of rendered <item> fragments keyed by
+variant id, with the content hash of the data they were rendered from.
+An incremental run only fetches products updated since the last run,
+re-renders the variants whose hash changed, drops deleted products, and
+splices the feed together from the cached fragments in catalog order.
+
+Tables:
+  fragments(variant_id, product_id, position, hash, fragment)
+      -- fragment is '' for variants that emit no item (e.g. no market price)
+  meta(key, value)   -- last_run, config_key
+"""
+
+import sqlite3
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+
+class FragmentCache:
+    """SQLite-backed store of rendered feed fragments"""
+
+    def __init__(self, path):
+        self.path = str(path)
+        self.db = sqlite3.connect(self.path)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')
+        self.db.executescript('''
+            CREATE TABLE IF NOT EXISTS fragments (
+                variant_id INTEGER PRIMARY KEY,
+                product_id INTEGER NOT NULL,
+                position INTEGER NOT NULL,
+                hash TEXT NOT NULL,
+                fragment TEXT NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS fragments_product ON fragments (product_id, position);
+            CREATE TABLE IF NOT EXISTS meta (
+                key TEXT PRIMARY KEY,
+                value TEXT
+            );
+        ''')
+        self.rendered = 0
+        self.reused = 0
+        self.removed = 0
+
+    # ------------------------------------------------------------------ meta
+
+    def get_meta(self, key):
+        row = self.db.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return row[0] if row else None
+
+    def set_meta(self, key, value):
+        self.db.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, value))
+
+    # ------------------------------------------------------------- fragments
+
+    def product_hashes(self, product_id):
+        """{variant_id: hash} currently cached for a product"""
+        return dict(self.db.execute(
+            'SELECT variant_id, hash FROM fragments WHERE product_id = ?', (product_id,)))
+
+    def replace_product(self, product_id, entries):
+        """Store a product's variants in order
+
+        entries: list of (variant_id, hash, fragment); fragment is None when
+        the cached fragment (same hash) is kept and '' for a variant that
+        emits no item. Variants no longer listed are removed.
+        """
+        stale = set(self.product_hashes(product_id))
+        for position, (variant_id, content_hash, fragment) in enumerate(entries):
+            stale.discard(variant_id)
+            if fragment is None:
+                self.db.execute('UPDATE fragments SET position = ? WHERE variant_id = ?',
+                                (position, variant_id))
+                self.reused += 1
+            else:
+                self.db.execute('INSERT OR REPLACE INTO fragments VALUES (?, ?, ?, ?, ?)',
+                                (variant_id, product_id, position, content_hash, fragment))
+                self.rendered += bool(fragment)
+        if stale:
+            self.db.executemany('DELETE FROM fragments WHERE variant_id = ?', [(v,) for v in stale])
+            self.removed += len(stale)
+
+    def remove_product(self, product_id):
+        """Drop every fragment of a product"""
+        cursor = self.db.execute('DELETE FROM fragments WHERE product_id = ?', (product_id,))
+        self.removed += cursor.rowcount
+
+    def retain_products(self, product_ids):
+        """Drop fragments of products not in product_ids (deleted/unpublished)"""
+        self.db.execute('CREATE TEMP TABLE IF NOT EXISTS live_products (product_id INTEGER PRIMARY KEY)')
+        self.db.execute('DELETE FROM live_products')
+        self.db.executemany('INSERT OR IGNORE INTO live_products VALUES (?)', ((pid,) for pid in product_ids))
+        cursor = self.db.execute(
+            'DELETE FROM fragments WHERE product_id NOT IN (SELECT product_id FROM live_products)')
+        self.removed += cursor.rowcount
+
+    def count(self):
+        return self.db.execute("SELECT COUNT(*) FROM fragments WHERE fragment != ''").fetchone()[0]
+
+    def iter_fragments(self):
+        """Yield cached fragments in catalog order (product id, variant position)"""
+        cursor = self.db.execute(
+            "SELECT fragment FROM fragments WHERE fragment != '' ORDER BY product_id, position")
+        for (fragment,) in cursor:
+            yield fragment
+
+    # ----------------------------------------------------------- lifecycle
+
+    def commit(self):
+        self.db.commit()
+
+    def close(self):
+        self.db.close()
@@ -5,20 +5,50 @@ Generates product feed XML for Google Shopping FREE listings
 
 Usage:
   python generate_merchant_center_feed.py
-
-Environment Variables (required):
+  python generate_merchant_center_feed.py --gzip --validate
+  python generate_merchant_center_feed.py --on-change "./upload-feed.sh"   # run only if the feed changed
+  python generate_merchant_center_feed.py --bulk    # GraphQL Bulk Operation ingestion
+  python generate_merchant_center_feed.py --incremental   # only re-render changed variants
+  python generate_merchant_center_feed.py --config merchant-feeds.json   # many stores/markets at once
+  python generate_merchant_center_feed.py --shard-items 100000 --shard-bytes 500MB   # parts + index
+  python generate_merchant_center_feed.py --supplemental   # id/price/availability only (hourly cron)
+  python generate_merchant_center_feed.py --check-links drop   # HEAD-check g:link/g:image_link first
+
+Environment Variables (single store, without --config):
   - SHOPIFY_STORE_DOMAIN: Store domain (e.g., mystore.myshopify.com)
   - SHOPIFY_ACCESS_TOKEN: Admin API token
   - STORE_URL: Public store URL (e.g., https://mystore.com)
   - STORE_NAME: Store name for feed title
   - CURRENCY: Currency code (default: USD)
+  - CATEGORY_RULES: Google product category rules file (JSON, see category_rules.py)
+  - SHOPIFY_ADMIN_URL: Admin API base URL override (default: https://<SHOPIFY_STORE_DOMAIN>,
+    e.g. the local stand-in from shopify_standin.py)
+
+Config file (--config, see merchant-feeds.example.json): one entry per
+store, each with its markets (country + currency + optional URL). Stores
+are fetched and rendered concurrently over the shared pooled session, each
+under its own REST rate limit; every market gets its own feed.
+
+Supplemental feed (--supplemental): google-merchant-supplemental-<store>.xml
+with only g:id, g:price and g:availability, from a products fetch limited
+to fields=id,status,variants (no descriptions or images). Register it as a
+supplemental feed in Merchant Center and refresh it hourly, e.g.
+  0 * * * * python generate_merchant_center_feed.py --supplemental
+Unchanged prices/stock leave the published file untouched.
 """
 
 import os
+import re
 import sys
 import json
-import re
-from datetime import datetime
+import time
+import shlex
+import asyncio
+import hashlib
+import argparse
+import subprocess
+from contextlib import ExitStack
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
 
 # Find project root and load .env
@@ -30,43 +60,178 @@ load_dotenv(project_root / '.env')
 
 import requests
 
-# Configuration from environment
-SHOPIFY_STORE = os.getenv('SHOPIFY_STORE_DOMAIN')
-SHOPIFY_TOKEN = os.getenv('SHOPIFY_ACCESS_TOKEN')
-STORE_URL = os.getenv('STORE_URL') or os.getenv('SHOPIFY_STORE_URL')
-STORE_NAME = os.getenv('STORE_NAME', 'My Store')
-CURRENCY = os.getenv('CURRENCY', 'USD')
-API_VERSION = os.getenv('SHOPIFY_API_VERSION', '2024-01')
-
-# Validate required config
-missing = []
-if not SHOPIFY_STORE:
-    missing.append('SHOPIFY_STORE_DOMAIN')
-if not SHOPIFY_TOKEN:
-    missing.append('SHOPIFY_ACCESS_TOKEN')
-if not STORE_URL:
-    missing.append('STORE_URL or SHOPIFY_STORE_URL')
-
-if missing:
-    print(f"❌ ERREUR: Variables manquantes: {', '.join(missing)}")
-    print("\nAjoutez ces variables à votre .env:")
-    for var in missing:
-        print(f"  {var}=...")
-    sys.exit(1)
-
-
-def fetch_products():
-    """Fetch all published products from Shopify"""
-    url = f"https://{SHOPIFY_STORE}/admin/api/{API_VERSION}/products.json"
-    headers = {'X-Shopify-Access-Token': SHOPIFY_TOKEN}
+# Shared pooled HTTP session (keep-alive, gzip, timeouts, retry on 429/5xx)
+sys.path.insert(0, str(project_root / 'automations' / 'lib'))
+from http_session import get_session, RateLimiter
+
+from feed_writer import (FeedWriter, ShardedFeedWriter, render_item, validate_feed,
+                         REQUIRED_FIELDS, SUPPLEMENTAL_FIELDS)
+from shopify_bulk import fetch_products_bulk
+from fragment_cache import FragmentCache
+from feed_render import build_variant_items, build_supplemental_items, render_parallel, item_id
+from feed_publish import (publish_feed, publish_tmp_path, publish_shards, remove_shards,
+                          shard_path, index_path, pending_hook_path)
+from category_rules import rules_fingerprint
+import description_text
+from link_check import LinkChecker, LinkCache, check_feed_links, PER_HOST
+
+# Defaults for every store (overridable in the config "defaults" or per store)
+DEFAULTS = {
+    'api_version': os.getenv('SHOPIFY_API_VERSION', '2024-01'),
+    'currency': 'USD',
+    'country': 'US',
+    # Shopify REST: 2 requests/s per store (leaky bucket of 40)
+    'rate_limit': 2.0,
+    'rate_burst': 10
+}
+
+# Stores generated at the same time with --config
+DEFAULT_CONCURRENCY = 4
+
+# Bump when build_variant_items() output changes: invalidates cached fragments
+RENDER_VERSION = '2'
+
+# Overlap between incremental runs, covers clock skew and in-flight updates
+INCREMENTAL_OVERLAP = timedelta(minutes=10)
+
+OUTPUTS_DIR = project_root / 'outputs'
+
+# Product fields needed by supplemental (price/stock) feeds
+SUPPLEMENTAL_PRODUCT_FIELDS = 'id,status,variants'
+
+# ============================================================================
+# STORE CONFIGURATION
+# ============================================================================
+
+
+def normalize_store(store, defaults=None):
+    """Fill a store entry with defaults; return (store, errors)"""
+    store = {**DEFAULTS, **(defaults or {}), **store}
+    errors = []
+
+    if store.get('token_env') and not store.get('token'):
+        store['token'] = os.getenv(store['token_env'])
+    for key, label in (('domain', 'domain'), ('token', f"token ({store.get('token_env') or 'token_env'} not set)"),
+                       ('url', 'url')):
+        if not store.get(key):
+            errors.append(f"missing {label}")
+    if errors:
+        return store, errors
+
+    store['url'] = store['url'].rstrip('/')
+    store.setdefault('name', store['domain'])
+    store['slug'] = store.get('slug') or store['domain'].replace('.myshopify.com', '')
+    store['admin_url'] = (store.get('admin_url') or f"https://{store['domain']}").rstrip('/')
+    store['limiter'] = RateLimiter(store['rate_limit'], store['rate_burst'])
+
+    markets = store.get('markets') or [{'country': store['country'], 'currency': store['currency']}]
+    store['markets'] = []
+    for market in markets:
+        country = market.get('country', store['country']).upper()
+        store['markets'].append({
+            'url': (market.get('url') or store['url']).rstrip('/'),
+            'name': store['name'],
+            'currency': market.get('currency', store['currency']),
+            'shop_currency': store['currency'],
+            'country': country,
+            'category_rules': market.get('category_rules', store.get('category_rules')),
+            # A single market keeps the historical google-merchant-feed-<store>.xml name
+            'feed_slug': store['slug'] if len(markets) == 1 else f"{store['slug']}-{country.lower()}"
+        })
+    return store, errors
+
+
+def store_from_env():
+    """Single-store configuration from the environment (exits if incomplete)"""
+    store = {
+        'domain': os.getenv('SHOPIFY_STORE_DOMAIN'),
+        'token': os.getenv('SHOPIFY_ACCESS_TOKEN'),
+        'url': os.getenv('STORE_URL') or os.getenv('SHOPIFY_STORE_URL'),
+        'name': os.getenv('STORE_NAME', 'My Store'),
+        'currency': os.getenv('CURRENCY', 'USD'),
+        'admin_url': os.getenv('SHOPIFY_ADMIN_URL'),
+        'category_rules': os.getenv('CATEGORY_RULES') or None
+    }
+
+    missing = []
+    if not store['domain']:
+        missing.append('SHOPIFY_STORE_DOMAIN')
+    if not store['token']:
+        missing.append('SHOPIFY_ACCESS_TOKEN')
+    if not store['url']:
+        missing.append('STORE_URL or SHOPIFY_STORE_URL')
+
+    if missing:
+        print(f"❌ ERREUR: Variables manquantes: {', '.join(missing)}")
+        print("\nAjoutez ces variables à votre .env:")
+        for var in missing:
+            print(f"  {var}=...")
+        sys.exit(1)
+
+    return normalize_store(store)[0]
+
+
+def load_config(path):
+    """Load and validate the multi-store config file"""
+    try:
+        with open(path, 'r') as f:
+            config = json.load(f)
+    except Exception as e:
+        print(f"❌ ERROR reading config {path}: {e}")
+        sys.exit(1)
+
+    stores = []
+    errors = []
+    for i, entry in enumerate(config.get('stores', [])):
+        store, store_errors = normalize_store(entry, config.get('defaults'))
+        errors.extend(f"stores[{i}] ({entry.get('name') or entry.get('domain')}): {e}" for e in store_errors)
+        stores.append(store)
+
+    if not stores:
+        errors.append("no stores configured")
+    feeds = [m['feed_slug'] for s in stores if 'markets' in s and 'slug' in s for m in s['markets']]
+    errors.extend(f"duplicate feed '{slug}'" for slug in sorted({f for f in feeds if feeds.count(f) > 1}))
+
+    if errors:
+        print("❌ ERROR: Invalid configuration:")
+        for error in errors:
+            print(f"   - {error}")
+        sys.exit(1)
+
+    config['stores'] = stores
+    config['concurrency'] = config.get('concurrency', DEFAULT_CONCURRENCY)
+    print(f"✅ Configuration validated ({len(stores)} stores, {len(feeds)} feeds)")
+    return config
+
+# ============================================================================
+# FETCH
+# ============================================================================
+
+
+def fetch_products(store, updated_at_min=None, fields=None, presentment_prices=False):
+    """Yield all published products of a store from Shopify, page by page
+
+    updated_at_min: only products updated since then (ISO 8601)
+    fields: restrict the returned product fields (e.g. 'id')
+    presentment_prices: include variant prices in the market currencies
+    """
+    url = f"{store['admin_url']}/admin/api/{store['api_version']}/products.json"
+    headers = {'X-Shopify-Access-Token': store['token']}
+    if presentment_prices:
+        headers['X-Shopify-Api-Features'] = 'include-presentment-prices'
     params = {'status': 'active', 'limit': 250}
+    if updated_at_min:
+        params['updated_at_min'] = updated_at_min
+    if fields:
+        params['fields'] = fields
 
-    products = []
+    session = get_session()
     while url:
-        response = requests.get(url, headers=headers, params=params)
+        store['limiter'].wait()
+        response = session.get(url, headers=headers, params=params)
         response.raise_for_status()
         data = response.json()
-        products.extend(data['products'])
+        yield from data['products']
 
         # Pagination
         link_header = response.headers.get('Link', '')
@@ -77,158 +242,494 @@ def fetch_products():
                     url = link[link.find('<')+1:link.find('>')]
         params = None  # URL already contains params
 
-    return products
+
+def needs_presentment_prices(store):
+    """True when a market sells in another currency than the shop"""
+    return any(m['currency'] != m['shop_currency'] for m in store['markets'])
+
+
+def fetch_store_products(store, bulk=False, updated_at_min=None):
+    """Products of a store through REST paging or a Bulk Operation"""
+    if bulk and needs_presentment_prices(store):
+        # The bulk query only exports shop-currency prices
+        print(f"⚠️  [{store['name']}] multi-currency markets: using REST paging instead of --bulk")
+        bulk = False
+    if bulk:
+        return fetch_products_bulk(store['admin_url'], store['token'], store['api_version'],
+                                   updated_at_min=updated_at_min)
+    return fetch_products(store, updated_at_min=updated_at_min,
+                          presentment_prices=needs_presentment_prices(store))
+
+
+def timed(iterable, result, key):
+    """Yield from iterable, adding the time spent waiting on it to result[key]"""
+    iterator = iter(iterable)
+    while True:
+        start = time.perf_counter()
+        try:
+            value = next(iterator)
+        except StopIteration:
+            result[key] += time.perf_counter() - start
+            return
+        result[key] += time.perf_counter() - start
+        yield value
+
+# ============================================================================
+# RENDER
+# ============================================================================
+
+
+def generate_feeds(products, targets, workers=1):
+    """Stream the items of products into the FeedWriter of every target
+
+    products can be any iterable (e.g. the fetch_products() generator):
+    items are written as products arrive, nothing is held in memory.
+    targets: [{'market': store market, 'writer': FeedWriter}], one per feed,
+    optionally with 'build' (default build_variant_items) for other item
+    shapes. With workers > 1, chunks of products are rendered in a process
+    pool and written back in catalog order.
+    Returns the number of products processed.
+    """
+    if workers > 1 and all('build' not in target for target in targets):
+        product_count = 0
+        markets = [target['market'] for target in targets]
+        for results in render_parallel(products, markets, workers):
+            for target, (fragments, item_count, chunk_products) in zip(targets, results):
+                if item_count:
+                    target['writer'].write_fragments(fragments, item_count)
+            product_count += results[0][2]
+        return product_count
+
+    product_count = 0
+    for product in products:
+        # Skip draft products
+        if product['status'] != 'active':
+            continue
+        product_count += 1
+
+        for target in targets:
+            for item in target.get('build', build_variant_items)(product, target['market']):
+                target['writer'].write_item(item)
+
+    return product_count
+
+
+def generate_merchant_center_feed(products, writer, market, workers=1):
+    """Stream the items of products for one store market into a FeedWriter"""
+    return generate_feeds(products, [{'market': market, 'writer': writer}], workers)
+
+# ============================================================================
+# INCREMENTAL (FRAGMENT CACHE)
+# ============================================================================
 
 
-def generate_merchant_center_feed(products):
-    """Generate Google Merchant Center XML feed"""
+def config_key(market):
+    """Hash of everything besides product data that affects rendered items"""
+    return hashlib.sha1(json.dumps(
+        [RENDER_VERSION, market['url'], market['name'], market['currency'], market['shop_currency'],
+         market['country'], rules_fingerprint(market['category_rules'])]).encode('utf-8')).hexdigest()
 
-    xml_lines = [
-        '<?xml version="1.0" encoding="UTF-8"?>',
-        '<rss xmlns:g="http://base.google.com/ns/1.0" version="2.0">',
-        '<channel>',
-        f'<title>{STORE_NAME}</title>',
-        f'<link>{STORE_URL}</link>',
-        f'<description>Products from {STORE_NAME}</description>',
+
+def variant_hashes(product):
+    """[(variant_id, content hash)] of the data each variant item is rendered from"""
+    base = json.dumps([
+        product.get('title'), product.get('handle'), product.get('body_html'),
+        product.get('vendor'), product.get('product_type'), product.get('image'),
+        len(product['variants'])
+    ], sort_keys=True)
+    return [
+        (variant['id'], hashlib.blake2b(
+            (base + json.dumps([variant.get('title'), variant.get('price'), variant.get('barcode'),
+                                variant.get('inventory_quantity'), variant.get('presentment_prices')],
+                               sort_keys=True)).encode('utf-8'),
+            digest_size=16).hexdigest())
+        for variant in product['variants']
     ]
 
+
+def update_fragment_cache(products, targets):
+    """Re-render only the variants whose content hash changed, in every target cache
+
+    Returns the number of products processed.
+    """
+    product_count = 0
     for product in products:
-        # Skip draft products
+        product_count += 1
         if product['status'] != 'active':
+            for target in targets:
+                target['cache'].remove_product(product['id'])
             continue
 
-        for variant in product['variants']:
-            # Required fields
-            product_id = f"shopify_US_{product['id']}_{variant['id']}"
-            title = product['title']
-            if len(product['variants']) > 1 and variant['title'] != 'Default Title':
-                title = f"{product['title']} - {variant['title']}"
-
-            description = product['body_html'] or product['title']
-            # Strip HTML tags for Google
-            description = re.sub(r'<[^>]+>', '', description)
-            description = description[:5000]  # Google max 5000 chars
-
-            link = f"{STORE_URL}/products/{product['handle']}"
-            if len(product['variants']) > 1:
-                link += f"?variant={variant['id']}"
-
-            image_link = product['image']['src'] if product.get('image') else ''
-
-            # Price
-            price = f"{variant['price']} {CURRENCY}"
-            availability = "in stock" if variant.get('inventory_quantity', 0) > 0 else "out of stock"
-
-            # Condition: new (all products new)
-            condition = "new"
-
-            # Product type and Google category
-            product_type = product.get('product_type', 'General')
-
-            # Google product category (approximate mapping)
-            google_category = "166"  # Default: Apparel & Accessories
-            title_lower = title.lower()
-            if 'coat' in title_lower or 'jacket' in title_lower:
-                google_category = "5598"  # Clothing > Outerwear > Coats & Jackets
-            elif 'bag' in title_lower or 'backpack' in title_lower:
-                google_category = "100"  # Luggage & Bags
-            elif 'electronic' in product_type.lower():
-                google_category = "222"  # Electronics
-            elif 'medical' in title_lower or 'health' in title_lower:
-                google_category = "491"  # Health & Beauty
-
-            # Brand
-            brand = product.get('vendor', STORE_NAME)
-
-            # GTIN/MPN optional but recommended
-            gtin = variant.get('barcode', '')
-
-            # Age group, gender (if applicable)
-            age_group = "adult"
-            gender = "unisex"
-
-            # Build item XML
-            item_xml = f"""
-<item>
-<g:id>{product_id}</g:id>
-<g:title><![CDATA[{title[:150]}]]></g:title>
-<g:description><![CDATA[{description}]]></g:description>
-<g:link>{link}</g:link>
-<g:image_link>{image_link}</g:image_link>
-<g:availability>{availability}</g:availability>
-<g:price>{price}</g:price>
-<g:condition>{condition}</g:condition>
-<g:google_product_category>{google_category}</g:google_product_category>
-<g:product_type>{product_type}</g:product_type>
-<g:brand>{brand}</g:brand>
-<g:age_group>{age_group}</g:age_group>
-<g:gender>{gender}</g:gender>"""
-
-            if gtin:
-                item_xml += f"\n<g:gtin>{gtin}</g:gtin>"
-
-            item_xml += "\n</item>"
-            xml_lines.append(item_xml)
-
-    xml_lines.extend(['</channel>', '</rss>'])
-    return '\n'.join(xml_lines)
+        hashes = variant_hashes(product)
+        for target in targets:
+            cache = target['cache']
+            cached = cache.product_hashes(product['id'])
+            if len(cached) == len(hashes) and all(cached.get(v) == h for v, h in hashes):
+                cache.reused += len(hashes)
+                continue
+
+            # Variants without a price in the market currency have no item: they
+            # get an empty marker so the hash check above still matches next run
+            items = {item['id']: item for item in build_variant_items(product, target['market'])}
+            entries = []
+            for variant, (variant_id, content_hash) in zip(product['variants'], hashes):
+                item = items.get(item_id(product, variant, target['market']))
+                if cached.get(variant_id) == content_hash:
+                    entries.append((variant_id, content_hash, None))
+                else:
+                    entries.append((variant_id, content_hash, render_item(item) if item else ''))
+            cache.replace_product(product['id'], entries)
+
+    return product_count
+
+
+def generate_incremental_feed(store, targets, bulk=False, full=False, result=None):
+    """Refresh the fragment caches of a store from Shopify and splice the feeds from them
+
+    Fetches products updated since the oldest last run of the store's
+    markets (everything on the first run, with --full, or when a render
+    config changed), then an id-only pass to drop deleted/unpublished
+    products. Inventory-only changes that do not bump a product's
+    updated_at are picked up on the next full run.
+    """
+    result = result if result is not None else {'fetch_s': 0.0}
+    run_started = datetime.now(timezone.utc)
+    last_runs = []
+    for target in targets:
+        cache = target['cache']
+        if cache.get_meta('config_key') != config_key(target['market']) or not cache.get_meta('last_run'):
+            full = True
+        last_runs.append(cache.get_meta('last_run'))
+    since = None
+    if not full:
+        since = (datetime.fromisoformat(min(last_runs)) - INCREMENTAL_OVERLAP).replace(microsecond=0).isoformat()
+        print(f"🔁 [{store['name']}] Incremental: products updated since {since}")
+    else:
+        print(f"🔁 [{store['name']}] Full refresh of the fragment cache")
+
+    products = fetch_store_products(store, bulk=bulk, updated_at_min=since)
+    product_count = update_fragment_cache(timed(products, result, 'fetch_s'), targets)
+
+    # Deletions: compare against the live id list (cheap id-only pages)
+    print(f"🔎 [{store['name']}] Checking for deleted products...")
+    live_ids = [p['id'] for p in timed(fetch_products(store, fields='id'), result, 'fetch_s')]
+
+    for target in targets:
+        cache = target['cache']
+        cache.retain_products(live_ids)
+        cache.set_meta('last_run', run_started.isoformat())
+        cache.set_meta('config_key', config_key(target['market']))
+        cache.commit()
+
+        for fragment in cache.iter_fragments():
+            target['writer'].write_fragment(fragment)
+
+        print(f"♻️  [{target['market']['feed_slug']}] Fragments: {cache.rendered} rendered, "
+              f"{cache.reused} reused, {cache.removed} removed")
+    return product_count
+
+# ============================================================================
+# PER-STORE PIPELINE
+# ============================================================================
+
+
+def generate_store_feeds(store, args, link_checker=None):
+    """Fetch a store once and write/publish one feed per market; never raises, returns a result dict"""
+    result = {'name': store['name'], 'status': 'ok', 'products': 0, 'feeds': [],
+              'fetch_s': 0.0, 'publish_s': 0.0, 'total_s': 0.0, 'error': None}
+    start = time.perf_counter()
 
+    try:
+        OUTPUTS_DIR.mkdir(exist_ok=True)
+        kind = 'supplemental' if args.supplemental else 'feed'
+        targets = []
+        with ExitStack() as stack:
+            for market in store['markets']:
+                output_file = OUTPUTS_DIR / f"google-merchant-{kind}-{market['feed_slug']}.xml"
+                tmp_path = publish_tmp_path(output_file)
+                header = (store['name'], market['url'], f"Products from {store['name']}")
+                if args.shard_items or args.shard_bytes:
+                    writer = ShardedFeedWriter(lambda n, f=output_file: publish_tmp_path(shard_path(f, n)),
+                                               *header, max_items=args.shard_items, max_bytes=args.shard_bytes)
+                else:
+                    writer = FeedWriter(tmp_path, *header)
+                stack.enter_context(writer)
+                target = {'market': market, 'output_file': output_file, 'tmp_path': tmp_path, 'writer': writer}
+                if args.supplemental:
+                    target['build'] = build_supplemental_items
+                if args.incremental:
+                    cache_dir = OUTPUTS_DIR / 'feed-cache'
+                    cache_dir.mkdir(exist_ok=True)
+                    target['cache'] = FragmentCache(cache_dir / f"{market['feed_slug']}.sqlite")
+                    stack.callback(target['cache'].close)
+                targets.append(target)
+
+            if args.supplemental:
+                products = fetch_products(store, fields=SUPPLEMENTAL_PRODUCT_FIELDS,
+                                          presentment_prices=needs_presentment_prices(store))
+                result['products'] = generate_feeds(timed(products, result, 'fetch_s'), targets)
+            elif args.incremental:
+                result['products'] = generate_incremental_feed(store, targets, bulk=args.bulk,
+                                                               full=args.full, result=result)
+            else:
+                products = fetch_store_products(store, bulk=args.bulk)
+                result['products'] = generate_feeds(timed(products, result, 'fetch_s'), targets,
+                                                    workers=args.workers)
+
+        publish_start = time.perf_counter()
+        for target in targets:
+            result['feeds'].append(publish_target(target, args, result['products'], link_checker))
+        result['publish_s'] = time.perf_counter() - publish_start
+        if any(feed['status'] == 'invalid' for feed in result['feeds']):
+            result['status'] = 'invalid feed'
+        elif any(feed['status'] == 'hook failed' for feed in result['feeds']):
+            result['status'] = 'hook failed'
 
-def main():
-    print("🛍️ Google Merchant Center Feed Generator - Generic")
-    print("=" * 60)
-    print(f"Store: {SHOPIFY_STORE}")
-    print(f"URL: {STORE_URL}")
-    print(f"Currency: {CURRENCY}")
-    print("=" * 60)
-    print(f"\nFetching products...")
+    except requests.exceptions.HTTPError as e:
+        result['status'] = 'failed'
+        result['error'] = str(e)
+        if '401' in str(e):
+            result['error'] += " → Vérifiez le token Shopify"
+        elif '404' in str(e):
+            result['error'] += " → Vérifiez le domaine Shopify"
+        print(f"❌ [{store['name']}] API Error: {e}")
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = str(e)
+        print(f"❌ [{store['name']}] Error: {e}")
+
+    finally:
+        result['total_s'] = time.perf_counter() - start
+
+    return result
+
+
+def publish_target(target, args, products=None, link_checker=None):
+    """Check links, validate and publish one written feed (or all its parts); return its report entry"""
+    writer = target['writer']
+    output_file = target['output_file']
+    sharded = isinstance(writer, ShardedFeedWriter)
+    feed = {'feed': target['market']['feed_slug'], 'items': writer.items, 'bytes': writer.bytes,
+            'status': 'published', 'path': str(output_file),
+            'parts': len(writer.parts) if sharded else 1}
+    parts = writer.parts if sharded else [writer]
+    tmp_paths = [part.output for part in parts]
+
+    # Broken landing pages / images: leave the items out (drop) or just report them (flag)
+    if link_checker is not None:
+        report_file = re.sub(r'\.xml$', '', str(output_file)) + '.links.json'
+        feed['links'] = check_feed_links(parts, link_checker, args.check_links, report_file)
+        feed['items'], feed['bytes'] = writer.items, writer.bytes
+
+    # Validate before publishing: a broken feed never replaces a good one
+    if args.validate:
+        required = SUPPLEMENTAL_FIELDS if args.supplemental else REQUIRED_FIELDS
+        errors = [error for path in tmp_paths for error in validate_feed(path, required=required)[1]]
+        if errors:
+            for path in tmp_paths:
+                os.remove(path)
+            print(f"❌ [{feed['feed']}] Feed validation: {len(errors)} problem(s)")
+            for error in errors:
+                print(f"   - {error}")
+            feed['status'] = 'invalid'
+            return feed
+
+    if sharded:
+        feed['path'] = index_path(output_file)
+    # Marked before publishing: once the new hash is in the manifest the feed
+    # counts as unchanged, so a hook that failed (or never ran) must be remembered
+    pending = pending_hook_path(feed['path'])
+    hook_was_pending = bool(args.on_change) and os.path.exists(pending)
+    if args.on_change:
+        Path(pending).touch()
+
+    if sharded:
+        changed, index = publish_shards(writer, output_file, gzip_copy=args.gzip, products=products)
+    else:
+        changed = publish_feed(writer, target['tmp_path'], output_file, gzip_copy=args.gzip, products=products)
+        # Parts of an earlier sharded run would duplicate every item
+        remove_shards(output_file)
+    if not changed:
+        feed['status'] = 'unchanged'
+    if not args.on_change:
+        return feed
+    if not (changed or hook_was_pending):
+        os.remove(pending)
+        return feed
 
     try:
-        products = fetch_products()
-        print(f"✅ Fetched {len(products)} products")
+        subprocess.run(shlex.split(args.on_change) + [feed['path']], check=True)
+    except (subprocess.CalledProcessError, OSError) as e:
+        # The feed stays published; the hook is retried on the next run
+        print(f"❌ [{feed['feed']}] --on-change failed: {e}")
+        feed['status'] = 'hook failed'
+        return feed
+    os.remove(pending)
+    return feed
+
+
+async def run_stores(stores, args, concurrency, link_checker=None):
+    """Generate the feeds of all stores, at most `concurrency` at a time"""
+    limit = asyncio.Semaphore(concurrency)
+
+    async def run_store(store):
+        async with limit:
+            return await asyncio.to_thread(generate_store_feeds, store, args, link_checker)
+
+    return await asyncio.gather(*(run_store(store) for store in stores))
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+
+def print_summary(results, wall_time):
+    """Print the per-store / per-feed timing report"""
+    print("═══════════════════════════════════════")
+    print("⏱️  FEED SUMMARY")
+    print("═══════════════════════════════════════")
+    print(f"{'Store':<24} {'Status':<13} {'Products':>8} {'Fetch':>7} {'Render':>7} {'Publish':>8} {'Total':>7}")
+    for r in sorted(results, key=lambda r: r['total_s'], reverse=True):
+        render_s = max(0.0, r['total_s'] - r['fetch_s'] - r['publish_s'])
+        print(f"{r['name'][:24]:<24} {r['status']:<13} {r['products']:>8} "
+              f"{r['fetch_s']:>6.1f}s {render_s:>6.1f}s {r['publish_s']:>7.1f}s {r['total_s']:>6.1f}s")
+        for feed in r['feeds']:
+            parts = f" in {feed['parts']} parts" if feed['parts'] > 1 else ''
+            print(f"   └─ {feed['feed']:<30} {feed['status']:<10} {feed['items']:>8} items "
+                  f"{feed['bytes']:>12,} bytes{parts}")
+            if feed.get('links'):
+                links = feed['links']
+                print(f"      🔗 {links['urls']} URLs: {links['broken']} broken, {links['unverified']} unverified; "
+                      f"{links['items_flagged']} items flagged, {links['items_dropped']} dropped")
+        if r['error']:
+            print(f"   └─ {r['error']}")
+
+    serial_time = sum(r['total_s'] for r in results)
+    slowest = max((r['total_s'] for r in results), default=0.0)
+    feeds = [feed for r in results for feed in r['feeds']]
+    print()
+    print(f"📦 Feeds: {len(feeds)} ({sum(f['status'] == 'published' for f in feeds)} published, "
+          f"{sum(f['status'] == 'unchanged' for f in feeds)} unchanged), "
+          f"{sum(f['items'] for f in feeds)} items")
+    print(f"⏱️  Wall time: {wall_time:.1f}s (slowest store {slowest:.1f}s, serial sum {serial_time:.1f}s)")
+    get_session().print_stats()
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+
+def parse_size(value):
+    """'500MB' / '2GB' / '1000000' -> bytes"""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?)B?\s*', value.upper())
+    if not match:
+        raise argparse.ArgumentTypeError(f"invalid size '{value}' (e.g. 500MB)")
+    return int(float(match.group(1)) * 1024 ** ' KMG'.index(match.group(2) or ' '))
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description='Generate Google Merchant Center product feeds')
+    parser.add_argument('--config', metavar='FILE',
+                        help='JSON config listing stores and markets (default: single store from env)')
+    parser.add_argument('--only', action='append', metavar='NAME',
+                        help='With --config: only generate the named store (repeatable)')
+    parser.add_argument('--gzip', action='store_true', help='Also publish a gzip-compressed copy (.xml.gz)')
+    parser.add_argument('--on-change', metavar='CMD',
+                        help='Command run with the feed path as last argument, only when the feed changed '
+                             '(a failed run is retried on the next run)')
+    parser.add_argument('--validate', action='store_true', help='Validate the feed against RSS 2.0 / g: before publishing')
+    parser.add_argument('--bulk', action='store_true',
+                        help='Ingest products with a GraphQL Bulk Operation instead of REST paging')
+    parser.add_argument('--incremental', action='store_true',
+                        help='Only fetch/re-render products changed since the last run (fragment cache)')
+    parser.add_argument('--full', action='store_true',
+                        help='With --incremental: refetch and re-render the whole catalog')
+    parser.add_argument('--workers', type=int, default=1,
+                        help='Render items in N worker processes per store (large catalogs; default: 1; '
+                             'not with --incremental or --supplemental)')
+    parser.add_argument('--shard-items', type=int, metavar='N',
+                        help='Split each feed into parts of at most N items (+ index)')
+    parser.add_argument('--shard-bytes', type=parse_size, metavar='SIZE',
+                        help='Split each feed into parts of at most SIZE (e.g. 500MB; + index)')
+    parser.add_argument('--check-links', choices=('flag', 'drop'),
+                        help='HEAD-check g:link and g:image_link before publishing: report (flag) or '
+                             'leave out (drop) items with a broken URL')
+    parser.add_argument('--link-per-host', type=int, default=PER_HOST, metavar='N',
+                        help=f'Concurrent link checks per host (default: {PER_HOST}; lower for fragile storefronts)')
+    parser.add_argument('--link-ttl', type=float, default=24, metavar='HOURS',
+                        help='Reuse link check results for this long (default: 24)')
+    parser.add_argument('--supplemental', action='store_true',
+                        help='Supplemental feed: only id, price and availability, from an inventory-only fetch')
+    args = parser.parse_args()
+    if args.supplemental and (args.incremental or args.bulk or args.check_links):
+        parser.error('--supplemental cannot be combined with --incremental, --bulk or --check-links')
+    if args.workers < 1:
+        parser.error('--workers must be at least 1')
+    # Incremental runs only render changed variants, one at a time into the
+    # fragment cache; supplemental items are too cheap for a process pool
+    if args.workers > 1 and (args.incremental or args.supplemental):
+        parser.error('--workers cannot be combined with --incremental or --supplemental')
+    return args
 
-        # Count variants
-        total_variants = sum(len(p['variants']) for p in products)
-        print(f"📦 Total product variants: {total_variants}")
 
-        print("\n🔨 Generating Google Merchant Center XML feed...")
-        feed_xml = generate_merchant_center_feed(products)
+def main():
+    args = parse_args()
 
-        # Save to outputs directory
-        outputs_dir = project_root / 'outputs'
-        outputs_dir.mkdir(exist_ok=True)
+    print("🛍️ Google Merchant Center Feed Generator - Generic")
+    print("=" * 60)
 
-        store_slug = SHOPIFY_STORE.replace('.myshopify.com', '')
-        output_file = outputs_dir / f'google-merchant-feed-{store_slug}.xml'
+    if args.config:
+        config = load_config(args.config)
+        stores = config['stores']
+        if args.only:
+            stores = [store for store in stores if store['name'] in args.only]
+        concurrency = config['concurrency']
+    else:
+        stores = [store_from_env()]
+        concurrency = 1
+
+    for store in stores:
+        markets = ', '.join(f"{m['country']}/{m['currency']}" for m in store['markets'])
+        print(f"Store: {store['domain']} ({store['url']}) - markets: {markets}")
+    print("=" * 60)
 
-        with open(output_file, 'w', encoding='utf-8') as f:
-            f.write(feed_xml)
+    # Cleaned descriptions are reused across runs (and stores) by body hash
+    (OUTPUTS_DIR / 'feed-cache').mkdir(parents=True, exist_ok=True)
+    memo = description_text.open_memo(OUTPUTS_DIR / 'feed-cache' / 'descriptions.sqlite')
 
-        file_size = os.path.getsize(output_file)
-        print(f"\n✅ Feed generated: {output_file}")
-        print(f"📏 File size: {file_size:,} bytes ({file_size/1024:.1f} KB)")
-        print(f"📅 Generated: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
+    print(f"\n🔨 Streaming Google Merchant Center XML feeds ({len(stores)} stores, x{concurrency})...")
+    start = time.perf_counter()
+    # One checker for all stores: per-host limits hold across stores sharing a CDN
+    link_checker = None
+    if args.check_links:
+        link_checker = LinkChecker(LinkCache(OUTPUTS_DIR / 'feed-cache' / 'links.sqlite', ttl=args.link_ttl * 3600),
+                                   per_host=args.link_per_host)
 
+    try:
+        results = asyncio.run(run_stores(stores, args, concurrency, link_checker))
+    finally:
+        description_text.close_memo()
+        if link_checker is not None:
+            link_checker.close()
+            link_checker.cache.close()
+    print(f"📝 Descriptions: {memo.hits} reused from previous runs, {memo.misses} cleaned")
+    print()
+    print_summary(results, time.perf_counter() - start)
+
+    if any(r['status'] != 'ok' for r in results):
+        sys.exit(1)
+
+    if not args.config:
+        store = stores[0]
         print("\n📋 NEXT STEPS:")
         print("1. Go to https://merchants.google.com")
-        print(f"2. Create account (Business name: {STORE_NAME})")
-        print(f"3. Verify website ownership ({STORE_URL})")
+        print(f"2. Create account (Business name: {store['name']})")
+        print(f"3. Verify website ownership ({store['url']})")
         print("4. Upload feed:")
-        print(f"   - File: {output_file}")
+        print(f"   - File: {results[0]['feeds'][0]['path']}")
         print("   OR set up scheduled fetch URL")
         print("5. Submit for review (3-7 days)")
 
-    except requests.exceptions.HTTPError as e:
-        print(f"\n❌ API Error: {e}")
-        if '401' in str(e):
-            print("   → Vérifiez SHOPIFY_ACCESS_TOKEN")
-        elif '404' in str(e):
-            print("   → Vérifiez SHOPIFY_STORE_DOMAIN")
-        sys.exit(1)
-    except Exception as e:
-        print(f"\n❌ Error: {e}")
-        sys.exit(1)
-
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,330 @@
+#!/usr/bin/env python3
+"""
+Concurrent g:link / g:image_link validation for Merchant feeds
+
+HEAD requests are fanned out with asyncio over a thread pool using a
+dedicated pooled session, bounded globally and per host. Every result
+(status, ETag) is cached on disk with a TTL, so a run only re-checks URLs
+that are new or expired; expired URLs with an ETag are revalidated with
+If-None-Match.
+
+Outcomes:
+  - ok:         2xx/3xx (redirects followed), or 304 on revalidation
+  - broken:     definitive 4xx (404, 410 ...): the item is left out
+                with --check-links drop
+  - unverified: timeouts, network errors, 429, 5xx, and 401/403/405
+                (bot protection / HEAD refused, even after a GET): kept,
+                reported
+
+Results are committed to the cache every COMMIT_EVERY checks, so an
+interrupted run keeps what it already checked.
+
+Usage:
+    checker = LinkChecker(LinkCache(path))
+    results = checker.check(urls)          # {url: {'outcome', 'status', ...}}
+
+    check_feed_links(writers, checker, mode='drop', report_file=path)
+
+    python generate_merchant_center_feed.py --check-links drop
+    python link_check.py --standin          # demo against a local mixed 200/404/slow server
+"""
+
+import os
+import sys
+import time
+import json
+import sqlite3
+import asyncio
+import argparse
+import threading
+from pathlib import Path
+from urllib.parse import urlsplit
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent.parent / 'lib'))
+from http_session import PooledSession
+
+from feed_writer import iter_item_fields, filter_feed
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Concurrent checks overall and per host (--link-per-host)
+MAX_CONCURRENCY = 32
+PER_HOST = 4
+
+# Cache writes between commits
+COMMIT_EVERY = 200
+
+# Cache lifetime (seconds): good results, and failures (re-checked sooner)
+TTL = 24 * 3600
+FAILURE_TTL = 3600
+
+TIMEOUT = (3, 10)
+
+# 4xx that do not prove the URL is broken: transient, or bot protection /
+# CDNs refusing scripted requests on a live page
+TRANSIENT_STATUSES = {408, 425, 429}
+UNVERIFIABLE_STATUSES = {401, 403, 405}
+
+# Answers to HEAD worth retrying with a streamed GET (HEAD refused or blocked)
+HEAD_UNSUPPORTED = {401, 403, 405, 501}
+
+# Item fields holding URLs to check
+LINK_FIELDS = ('link', 'image_link')
+
+# ============================================================================
+# CACHE
+# ============================================================================
+
+
+class LinkCache:
+    """SQLite store of URL check results (status, ETag, time)"""
+
+    def __init__(self, path, ttl=TTL, failure_ttl=FAILURE_TTL, commit_every=COMMIT_EVERY):
+        self.db = sqlite3.connect(str(path), check_same_thread=False)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('''CREATE TABLE IF NOT EXISTS links (
+            url TEXT PRIMARY KEY, outcome TEXT, status INTEGER, etag TEXT, error TEXT, checked_at REAL)''')
+        self.ttl = ttl
+        self.failure_ttl = failure_ttl
+        self.commit_every = commit_every
+        self.uncommitted = 0
+        self.lock = threading.Lock()
+
+    def get(self, url):
+        """Cached result dict, with 'fresh' telling whether it is still within its TTL"""
+        with self.lock:
+            row = self.db.execute('SELECT outcome, status, etag, error, checked_at FROM links WHERE url = ?',
+                                  (url,)).fetchone()
+        if not row:
+            return None
+        outcome, status, etag, error, checked_at = row
+        ttl = self.ttl if outcome == 'ok' else self.failure_ttl
+        return {'outcome': outcome, 'status': status, 'etag': etag, 'error': error,
+                'fresh': time.time() - checked_at < ttl}
+
+    def put(self, url, result):
+        with self.lock:
+            self.db.execute('INSERT OR REPLACE INTO links VALUES (?, ?, ?, ?, ?, ?)',
+                            (url, result['outcome'], result['status'], result.get('etag'),
+                             result.get('error'), time.time()))
+            self.uncommitted += 1
+            if self.uncommitted >= self.commit_every:
+                self.db.commit()
+                self.uncommitted = 0
+
+    def close(self):
+        with self.lock:
+            self.db.commit()
+            self.db.close()
+
+# ============================================================================
+# CHECKER
+# ============================================================================
+
+
+def classify(status):
+    """ok / broken / unverified for an HTTP status"""
+    if status < 400:
+        return 'ok'
+    if status < 500 and status not in TRANSIENT_STATUSES | UNVERIFIABLE_STATUSES:
+        return 'broken'
+    return 'unverified'
+
+
+class LinkChecker:
+    """Bounded concurrent HEAD checks with a result cache"""
+
+    def __init__(self, cache, concurrency=MAX_CONCURRENCY, per_host=PER_HOST, timeout=TIMEOUT):
+        self.cache = cache
+        self.concurrency = concurrency
+        self.per_host = per_host
+        # Dedicated session: short timeouts, one retry, a pool per host wide enough
+        self.session = PooledSession(timeout=timeout, max_retries=1, pool_size=max(per_host, 10))
+        self.executor = ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix='link-check')
+        self.host_limits = {}
+        self.host_lock = threading.Lock()
+        self.counts = {'requests': 0, 'cached': 0, 'revalidated': 0}
+
+    def host_limit(self, url):
+        """Semaphore bounding concurrent requests to the URL's host (shared across threads)"""
+        host = urlsplit(url).netloc
+        with self.host_lock:
+            return self.host_limits.setdefault(host, threading.BoundedSemaphore(self.per_host))
+
+    def _count(self, key):
+        with self.host_lock:
+            self.counts[key] += 1
+
+    def check_url(self, url):
+        """Check one URL (blocking, runs in the pool); returns a result dict"""
+        cached = self.cache.get(url)
+        if cached and cached['fresh']:
+            self._count('cached')
+            return cached
+
+        headers = {}
+        if cached and cached['outcome'] == 'ok' and cached.get('etag'):
+            headers['If-None-Match'] = cached['etag']
+
+        with self.host_limit(url):
+            self._count('requests')
+            try:
+                response = self.session.head(url, headers=headers, allow_redirects=True)
+                if response.status_code in HEAD_UNSUPPORTED:
+                    response = self.session.get(url, headers=headers, allow_redirects=True, stream=True)
+                    response.close()
+                if response.status_code == 304:
+                    self._count('revalidated')
+                    result = {'outcome': 'ok', 'status': 304, 'etag': response.headers.get('ETag') or cached['etag']}
+                else:
+                    result = {'outcome': classify(response.status_code), 'status': response.status_code,
+                              'etag': response.headers.get('ETag')}
+            except requests.exceptions.RequestException as e:
+                result = {'outcome': 'unverified', 'status': None, 'etag': None, 'error': type(e).__name__}
+
+        self.cache.put(url, result)
+        return result
+
+    async def check_all(self, urls):
+        """{url: result} for every distinct URL, checked concurrently"""
+        loop = asyncio.get_running_loop()
+        urls = list(dict.fromkeys(u for u in urls if u))
+        results = await asyncio.gather(*(loop.run_in_executor(self.executor, self.check_url, u) for u in urls))
+        return dict(zip(urls, results))
+
+    def check(self, urls):
+        """Synchronous entry point (runs its own event loop)"""
+        return asyncio.run(self.check_all(urls))
+
+    def close(self):
+        self.executor.shutdown(wait=True)
+        self.session.close()
+
+# ============================================================================
+# FEED STAGE
+# ============================================================================
+
+
+def check_feed_links(writers, checker, mode='flag', report_file=None):
+    """Check the URLs of written (closed, plain) feed parts before publishing
+
+    mode 'drop' rewrites the parts without items that have a broken URL;
+    'flag' only reports. The report (items with a failing URL) goes to
+    report_file as JSON. Returns the summary dict.
+    """
+    # Only (id, link, image_link) is kept per item, not the descriptions:
+    # memory stays small whatever the catalog size; drops go by id
+    items = [(writer, fields.get('id'), tuple(fields.get(field) for field in LINK_FIELDS))
+             for writer in writers for fields in iter_item_fields(writer.output, ('id',) + LINK_FIELDS)]
+    results = checker.check(url for _, _, urls in items for url in urls)
+
+    failing = []
+    drop = {}
+    for writer, item_id, urls in items:
+        problems = [{'field': field, 'url': url, **{k: results[url].get(k) for k in ('outcome', 'status', 'error')}}
+                    for field, url in zip(LINK_FIELDS, urls)
+                    if url and results[url]['outcome'] != 'ok']
+        if problems:
+            failing.append({'id': item_id, 'problems': problems})
+            if mode == 'drop' and any(p['outcome'] == 'broken' for p in problems):
+                drop.setdefault(id(writer), set()).add(item_id)
+
+    for writer in writers:
+        if id(writer) in drop:
+            filter_feed(writer, drop[id(writer)])
+
+    outcomes = [r['outcome'] for r in results.values()]
+    summary = {
+        'urls': len(results),
+        'broken': outcomes.count('broken'),
+        'unverified': outcomes.count('unverified'),
+        'items_flagged': len(failing),
+        'items_dropped': sum(len(ids) for ids in drop.values()),
+        'mode': mode
+    }
+    if report_file:
+        tmp_path = f"{report_file}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({**summary, 'items': failing}, f, indent=2)
+        os.replace(tmp_path, report_file)
+    return summary
+
+# ============================================================================
+# STAND-IN DEMO
+# ============================================================================
+
+
+def standin_demo(count, slow_delay, per_host=PER_HOST):
+    """Check a mixed set of URLs against link_standin twice (cold, then cached)"""
+    import tempfile
+    from link_standin import LinkStandIn
+
+    standin = LinkStandIn(slow_delay=slow_delay).start()
+    kinds = ['ok', 'ok', 'ok', 'ok', 'missing', 'gone', 'slow', 'nohead', 'botwall', 'denied', 'error', 'redirect']
+    urls = [f"{standin.url}/{kinds[i % len(kinds)]}/{i}.jpg" for i in range(count)]
+    expected = {'ok': 'ok', 'missing': 'broken', 'gone': 'broken', 'slow': 'ok',
+                'nohead': 'ok', 'botwall': 'ok', 'denied': 'unverified', 'error': 'unverified', 'redirect': 'ok'}
+
+    with tempfile.TemporaryDirectory() as tmp:
+        cache = LinkCache(Path(tmp) / 'links.sqlite')
+        print(f"🔗 {count} URLs against {standin.url} (slow responses: {slow_delay}s)")
+        for label in ('cold cache', 'warm cache', 'expired'):
+            if label == 'expired':
+                # Past the TTL: ok URLs are revalidated with If-None-Match (304)
+                cache.ttl = cache.failure_ttl = 0
+            checker = LinkChecker(cache, per_host=per_host)
+            start = time.perf_counter()
+            results = checker.check(urls)
+            elapsed = time.perf_counter() - start
+            checker.close()
+            outcomes = {}
+            for r in results.values():
+                outcomes[r['outcome']] = outcomes.get(r['outcome'], 0) + 1
+            wrong = [u for u, r in results.items() if r['outcome'] != expected[urlsplit(u).path.split('/')[1]]]
+            print(f"   {label:<11} {elapsed:6.2f}s  {checker.counts['requests']:>5} requests "
+                  f"{checker.counts['revalidated']:>5} x 304  "
+                  f"{json.dumps(outcomes, sort_keys=True)}  {'✅' if not wrong else f'❌ {len(wrong)} misclassified'}")
+        print(f"   Serial lower bound: {sum(slow_delay for u in urls if '/slow/' in u):.1f}s of slow responses alone")
+        cache.close()
+    standin.stop()
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Merchant feed link checker')
+    parser.add_argument('--standin', action='store_true', help='Demo against a local mixed 200/404/slow server')
+    parser.add_argument('--urls', type=int, default=500, help='URLs in the demo (default: 500)')
+    parser.add_argument('--slow-delay', type=float, default=1.0, help='Delay of slow responses (default: 1.0s)')
+    parser.add_argument('--per-host', type=int, default=PER_HOST,
+                        help=f'Concurrent requests per host (default: {PER_HOST})')
+    parser.add_argument('url', nargs='*', help='URLs to check')
+    args = parser.parse_args()
+
+    if args.standin:
+        standin_demo(args.urls, args.slow_delay, args.per_host)
+        return
+    if not args.url:
+        parser.error('give URLs to check or --standin')
+
+    import tempfile
+    checker = LinkChecker(LinkCache(Path(tempfile.gettempdir()) / 'merchant-links.sqlite'), per_host=args.per_host)
+    failed = False
+    for url, result in checker.check(args.url).items():
+        icon = {'ok': '✅', 'broken': '❌', 'unverified': '⚠️ '}[result['outcome']]
+        print(f"{icon} {result['status'] or result.get('error')} {url}")
+        failed = failed or result['outcome'] != 'ok'
+    checker.close()
+    checker.cache.close()
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()
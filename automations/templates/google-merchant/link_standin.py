@@ -0,0 +1,120 @@
+#!/usr/bin/env python3
+"""
+Local HTTP stand-in for link validation
+
+Serves product image / landing URLs with mixed outcomes, chosen by the
+first path segment:
+  /ok/...        200 with an ETag (304 on a matching If-None-Match)
+  /missing/...   404
+  /gone/...      410
+  /slow/...      200 after --slow-delay seconds
+  /nohead/...    405 on HEAD, 200 on GET
+  /botwall/...   403 on HEAD, 200 on GET (bot protection on HEAD only)
+  /denied/...    403 (bot protection on every request)
+  /error/...     503
+  /redirect/...  302 to /ok/...
+
+Usage:
+  python link_standin.py --slow-delay 2
+  python link_check.py --standin      # checker demo against it
+"""
+
+import time
+import argparse
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# ============================================================================
+# SERVER
+# ============================================================================
+
+
+class LinkStandIn:
+    """Threaded HTTP server with 200/404/410/slow/405/403/503/302 paths"""
+
+    def __init__(self, slow_delay=1.0):
+        self.slow_delay = slow_delay
+        self.requests = {}
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def reply(self, status, headers=None, body=b''):
+                self.send_response(status)
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                if self.command != 'HEAD':
+                    self.wfile.write(body)
+
+            def handle_any(self):
+                kind = self.path.split('/')[1] if self.path.count('/') > 1 else ''
+                standin.requests[kind] = standin.requests.get(kind, 0) + 1
+                etag = f'"{abs(hash(self.path))}"'
+                if kind == 'slow':
+                    time.sleep(standin.slow_delay)
+                if kind in ('ok', 'slow'):
+                    if self.headers.get('If-None-Match') == etag:
+                        self.reply(304, {'ETag': etag})
+                    else:
+                        self.reply(200, {'ETag': etag, 'Content-Type': 'image/jpeg'}, b'x' * 64)
+                elif kind == 'missing':
+                    self.reply(404)
+                elif kind == 'gone':
+                    self.reply(410)
+                elif kind == 'nohead':
+                    self.reply(405 if self.command == 'HEAD' else 200)
+                elif kind == 'botwall':
+                    self.reply(403 if self.command == 'HEAD' else 200)
+                elif kind == 'denied':
+                    self.reply(403)
+                elif kind == 'error':
+                    self.reply(503)
+                elif kind == 'redirect':
+                    self.reply(302, {'Location': '/ok/' + self.path.split('/', 2)[2]})
+                else:
+                    self.reply(404)
+
+            do_GET = handle_any
+            do_HEAD = handle_any
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local link stand-in (200/404/slow)')
+    parser.add_argument('--slow-delay', type=float, default=1.0)
+    args = parser.parse_args()
+
+    standin = LinkStandIn(args.slow_delay).start()
+    print(f"🔗 Link stand-in on {standin.url} (/ok /missing /gone /slow /nohead /botwall /denied /error /redirect)")
+    try:
+        standin.thread.join()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.stop()
+
+
+if __name__ == '__main__':
+    main()
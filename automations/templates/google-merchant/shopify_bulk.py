@@ -0,0 +1,237 @@
+#!/usr/bin/env python3
+"""
+Shopify GraphQL Bulk Operations ingestion for the Merchant feed
+
+Instead of paging REST products.json 250 products at a time, one
+bulkOperationRunQuery exports products, variants, images and inventory
+server-side. The resulting JSONL file is then streamed line by line and
+regrouped into REST-shaped product dicts, so it plugs directly into
+generate_merchant_center_feed() and the streaming FeedWriter.
+
+Lifecycle:
+  1. bulkOperationRunQuery(query: PRODUCTS_BULK_QUERY) → operation id
+  2. poll currentBulkOperation until COMPLETED (FAILED/CANCELED raise)
+  3. stream the JSONL at operation.url; child lines (variants) carry
+     __parentId and follow their parent product line
+
+Usage:
+    from shopify_bulk import fetch_products_bulk
+    products = fetch_products_bulk(admin_url, token, api_version)
+"""
+
+import json
+import time
+
+from http_session import get_session
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Polling interval bounds (seconds) and overall timeout
+POLL_INTERVAL_MIN = 1.0
+POLL_INTERVAL_MAX = 10.0
+POLL_TIMEOUT = 3600
+
+PRODUCTS_BULK_QUERY = '''
+{
+  products(query: "%(search)s") {
+    edges {
+      node {
+        id
+        title
+        handle
+        status
+        vendor
+        productType
+        descriptionHtml
+        updatedAt
+        featuredImage { url }
+        variants {
+          edges {
+            node {
+              id
+              title
+              price
+              barcode
+              inventoryQuantity
+            }
+          }
+        }
+      }
+    }
+  }
+}
+'''
+
+RUN_MUTATION = '''
+mutation RunBulk($query: String!) {
+  bulkOperationRunQuery(query: $query) {
+    bulkOperation { id status }
+    userErrors { field message }
+  }
+}
+'''
+
+STATUS_QUERY = '''
+{
+  currentBulkOperation {
+    id status errorCode objectCount url partialDataUrl
+  }
+}
+'''
+
+# ============================================================================
+# GRAPHQL
+# ============================================================================
+
+
+def graphql(admin_url, token, api_version, query, variables=None, retry=False):
+    """POST a GraphQL Admin API query and return its data
+
+    retry: resend on timeouts / 5xx (read-only queries); mutations are not
+    resent, a duplicate bulkOperationRunQuery fails with "already in progress"
+    """
+    response = get_session().post(
+        f"{admin_url}/admin/api/{api_version}/graphql.json",
+        headers={'X-Shopify-Access-Token': token},
+        json={'query': query, 'variables': variables or {}},
+        retry=retry
+    )
+    response.raise_for_status()
+    payload = response.json()
+    if payload.get('errors'):
+        raise RuntimeError(f"GraphQL error: {payload['errors']}")
+    return payload['data']
+
+
+def products_bulk_query(search='status:active'):
+    """Bulk products query filtered with a Shopify search expression"""
+    return PRODUCTS_BULK_QUERY % {'search': search.replace('"', '\\"')}
+
+
+def start_bulk_operation(admin_url, token, api_version, query=None):
+    """Start a bulk query and return the operation id"""
+    query = query or products_bulk_query()
+    data = graphql(admin_url, token, api_version, RUN_MUTATION, {'query': query})
+    result = data['bulkOperationRunQuery']
+    if result['userErrors']:
+        messages = '; '.join(e['message'] for e in result['userErrors'])
+        raise RuntimeError(f"Bulk operation refused: {messages}")
+    return result['bulkOperation']['id']
+
+
+def wait_for_bulk_operation(admin_url, token, api_version, operation_id, timeout=POLL_TIMEOUT):
+    """Poll until the bulk operation completes; return its JSONL url (or None if empty)"""
+    interval = POLL_INTERVAL_MIN
+    deadline = time.monotonic() + timeout
+
+    while True:
+        operation = graphql(admin_url, token, api_version, STATUS_QUERY, retry=True)['currentBulkOperation']
+        if not operation or operation['id'] != operation_id:
+            raise RuntimeError(f"Bulk operation {operation_id} is no longer current")
+
+        status = operation['status']
+        if status == 'COMPLETED':
+            print(f"✅ Bulk operation completed: {operation.get('objectCount')} objects")
+            return operation.get('url')
+        if status in ('FAILED', 'CANCELED', 'EXPIRED'):
+            raise RuntimeError(f"Bulk operation {status.lower()}: {operation.get('errorCode')}")
+
+        if time.monotonic() > deadline:
+            raise TimeoutError(f"Bulk operation still {status} after {timeout}s")
+
+        print(f"⏳ Bulk operation {status.lower()} ({operation.get('objectCount') or 0} objects)...")
+        time.sleep(interval)
+        interval = min(POLL_INTERVAL_MAX, interval * 1.5)
+
+# ============================================================================
+# JSONL STREAMING
+# ============================================================================
+
+
+def gid_to_id(gid):
+    """gid://shopify/ProductVariant/123 -> 123"""
+    return int(gid.rsplit('/', 1)[-1])
+
+
+def to_rest_product(node):
+    """Convert a bulk Product line to the REST products.json shape"""
+    image = node.get('featuredImage')
+    return {
+        'id': gid_to_id(node['id']),
+        'title': node.get('title', ''),
+        'handle': node.get('handle', ''),
+        'status': (node.get('status') or '').lower(),
+        'vendor': node.get('vendor'),
+        'product_type': node.get('productType'),
+        'body_html': node.get('descriptionHtml'),
+        'updated_at': node.get('updatedAt'),
+        'image': {'src': image['url']} if image else None,
+        'variants': []
+    }
+
+
+def to_rest_variant(node):
+    """Convert a bulk ProductVariant line to the REST variant shape"""
+    return {
+        'id': gid_to_id(node['id']),
+        'title': node.get('title', ''),
+        'price': node.get('price'),
+        'barcode': node.get('barcode'),
+        'inventory_quantity': node.get('inventoryQuantity')
+    }
+
+
+def iter_bulk_lines(url):
+    """Yield decoded JSONL objects from a bulk result URL or local file"""
+    if url.startswith(('http://', 'https://')):
+        response = get_session().get(url, stream=True)
+        response.raise_for_status()
+        try:
+            for line in response.iter_lines():
+                if line:
+                    yield json.loads(line)
+        finally:
+            response.close()
+    else:
+        with open(url, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def iter_bulk_products(url):
+    """Regroup bulk JSONL lines into REST-shaped products, streaming
+
+    Children follow their parent, so a product is complete (and yielded)
+    as soon as the next product line starts.
+    """
+    current = None
+    current_gid = None
+
+    for obj in iter_bulk_lines(url):
+        parent = obj.get('__parentId')
+        if parent is None:
+            if current is not None:
+                yield current
+            current = to_rest_product(obj)
+            current_gid = obj['id']
+        elif parent == current_gid and '/ProductVariant/' in obj.get('id', ''):
+            current['variants'].append(to_rest_variant(obj))
+
+    if current is not None:
+        yield current
+
+
+def fetch_products_bulk(admin_url, token, api_version, timeout=POLL_TIMEOUT, updated_at_min=None):
+    """Yield all active products (optionally only those updated since a time) through a Bulk Operation"""
+    search = 'status:active'
+    if updated_at_min:
+        search += f" AND updated_at:>'{updated_at_min}'"
+    print("🚀 Starting Shopify bulk operation...")
+    operation_id = start_bulk_operation(admin_url, token, api_version, products_bulk_query(search))
+    url = wait_for_bulk_operation(admin_url, token, api_version, operation_id, timeout)
+    if not url:
+        return
+    yield from iter_bulk_products(url)
@@ -0,0 +1,374 @@
+#!/usr/bin/env python3
+"""
+Local Shopify Admin API stand-in for the Merchant feed scripts
+
+Serves a synthetic catalog on 127.0.0.1 so the feed generator can be
+exercised and timed without a live store:
+  - GET  /admin/api/<v>/products.json  REST paging (limit, page_info, Link,
+                                       updated_at_min, fields, presentment prices)
+  - POST /admin/api/<v>/graphql.json   bulkOperationRunQuery / currentBulkOperation
+  - GET  /bulk/<id>.jsonl              bulk operation result (JSONL)
+
+Latency is simulated, so the REST vs bulk comparison measures the client
+code paths under an assumed server, not Shopify itself:
+  - --page-latency (default 0.25s): sleep before every REST page of up to
+    250 products. REST ingestion costs about products / 250 x page latency.
+  - --bulk-rate (default 20000 objects/s): a bulk operation completes
+    (products + variants) / bulk rate seconds after it starts. The client
+    polls every 1s or more (shopify_bulk.POLL_INTERVAL_MIN), then downloads
+    the JSONL from the stand-in at local speed.
+The speedup printed is therefore set mostly by these two parameters (and
+the poll interval); rerun with latencies measured on a real store before
+quoting it. Rate limits, throttling and network transfer time are not
+simulated.
+
+Usage:
+  # Compare REST paging and bulk ingestion end to end
+  python shopify_standin.py --products 5000 --variants 3
+
+  # Just serve (point SHOPIFY_ADMIN_URL at the printed URL)
+  python shopify_standin.py --serve
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import threading
+from pathlib import Path
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from datetime import datetime
+from urllib.parse import urlsplit, parse_qs, quote
+
+# ============================================================================
+# SYNTHETIC CATALOG
+# ============================================================================
+
+# Presentment prices served with X-Shopify-Api-Features: include-presentment-prices
+PRESENTMENT_RATES = {'CAD': 1.35, 'EUR': 0.92, 'GBP': 0.79}
+
+WORDS = ['winter', 'coat', 'jacket', 'leather', 'bag', 'backpack', 'wool', 'scarf',
+         'electronic', 'charger', 'health', 'serum', 'cotton', 'shirt', 'denim', 'boot']
+
+
+def iter_catalog(products=1000, variants=3, seed=42, body=None, missing_images=0.0):
+    """Yield deterministic REST-shaped products
+
+    variants: count per product, or a (min, max) range
+    body: callable(rng) -> body_html, e.g. long rich text (default: 60 words)
+    missing_images: share of products without an image
+    """
+    rng = random.Random(seed)
+    for p in range(1, products + 1):
+        name = ' '.join(rng.choice(WORDS).title() for _ in range(3))
+        product_id = 1_000_000 + p
+        count = rng.randint(*variants) if isinstance(variants, (tuple, list)) else variants
+        product = {
+            'id': product_id,
+            'title': f'{name} {p}',
+            'handle': f'{name.lower().replace(" ", "-")}-{p}',
+            'status': 'active',
+            'vendor': rng.choice(['Acme', 'Nordic & Co', 'Atlas']),
+            'product_type': rng.choice(['Outerwear', 'Bags', 'Electronics', 'Health']),
+            'body_html': '<p>' + ' '.join(rng.choice(WORDS) for _ in range(60)) + '</p>',
+            'updated_at': '2026-01-01T00:00:00Z',
+            'image': {'src': f'https://cdn.example.com/{product_id}.jpg'},
+            'variants': [{
+                'id': product_id * 100 + v,
+                'title': 'Default Title' if count == 1 else f'Size {v + 1}',
+                'price': f'{rng.randint(10, 300)}.00',
+                'barcode': '',
+                'inventory_quantity': rng.randint(0, 20)
+            } for v in range(count)]
+        }
+        if body:
+            product['body_html'] = body(rng)
+        if missing_images and rng.random() < missing_images:
+            product['image'] = None
+        yield product
+
+
+def make_catalog(products=1000, variants=3, seed=42, **options):
+    """Build a deterministic list of REST-shaped products (see iter_catalog)"""
+    return list(iter_catalog(products, variants, seed, **options))
+
+
+def with_presentment_prices(product):
+    """Copy of a product whose variants carry presentment_prices (USD shop)"""
+    if 'variants' not in product:
+        return product
+    variants = []
+    for variant in product['variants']:
+        prices = [{'price': {'amount': variant['price'], 'currency_code': 'USD'}, 'compare_at_price': None}]
+        prices += [{'price': {'amount': f"{float(variant['price']) * rate:.2f}", 'currency_code': currency},
+                    'compare_at_price': None} for currency, rate in PRESENTMENT_RATES.items()]
+        variants.append({**variant, 'presentment_prices': prices})
+    return {**product, 'variants': variants}
+
+
+def catalog_to_bulk_jsonl(catalog, path):
+    """Write a catalog as a Shopify bulk operation JSONL file; return object count"""
+    count = 0
+    with open(path, 'w', encoding='utf-8') as f:
+        for product in catalog:
+            gid = f"gid://shopify/Product/{product['id']}"
+            f.write(json.dumps({
+                'id': gid,
+                'title': product['title'],
+                'handle': product['handle'],
+                'status': product['status'].upper(),
+                'vendor': product['vendor'],
+                'productType': product['product_type'],
+                'descriptionHtml': product['body_html'],
+                'updatedAt': product['updated_at'],
+                'featuredImage': {'url': product['image']['src']} if product.get('image') else None
+            }) + '\n')
+            count += 1
+            for variant in product['variants']:
+                f.write(json.dumps({
+                    'id': f"gid://shopify/ProductVariant/{variant['id']}",
+                    'title': variant['title'],
+                    'price': variant['price'],
+                    'barcode': variant['barcode'],
+                    'inventoryQuantity': variant['inventory_quantity'],
+                    '__parentId': gid
+                }) + '\n')
+                count += 1
+    return count
+
+# ============================================================================
+# SERVER
+# ============================================================================
+
+
+class ShopifyStandIn:
+    """Threaded HTTP server holding the catalog and bulk operation state"""
+
+    def __init__(self, catalog, page_latency=0.25, bulk_rate=20000):
+        self.catalog = catalog
+        self.page_latency = page_latency
+        self.bulk_rate = bulk_rate
+        self.operation = None
+        self.workdir = tempfile.mkdtemp(prefix='shopify-standin-')
+        self.requests = {'rest': 0, 'graphql': 0, 'bulk_download': 0}
+        self.bytes_sent = 0
+
+        standin = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def log_message(self, *args):
+                pass
+
+            def send_json(self, payload, headers=None):
+                body = json.dumps(payload).encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(body)))
+                for key, value in (headers or {}).items():
+                    self.send_header(key, value)
+                self.end_headers()
+                self.wfile.write(body)
+                standin.bytes_sent += len(body)
+
+            def do_GET(self):
+                parts = urlsplit(self.path)
+                if parts.path.endswith('/products.json'):
+                    standin.requests['rest'] += 1
+                    self.products_page(parts)
+                elif parts.path.startswith('/bulk/'):
+                    standin.requests['bulk_download'] += 1
+                    self.bulk_file(parts.path)
+                else:
+                    self.send_error(404)
+
+            def do_POST(self):
+                standin.requests['graphql'] += 1
+                length = int(self.headers.get('Content-Length', 0))
+                query = json.loads(self.rfile.read(length) or b'{}').get('query', '')
+                if 'bulkOperationRunQuery' in query:
+                    self.send_json({'data': {'bulkOperationRunQuery': standin.start_operation()}})
+                elif 'currentBulkOperation' in query:
+                    self.send_json({'data': {'currentBulkOperation': standin.operation_status(self.base_url())}})
+                else:
+                    self.send_json({'errors': [{'message': 'unsupported query'}]})
+
+            def base_url(self):
+                return f"http://{self.headers.get('Host')}"
+
+            def products_page(self, parts):
+                time.sleep(standin.page_latency)
+                query = parse_qs(parts.query)
+                # Like Shopify, page_info carries the filters of the first request
+                if 'page_info' in query:
+                    query = json.loads(query['page_info'][0])
+                else:
+                    query = {key: values[0] for key, values in query.items()}
+                    query['offset'] = 0
+                limit = min(int(query.get('limit', 50)), 250)
+                offset = query['offset']
+
+                products = standin.catalog
+                if query.get('updated_at_min'):
+                    since = datetime.fromisoformat(query['updated_at_min'].replace('Z', '+00:00'))
+                    products = [p for p in products
+                                if datetime.fromisoformat(p['updated_at'].replace('Z', '+00:00')) >= since]
+                page = products[offset:offset + limit]
+                if query.get('fields'):
+                    fields = query['fields'].split(',')
+                    page = [{f: p[f] for f in fields if f in p} for p in page]
+                if 'include-presentment-prices' in self.headers.get('X-Shopify-Api-Features', ''):
+                    page = [with_presentment_prices(p) for p in page]
+
+                headers = {}
+                if offset + limit < len(products):
+                    page_info = quote(json.dumps({**query, 'offset': offset + limit}))
+                    headers['Link'] = f'<{self.base_url()}{parts.path}?limit={limit}&page_info={page_info}>; rel="next"'
+                self.send_json({'products': page}, headers)
+
+            def bulk_file(self, path):
+                op = standin.operation
+                if not op or not path.endswith(f"{op['key']}.jsonl"):
+                    self.send_error(404)
+                    return
+                size = os.path.getsize(op['file'])
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/jsonl')
+                self.send_header('Content-Length', str(size))
+                self.end_headers()
+                with open(op['file'], 'rb') as f:
+                    while True:
+                        chunk = f.read(1 << 16)
+                        if not chunk:
+                            break
+                        self.wfile.write(chunk)
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_port}"
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+
+    def start_operation(self):
+        """bulkOperationRunQuery: export the catalog, complete after a delay"""
+        if self.operation and self.operation['status'] == 'RUNNING':
+            return {'bulkOperation': None,
+                    'userErrors': [{'field': None, 'message': 'A bulk query operation for this app and shop is already in progress'}]}
+        key = f"op{int(time.time() * 1000)}"
+        path = os.path.join(self.workdir, f'{key}.jsonl')
+        count = catalog_to_bulk_jsonl(self.catalog, path)
+        self.operation = {
+            'id': f'gid://shopify/BulkOperation/{key}',
+            'key': key,
+            'file': path,
+            'count': count,
+            'status': 'RUNNING',
+            'ready_at': time.monotonic() + count / self.bulk_rate
+        }
+        return {'bulkOperation': {'id': self.operation['id'], 'status': 'CREATED'}, 'userErrors': []}
+
+    def operation_status(self, base_url):
+        """currentBulkOperation: RUNNING until ready_at, then COMPLETED with url"""
+        op = self.operation
+        if not op:
+            return None
+        done = time.monotonic() >= op['ready_at']
+        if done:
+            op['status'] = 'COMPLETED'
+        return {
+            'id': op['id'],
+            'status': op['status'],
+            'errorCode': None,
+            'objectCount': str(op['count'] if done else 0),
+            'url': f"{base_url}/bulk/{op['key']}.jsonl" if done else None,
+            'partialDataUrl': None
+        }
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+# ============================================================================
+# COMPARISON
+# ============================================================================
+
+
+def compare(standin, api_version='2024-01'):
+    """Generate the feed via REST paging and via bulk; print the (simulated) speedup"""
+    os.environ.update({
+        'SHOPIFY_STORE_DOMAIN': 'standin.myshopify.com',
+        'SHOPIFY_ACCESS_TOKEN': 'standin-token',
+        'STORE_URL': 'https://standin.example.com',
+        'SHOPIFY_ADMIN_URL': standin.url,
+        'SHOPIFY_API_VERSION': api_version
+    })
+    sys.path.insert(0, str(Path(__file__).resolve().parent))
+    import generate_merchant_center_feed as feed
+    from feed_writer import FeedWriter
+
+    store = feed.store_from_env()
+    store['limiter'].rate = 0  # the stand-in simulates latency, not rate limits
+    market = store['markets'][0]
+    results = {}
+    for mode in ('rest', 'bulk'):
+        products = feed.fetch_store_products(store, bulk=(mode == 'bulk'))
+        output = os.path.join(standin.workdir, f'feed-{mode}.xml')
+        start = time.perf_counter()
+        with FeedWriter(output, 'Stand-in', 'https://standin.example.com', 'Benchmark') as writer:
+            feed.generate_merchant_center_feed(products, writer, market)
+        results[mode] = {'seconds': time.perf_counter() - start, 'items': writer.items}
+
+    print()
+    print(f"⚠️  Simulated latencies: {standin.page_latency}s per REST page, bulk export at "
+          f"{standin.bulk_rate:.0f} objects/s, local downloads, no rate limits")
+    print(f"{'Mode':<6} {'Items':>9} {'Seconds':>9} {'Items/s':>10}")
+    for mode, r in results.items():
+        print(f"{mode:<6} {r['items']:>9} {r['seconds']:>9.2f} {r['items'] / r['seconds']:>10.0f}")
+    print(f"\n🚀 Simulated bulk speedup vs REST paging: {results['rest']['seconds'] / results['bulk']['seconds']:.1f}x "
+          f"({standin.requests['rest']} REST pages, {standin.requests['graphql']} GraphQL calls; "
+          f"depends on --page-latency and --bulk-rate)")
+    return results
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Shopify Admin API stand-in')
+    parser.add_argument('--products', type=int, default=5000)
+    parser.add_argument('--variants', type=int, default=3)
+    parser.add_argument('--page-latency', type=float, default=0.25,
+                        help='Simulated seconds per REST page of 250 products (default: 0.25)')
+    parser.add_argument('--bulk-rate', type=float, default=20000,
+                        help='Simulated bulk export speed, objects per second (default: 20000)')
+    parser.add_argument('--serve', action='store_true', help='Serve until interrupted')
+    args = parser.parse_args()
+
+    catalog = make_catalog(args.products, args.variants)
+    standin = ShopifyStandIn(catalog, args.page_latency, args.bulk_rate).start()
+    print(f"🛍️ Shopify stand-in on {standin.url} "
+          f"({args.products} products x {args.variants} variants)")
+
+    try:
+        if args.serve:
+            print("   SHOPIFY_ADMIN_URL=" + standin.url)
+            standin.thread.join()
+        else:
+            compare(standin)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        standin.stop()
+
+
+if __name__ == '__main__':
+    main()
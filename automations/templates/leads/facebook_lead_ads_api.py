@@ -1,8 +1,9 @@
 #!/usr/bin/env python3
 """
 Facebook Lead Ads API - Daily Automated Pull
-Pulls leads from Facebook Lead Ads forms and exports to CSV
-for import to Google Sheets
+Pulls leads from Facebook Lead Ads forms, appends them to the compressed
+lead backup (lead_backup.py) and writes the latest pull to one CSV
+(facebook-leads-latest.csv, overwritten each run) for import to Google Sheets
 
 Requirements:
   - facebook-business library
@@ -39,6 +40,8 @@ except ImportError:
     print("📦 Install with: pip install facebook-business")
     sys.exit(1)
 
+from lead_backup import write_backup
+
 # Load environment variables
 load_dotenv()
 
@@ -52,8 +55,10 @@ APP_SECRET = os.getenv('FACEBOOK_APP_SECRET')
 APP_ID = os.getenv('FACEBOOK_APP_ID')
 FORM_ID = os.getenv('FACEBOOK_LEAD_FORM_ID')
 
-# Output directory
+# Output directory and import hand-off file (overwritten by every pull;
+# every pull is kept in the partitioned backup)
 OUTPUT_DIR = 'lead-management/imports'
+HANDOFF_FILE = f"{OUTPUT_DIR}/facebook-leads-latest.csv"
 
 # ============================================================================
 # VALIDATION
@@ -172,27 +177,28 @@ def extract_lead_data(leads):
     return structured_leads
 
 def export_to_csv(leads):
-    """Export leads to CSV"""
+    """Back up leads, then write them to the import hand-off CSV"""
     if not leads:
         print("⚠️  No leads to export")
         return None
 
     try:
-        # Create DataFrame
-        df = pd.DataFrame(leads)
-
-        # Generate filename with date
-        date_str = datetime.now().strftime('%Y-%m-%d')
-        filename = f"{OUTPUT_DIR}/facebook-leads-{date_str}.csv"
+        # The compressed, partitioned backup is the archive of every pull
+        if write_backup(leads, source='facebook') is None:
+            print("❌ ERROR: backup failed, hand-off CSV not replaced")
+            return None
 
         # Ensure directory exists
         os.makedirs(OUTPUT_DIR, exist_ok=True)
 
-        # Export to CSV
-        df.to_csv(filename, index=False)
+        # One hand-off file, replaced atomically (no per-run CSV pile-up)
+        df = pd.DataFrame(leads)
+        tmp_file = f"{HANDOFF_FILE}.tmp"
+        df.to_csv(tmp_file, index=False)
+        os.replace(tmp_file, HANDOFF_FILE)
 
-        print(f"✅ Exported {len(leads)} leads to {filename}")
-        return filename
+        print(f"✅ Exported {len(leads)} leads to {HANDOFF_FILE}")
+        return HANDOFF_FILE
 
     except Exception as e:
         print(f"❌ ERROR exporting to CSV: {e}")
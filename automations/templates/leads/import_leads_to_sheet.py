@@ -13,12 +13,18 @@ Requirements:
 Install: pip install -r requirements.txt
 
 Usage:
-  python import_leads_to_sheet.py <file_path> [source_name]
+  python import_leads_to_sheet.py <file_path> [source_name] [--upsert]
 
 Examples:
   python import_leads_to_sheet.py imports/leads.csv "Trade Show 2025"
   python import_leads_to_sheet.py imports/partners.xlsx "Partner ABC"
   python import_leads_to_sheet.py imports/data.json "External Source"
+  python import_leads_to_sheet.py imports/leads.csv "Trade Show 2025" --upsert
+
+Options:
+  --upsert  Update rows whose lead_id is already in RAW LEADS instead of
+            appending duplicates (see sheets_upsert.py). Files without a
+            lead id column get IMPORT_<hash of source, email, phone> ids
 
 Date: 2025-11-25
 """
@@ -26,6 +32,7 @@ Date: 2025-11-25
 import os
 import sys
 import json
+import hashlib
 import pandas as pd
 from datetime import datetime
 from dotenv import load_dotenv
@@ -38,6 +45,8 @@ except ImportError:
     print("📦 Install with: pip install google-api-python-client google-auth")
     sys.exit(1)
 
+from sheets_upsert import upsert_rows
+
 # Load environment variables
 load_dotenv()
 
@@ -57,7 +66,8 @@ FIELD_MAPPINGS = {
     'city': ['city', 'ville', 'location', 'locality'],
     'country': ['country', 'pays', 'nation'],
     'interest': ['interest', 'product_interest', 'interest_product', 'interet', 'intérêt'],
-    'budget': ['budget', 'budget_range', 'price_range']
+    'budget': ['budget', 'budget_range', 'price_range'],
+    'lead_id': ['lead_id', 'leadid', 'lead id']
 }
 
 # ============================================================================
@@ -76,6 +86,15 @@ def find_field_value(row, field_name):
 
     return ''
 
+def import_lead_id(source_name, email, phone):
+    """Stable id of a lead without a source id: same lead + source, same id
+
+    Lets --upsert update a re-imported lead instead of colliding with the
+    leads of another file imported the same day.
+    """
+    key = '|'.join(str(value).strip().lower() for value in (source_name or 'Manual Import', email, phone))
+    return f"IMPORT_{hashlib.sha1(key.encode('utf-8')).hexdigest()[:16]}"
+
 def validate_email(email):
     """Basic email validation"""
     if not email or '@' not in str(email):
@@ -128,9 +147,15 @@ def structure_leads(df, source_name):
                 skipped_count += 1
                 continue
 
+            # Keep the source lead id when present so --upsert can match it
+            lead_id = find_field_value(row, 'lead_id')
+            if pd.isna(lead_id) or lead_id == '':
+                phone = find_field_value(row, 'phone')
+                lead_id = import_lead_id(source_name, email, '' if pd.isna(phone) else phone)
+
             # Build structured lead
             lead = {
-                'lead_id': f'IMPORT_{datetime.now().strftime("%Y%m%d")}_{idx+1}',
+                'lead_id': str(lead_id),
                 'created_time': datetime.now().isoformat(),
                 'source': source_name or 'Manual Import',
                 'campaign_name': '',
@@ -173,8 +198,8 @@ def get_sheets_client():
         print(f"❌ ERROR initializing Google Sheets client: {e}")
         return None
 
-def append_to_sheet(leads):
-    """Append leads to Google Sheets RAW LEADS tab"""
+def append_to_sheet(leads, upsert=False):
+    """Append (or upsert by lead_id) leads to Google Sheets RAW LEADS tab"""
     if not leads:
         print("⚠️  No leads to append")
         return False
@@ -209,6 +234,10 @@ def append_to_sheet(leads):
             ]
             rows.append(row)
 
+        # Upsert mode: update existing lead rows, append only new ones
+        if upsert:
+            return upsert_rows(sheets, GOOGLE_SHEETS_ID, rows)
+
         # Append to RAW LEADS tab
         range_name = 'RAW LEADS!A:R'
         body = {
@@ -245,19 +274,21 @@ def main():
     print()
 
     # Validate arguments
-    if len(sys.argv) < 2:
+    upsert = '--upsert' in sys.argv
+    args = [arg for arg in sys.argv[1:] if arg != '--upsert']
+    if len(args) < 1:
         print("❌ ERROR: Missing file path argument")
         print()
         print("Usage:")
-        print("  python import_leads_to_sheet.py <file_path> [source_name]")
+        print("  python import_leads_to_sheet.py <file_path> [source_name] [--upsert]")
         print()
         print("Examples:")
         print("  python import_leads_to_sheet.py imports/leads.csv \"Trade Show 2025\"")
         print("  python import_leads_to_sheet.py imports/partners.xlsx \"Partner ABC\"")
         sys.exit(1)
 
-    file_path = sys.argv[1]
-    source_name = sys.argv[2] if len(sys.argv) > 2 else 'Manual Import'
+    file_path = args[0]
+    source_name = args[1] if len(args) > 1 else 'Manual Import'
 
     # Validate file exists
     if not os.path.exists(file_path):
@@ -287,7 +318,7 @@ def main():
 
     # Append to Google Sheets
     print("📤 Uploading to Google Sheets...")
-    success = append_to_sheet(leads)
+    success = append_to_sheet(leads, upsert=upsert)
     print()
 
     if success:
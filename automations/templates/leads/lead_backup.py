@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Lead Backups - Append-only, compressed, partitioned
+Shared backup writer for the lead sync scripts (Typeform, Facebook Lead Ads)
+
+Layout (under lead-management/imports/backups):
+  source=typeform/date=2025-11-25.csv.gz
+  source=facebook/date=2025-11-25.csv.gz
+  manifest.json
+
+  - Leads are partitioned by source and by the UTC date of created_time
+  - Every run appends a new compressed member/frame to the partition, so a
+    second run on the same day never overwrites the first one
+  - manifest.json records, per partition, the columns, row count, number of
+    appends, size and created_time range, so restores and audits only open
+    the partitions they need
+  - Leads with fields the partition has no column for (new form questions)
+    make it rewrite once with the extended header; no field is dropped
+
+Compression: gzip (default) or zstd (pip install zstandard), chosen with
+LEAD_BACKUP_COMPRESSION. Both formats are readable with zcat / zstdcat.
+
+Usage:
+  python lead_backup.py                         # list partitions
+  python lead_backup.py --source typeform --since 2025-11-01 --until 2025-11-30
+
+Date: 2025-11-25
+"""
+
+import io
+import os
+import re
+import csv
+import sys
+import gzip
+import json
+import argparse
+import threading
+from datetime import datetime, timezone
+
+try:
+    import fcntl
+except ImportError:  # Windows: in-process locking only
+    fcntl = None
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+BACKUP_DIR = os.getenv('LEAD_BACKUP_DIR', 'lead-management/imports/backups')
+COMPRESSION = os.getenv('LEAD_BACKUP_COMPRESSION', 'gzip')
+
+EXTENSIONS = {
+    'gzip': '.csv.gz',
+    'zstd': '.csv.zst'
+}
+
+MANIFEST_FILE = 'manifest.json'
+
+_lock = threading.Lock()
+
+# ============================================================================
+# HELPERS
+# ============================================================================
+
+def slugify(value):
+    """Filesystem-safe partition name"""
+    return re.sub(r'[^a-z0-9]+', '-', str(value).lower()).strip('-') or 'unknown'
+
+def partition_date(created_time):
+    """UTC date (YYYY-MM-DD) of a lead created_time, today if unparsable"""
+    try:
+        value = str(created_time).replace('Z', '+00:00')
+        # Facebook sends +0000 without a colon
+        value = re.sub(r'([+-]\d{2})(\d{2})$', r'\1:\2', value)
+        dt = datetime.fromisoformat(value)
+        if dt.tzinfo:
+            dt = dt.astimezone(timezone.utc)
+        return dt.strftime('%Y-%m-%d')
+    except (TypeError, ValueError):
+        return datetime.now(timezone.utc).strftime('%Y-%m-%d')
+
+def resolve_compression(compression):
+    """Return the usable compression, falling back to gzip without zstandard"""
+    compression = compression or COMPRESSION
+    if compression == 'zstd' and zstandard is None:
+        print("⚠️  zstandard not installed, using gzip (pip install zstandard)")
+        return 'gzip'
+    if compression not in EXTENSIONS:
+        print(f"⚠️  Unknown compression '{compression}', using gzip")
+        return 'gzip'
+    return compression
+
+def compress(data, compression):
+    """Compress one appended chunk as a standalone gzip member / zstd frame"""
+    if compression == 'zstd':
+        return zstandard.ZstdCompressor(level=10).compress(data)
+    return gzip.compress(data, compresslevel=6)
+
+def columns_of(rows, columns=None):
+    """Columns of rows in first-seen order, after the given existing columns"""
+    columns = list(columns or [])
+    seen = set(columns)
+    for row in rows:
+        for key in row:
+            if key not in seen:
+                seen.add(key)
+                columns.append(key)
+    return columns
+
+def decompress(data, compression):
+    """Decompress a whole partition (all members/frames)"""
+    if compression == 'zstd':
+        reader = zstandard.ZstdDecompressor().stream_reader(io.BytesIO(data), read_across_frames=True)
+        return reader.read()
+    return gzip.decompress(data)
+
+class _ManifestLock:
+    """Thread + process lock around a backup directory"""
+
+    def __init__(self, backup_dir):
+        self.path = os.path.join(backup_dir, '.lock')
+
+    def __enter__(self):
+        _lock.acquire()
+        self.handle = open(self.path, 'a')
+        if fcntl:
+            fcntl.flock(self.handle, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if fcntl:
+            fcntl.flock(self.handle, fcntl.LOCK_UN)
+        self.handle.close()
+        _lock.release()
+
+# ============================================================================
+# MANIFEST
+# ============================================================================
+
+def load_manifest(backup_dir=None):
+    """Load the backup manifest ({'partitions': {key: record}})"""
+    path = os.path.join(backup_dir or BACKUP_DIR, MANIFEST_FILE)
+    if not os.path.exists(path):
+        return {'partitions': {}}
+    with open(path, 'r') as f:
+        return json.load(f)
+
+def save_manifest(manifest, backup_dir):
+    """Atomically write the backup manifest"""
+    path = os.path.join(backup_dir, MANIFEST_FILE)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp_path, path)
+
+# ============================================================================
+# WRITE / READ
+# ============================================================================
+
+def write_backup(leads, source, backup_dir=None, compression=None):
+    """Append leads to their source/date partitions
+
+    Returns the list of partition files written, or None on error.
+    """
+    if not leads:
+        return []
+
+    backup_dir = backup_dir or BACKUP_DIR
+    compression = resolve_compression(compression)
+    source = slugify(source)
+
+    # Group leads by partition date
+    by_date = {}
+    for lead in leads:
+        by_date.setdefault(partition_date(lead.get('created_time')), []).append(lead)
+
+    try:
+        os.makedirs(backup_dir, exist_ok=True)
+        written = []
+
+        with _ManifestLock(backup_dir):
+            manifest = load_manifest(backup_dir)
+
+            for date, rows in sorted(by_date.items()):
+                key = f"source={source}/date={date}"
+                record = manifest['partitions'].get(key)
+                # A partition keeps the compression it was created with
+                part_compression = record['compression'] if record else compression
+                path = os.path.join(backup_dir, key + EXTENSIONS[part_compression])
+                columns = columns_of(rows, record['columns'] if record else None)
+                # New fields: rewrite the partition once under the extended header
+                rewrite = bool(record) and columns != record['columns']
+
+                buffer = io.StringIO()
+                writer = csv.DictWriter(buffer, fieldnames=columns)
+                if not record or rewrite:
+                    writer.writeheader()
+                if rewrite:
+                    with open(path, 'rb') as f:
+                        text = decompress(f.read(), part_compression).decode('utf-8')
+                    writer.writerows(csv.DictReader(io.StringIO(text)))
+                writer.writerows(rows)
+
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                data = compress(buffer.getvalue().encode('utf-8'), part_compression)
+                if rewrite:
+                    tmp_path = f"{path}.tmp"
+                    with open(tmp_path, 'wb') as f:
+                        f.write(data)
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, path)
+                    print(f"💾 Backup {key}: new column(s) {', '.join(columns[len(record['columns']):])}, "
+                          f"partition rewritten")
+                else:
+                    with open(path, 'ab') as f:
+                        f.write(data)
+                        f.flush()
+                        os.fsync(f.fileno())
+
+                times = sorted(str(r.get('created_time', '')) for r in rows if r.get('created_time'))
+                record = record or {
+                    'path': os.path.relpath(path, backup_dir),
+                    'source': source,
+                    'date': date,
+                    'compression': part_compression,
+                    'columns': columns,
+                    'rows': 0,
+                    'appends': 0,
+                    'min_time': None,
+                    'max_time': None
+                }
+                record['columns'] = columns
+                record['rows'] += len(rows)
+                record['appends'] += 1
+                if times:
+                    record['min_time'] = min(filter(None, [record['min_time'], times[0]]))
+                    record['max_time'] = max(filter(None, [record['max_time'], times[-1]]))
+                record['bytes'] = os.path.getsize(path)
+                record['updated_at'] = datetime.now(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
+                manifest['partitions'][key] = record
+                written.append(path)
+
+            save_manifest(manifest, backup_dir)
+
+        print(f"💾 Backup appended: {len(leads)} leads → {len(written)} partition(s) ({source}, {compression})")
+        return written
+
+    except Exception as e:
+        print(f"⚠️  Error writing lead backup: {e}")
+        return None
+
+def select_partitions(manifest, source=None, since=None, until=None):
+    """Manifest records matching a source and an inclusive YYYY-MM-DD range"""
+    records = []
+    for record in manifest['partitions'].values():
+        if source and record['source'] != slugify(source):
+            continue
+        if since and record['date'] < since:
+            continue
+        if until and record['date'] > until:
+            continue
+        records.append(record)
+    return sorted(records, key=lambda r: (r['source'], r['date']))
+
+def read_backup(source=None, since=None, until=None, backup_dir=None):
+    """Yield lead dicts from the partitions matching source/date range"""
+    backup_dir = backup_dir or BACKUP_DIR
+    for record in select_partitions(load_manifest(backup_dir), source, since, until):
+        with open(os.path.join(backup_dir, record['path']), 'rb') as f:
+            text = decompress(f.read(), record['compression']).decode('utf-8')
+        yield from csv.DictReader(io.StringIO(text))
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def main():
+    """List backup partitions matching the filters"""
+    parser = argparse.ArgumentParser(description='List lead backup partitions')
+    parser.add_argument('--source', help='Source partition (e.g. typeform, facebook)')
+    parser.add_argument('--since', help='First date (YYYY-MM-DD)')
+    parser.add_argument('--until', help='Last date (YYYY-MM-DD)')
+    parser.add_argument('--dir', default=BACKUP_DIR, help=f'Backup directory (default: {BACKUP_DIR})')
+    args = parser.parse_args()
+
+    records = select_partitions(load_manifest(args.dir), args.source, args.since, args.until)
+    if not records:
+        print("⚠️  No matching partitions")
+        sys.exit(0)
+
+    print(f"{'Partition':<45} {'Rows':>7} {'Appends':>8} {'Size':>10}  Time range")
+    for r in records:
+        print(f"{r['path']:<45} {r['rows']:>7} {r['appends']:>8} {r['bytes']:>10,}  "
+              f"{r['min_time'] or '-'} → {r['max_time'] or '-'}")
+    print(f"\n📊 {sum(r['rows'] for r in records)} leads in {len(records)} partitions")
+
+if __name__ == "__main__":
+    main()
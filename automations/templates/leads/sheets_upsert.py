@@ -0,0 +1,207 @@
+#!/usr/bin/env python3
+"""
+RAW LEADS upsert by lead_id
+Keeps Google Sheets at one row per lead instead of appending duplicates
+
+Shared by sync_typeform_to_sheet.py and import_leads_to_sheet.py (--upsert).
+
+How it works:
+  - A lead_id -> row number index of the RAW LEADS tab is cached on disk
+  - Each run only reads the id column below the last indexed row
+  - Existing leads are rewritten (lead columns A:L only, so Status, Notes,
+    Assigned To... edited by the team are preserved) in one values.batchUpdate
+  - New leads are appended, and their rows added to the index
+
+If rows were deleted or re-sorted in the sheet, the index is detected as
+stale and rebuilt from column A. Detection costs no full read: the
+incremental read starts on the last indexed row (which must still hold
+the same id), and a sample of the rows about to be rewritten is checked
+in one batchGet. A re-sort that moves none of the sampled rows can go
+unnoticed: after sorting the tab by hand, delete the index file in
+lead-management/state/ to force a rebuild.
+
+Date: 2025-11-25
+"""
+
+import os
+import re
+import json
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+SHEET_NAME = 'RAW LEADS'
+
+# Columns A:L hold lead data; M:R are maintained by the team in the sheet
+LEAD_COLUMNS = 12
+LEAD_RANGE_END = 'L'
+
+# Row 1 holds the column titles ("Lead ID", ...)
+HEADER_ROWS = 1
+
+# Indexed rows checked before rewriting existing leads (one batchGet)
+INDEX_SAMPLE = 20
+
+# Index cache location
+STATE_DIR = 'lead-management/state'
+
+# ============================================================================
+# ROW INDEX
+# ============================================================================
+
+def index_path(spreadsheet_id):
+    """Path of the cached row index for a spreadsheet"""
+    return os.path.join(STATE_DIR, f"raw-leads-index-{spreadsheet_id}.json")
+
+def load_index(spreadsheet_id):
+    """Load the cached index: {'rows': {lead_id: row}, 'scanned_rows': n, 'last_id': id of that row}"""
+    path = index_path(spreadsheet_id)
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except Exception as e:
+            print(f"⚠️  Ignoring unreadable row index {path}: {e}")
+    return {'rows': {}, 'scanned_rows': 0}
+
+def save_index(spreadsheet_id, index):
+    """Atomically persist the row index"""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    path = index_path(spreadsheet_id)
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(index, f)
+    os.replace(tmp_path, path)
+
+def refresh_index(sheets, spreadsheet_id, index):
+    """Index the id cells added below the last scanned row
+
+    The read starts on the last scanned row: when it no longer holds the
+    id it had, rows were inserted or deleted above it and index['stale']
+    is set.
+    """
+    overlap = 1 if index['scanned_rows'] else 0
+    start = index['scanned_rows'] + 1 - overlap
+    result = sheets.values().get(
+        spreadsheetId=spreadsheet_id,
+        range=f"{SHEET_NAME}!A{start}:A"
+    ).execute()
+
+    values = result.get('values', [])
+    if overlap:
+        cells = values[0] if values else []
+        if (str(cells[0]) if cells else '') != index.get('last_id'):
+            index['stale'] = True
+            return index
+        values, start = values[1:], start + 1
+
+    for offset, cells in enumerate(values):
+        if start + offset > HEADER_ROWS and cells and cells[0]:
+            index['rows'][str(cells[0])] = start + offset
+    index['scanned_rows'] += len(values)
+    if values:
+        index['last_id'] = str(values[-1][0]) if values[-1] else ''
+        print(f"🔎 Indexed {len(values)} new sheet rows ({len(index['rows'])} leads)")
+    return index
+
+def rebuild_index(sheets, spreadsheet_id):
+    """Rebuild the whole index from column A"""
+    print("🔎 Row index stale, rebuilding from column A...")
+    return refresh_index(sheets, spreadsheet_id, {'rows': {}, 'scanned_rows': 0})
+
+def index_is_valid(sheets, spreadsheet_id, index, lead_ids):
+    """Check that the indexed rows still hold the expected lead ids
+
+    False when refresh_index() found the sheet shifted; otherwise reads
+    up to INDEX_SAMPLE of the rows of lead_ids (spread from first to last
+    row) in one batchGet, instead of the whole column.
+    """
+    if index.get('stale'):
+        return False
+    if not lead_ids:
+        return True
+
+    ordered = sorted(lead_ids, key=lambda lead_id: index['rows'][lead_id])
+    step = max(1, (len(ordered) - 1) / max(1, INDEX_SAMPLE - 1))
+    sample = list(dict.fromkeys(ordered[min(len(ordered) - 1, round(i * step))]
+                                for i in range(min(len(ordered), INDEX_SAMPLE))))
+    result = sheets.values().batchGet(
+        spreadsheetId=spreadsheet_id,
+        ranges=[f"{SHEET_NAME}!A{index['rows'][lead_id]}" for lead_id in sample]
+    ).execute()
+
+    for lead_id, value_range in zip(sample, result.get('valueRanges', [])):
+        cells = value_range.get('values', [[]])[0]
+        if not cells or str(cells[0]) != lead_id:
+            return False
+    return True
+
+# ============================================================================
+# UPSERT
+# ============================================================================
+
+def appended_start_row(updated_range):
+    """First row number of an append result range (e.g. 'RAW LEADS'!A120:R125)"""
+    match = re.search(r'!\$?[A-Z]+\$?(\d+)', updated_range or '')
+    return int(match.group(1)) if match else None
+
+def upsert_rows(sheets, spreadsheet_id, rows):
+    """Update rows whose lead_id (column A) exists, append the others
+
+    Returns True on success, False otherwise.
+    """
+    try:
+        # Last occurrence of a lead in the batch wins
+        rows_by_id = {}
+        for row in rows:
+            rows_by_id[str(row[0])] = row
+
+        index = refresh_index(sheets, spreadsheet_id, load_index(spreadsheet_id))
+        existing = [lead_id for lead_id in rows_by_id if lead_id in index['rows']]
+        if not index_is_valid(sheets, spreadsheet_id, index, existing):
+            index = rebuild_index(sheets, spreadsheet_id)
+            existing = [lead_id for lead_id in rows_by_id if lead_id in index['rows']]
+
+        new_ids = [lead_id for lead_id in rows_by_id if lead_id not in index['rows']]
+
+        # Update existing leads in a single batch request
+        if existing:
+            data = []
+            for lead_id in existing:
+                row_number = index['rows'][lead_id]
+                data.append({
+                    'range': f"{SHEET_NAME}!A{row_number}:{LEAD_RANGE_END}{row_number}",
+                    'values': [rows_by_id[lead_id][:LEAD_COLUMNS]]
+                })
+            result = sheets.values().batchUpdate(
+                spreadsheetId=spreadsheet_id,
+                body={'valueInputOption': 'USER_ENTERED', 'data': data}
+            ).execute()
+            print(f"✅ Updated {result.get('totalUpdatedRows', len(existing))} existing leads")
+
+        # Append new leads
+        if new_ids:
+            result = sheets.values().append(
+                spreadsheetId=spreadsheet_id,
+                range=f"{SHEET_NAME}!A:R",
+                valueInputOption='USER_ENTERED',
+                insertDataOption='INSERT_ROWS',
+                body={'values': [rows_by_id[lead_id] for lead_id in new_ids]}
+            ).execute()
+
+            updates = result.get('updates', {})
+            start = appended_start_row(updates.get('updatedRange'))
+            if start and index['scanned_rows'] == start - 1:
+                for offset, lead_id in enumerate(new_ids):
+                    index['rows'][lead_id] = start + offset
+                index['scanned_rows'] = start - 1 + len(new_ids)
+                index['last_id'] = new_ids[-1]
+            print(f"✅ Appended {updates.get('updatedRows', 0)} new leads")
+
+        save_index(spreadsheet_id, index)
+        return True
+
+    except Exception as e:
+        print(f"❌ ERROR upserting to Google Sheets: {e}")
+        return False
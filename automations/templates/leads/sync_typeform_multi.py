@@ -0,0 +1,254 @@
+#!/usr/bin/env python3
+"""
+Typeform → Google Sheets - Multi-Form Sync Engine
+Syncs every client contest/form listed in a config file concurrently
+
+Each form runs the same pipeline as sync_typeform_to_sheet.py (incremental
+cursor, form-definition mapping, append or upsert, CSV backup), but all
+forms run at once with asyncio:
+  - per-API concurrency limits (Typeform, Google Sheets)
+  - writes to the same spreadsheet are serialized (shared row index)
+  - a failing form is reported and does not stop the others
+  - a timing summary shows per-form and total wall-clock time
+
+A full agency sync takes about as long as the slowest form.
+
+Usage:
+  python sync_typeform_multi.py typeform-sync.json
+  python sync_typeform_multi.py typeform-sync.json --only winter-contest
+
+Config (JSON, see typeform-sync.example.json):
+  {
+    "concurrency": {"typeform": 4, "sheets": 2},
+    "forms": [
+      {
+        "name": "winter-contest",
+        "form_id": "abc123",
+        "sheet_id": "1AbC...",
+        "campaign_name": "Winter Coat Giveaway Nov 2025",
+        "source": "Contest - Typeform",
+        "ad_name": "Organic Entry",
+        "country": "Canada",
+        "upsert": false
+      }
+    ]
+  }
+
+Environment Variables (in .env):
+  - TYPEFORM_API_TOKEN
+  - GOOGLE_SERVICE_ACCOUNT_FILE
+
+Date: 2025-11-25
+"""
+
+import sys
+import json
+import time
+import asyncio
+import argparse
+from datetime import datetime, timedelta, timezone
+
+import sync_typeform_to_sheet as typeform_sync
+
+# ============================================================================
+# CONFIGURATION
+# ============================================================================
+
+# Default concurrent calls per API (keep Typeform and Google Sheets
+# well under their per-account rate limits)
+DEFAULT_CONCURRENCY = {
+    'typeform': 4,
+    'sheets': 2
+}
+
+# Per-form keys copied into the lead attribution
+CAMPAIGN_KEYS = ('source', 'campaign_name', 'ad_name', 'country')
+
+# ============================================================================
+# CONFIG LOADING
+# ============================================================================
+
+def load_config(path):
+    """Load and validate the multi-form config file"""
+    try:
+        with open(path, 'r') as f:
+            config = json.load(f)
+    except Exception as e:
+        print(f"❌ ERROR reading config {path}: {e}")
+        sys.exit(1)
+
+    forms = config.get('forms', [])
+    errors = []
+    for i, form in enumerate(forms):
+        for key in ('form_id', 'sheet_id'):
+            if not form.get(key):
+                errors.append(f"forms[{i}] missing '{key}'")
+        form.setdefault('name', form.get('form_id', f'form-{i}'))
+
+    if not forms:
+        errors.append("no forms configured")
+    if not typeform_sync.TYPEFORM_API_TOKEN:
+        errors.append("TYPEFORM_API_TOKEN not set")
+
+    if errors:
+        print("❌ ERROR: Invalid configuration:")
+        for error in errors:
+            print(f"   - {error}")
+        sys.exit(1)
+
+    config['concurrency'] = {**DEFAULT_CONCURRENCY, **config.get('concurrency', {})}
+    print(f"✅ Configuration validated ({len(forms)} forms)")
+    return config
+
+# ============================================================================
+# ENGINE
+# ============================================================================
+
+class SyncEngine:
+    """Runs the per-form pipelines concurrently under per-API limits"""
+
+    def __init__(self, config, since_hours=24):
+        self.config = config
+        self.since_hours = since_hours
+        self.typeform_limit = asyncio.Semaphore(config['concurrency']['typeform'])
+        self.sheets_limit = asyncio.Semaphore(config['concurrency']['sheets'])
+        self.sheet_locks = {}
+
+    def sheet_lock(self, sheet_id):
+        """Lock serializing writes (and row index updates) per spreadsheet"""
+        return self.sheet_locks.setdefault(sheet_id, asyncio.Lock())
+
+    async def sync_form(self, form):
+        """Sync one form; never raises, returns a result dict"""
+        name = form['name']
+        form_id = form['form_id']
+        result = {'name': name, 'status': 'ok', 'responses': 0,
+                  'fetch_s': 0.0, 'sheets_s': 0.0, 'total_s': 0.0, 'error': None}
+        start = time.perf_counter()
+
+        try:
+            cursor = typeform_sync.load_cursor(form_id)
+            if cursor:
+                since = cursor['submitted_at'] - timedelta(seconds=1)
+            else:
+                since = datetime.now(timezone.utc) - timedelta(hours=self.since_hours)
+
+            # Typeform: responses + form definition
+            async with self.typeform_limit:
+                fetch_start = time.perf_counter()
+                responses = await asyncio.to_thread(
+                    typeform_sync.get_typeform_responses, since, None, form_id)
+                if responses is None:
+                    raise RuntimeError("Typeform fetch failed")
+                responses = typeform_sync.filter_new_responses(responses, cursor)
+                definition = None
+                if responses:
+                    definition = await asyncio.to_thread(typeform_sync.get_form_definition, form_id)
+                result['fetch_s'] = time.perf_counter() - fetch_start
+
+            if not responses:
+                result['status'] = 'no new responses'
+                return result
+
+            campaign = {key: form[key] for key in CAMPAIGN_KEYS if key in form}
+            structured, failed_tokens = typeform_sync.extract_response_data(responses, definition, campaign)
+            responses, structured = typeform_sync.hold_back_failed(responses, structured, failed_tokens)
+            result['responses'] = len(structured)
+            if not structured:
+                raise RuntimeError(f"{len(failed_tokens)} response(s) could not be processed")
+
+            # Google Sheets: one writer per spreadsheet
+            async with self.sheets_limit, self.sheet_lock(form['sheet_id']):
+                sheets_start = time.perf_counter()
+                success = await asyncio.to_thread(
+                    typeform_sync.append_to_sheet, structured, form.get('upsert', False), form['sheet_id'])
+                result['sheets_s'] = time.perf_counter() - sheets_start
+            if not success:
+                raise RuntimeError("Google Sheets write failed")
+
+            # Only move the cursor once the rows are safely in the sheet
+            typeform_sync.commit_cursor(form_id, typeform_sync.advance_cursor(cursor, responses))
+            await asyncio.to_thread(typeform_sync.export_to_csv_backup, structured, f"typeform-{name}")
+            if failed_tokens:
+                raise RuntimeError(f"{len(failed_tokens)} response(s) could not be processed, "
+                                   f"cursor held before {failed_tokens[0]}")
+
+        except Exception as e:
+            result['status'] = 'failed'
+            result['error'] = str(e)
+            print(f"❌ [{name}] {e}")
+
+        finally:
+            result['total_s'] = time.perf_counter() - start
+
+        return result
+
+    async def run(self, forms):
+        """Sync all forms concurrently"""
+        return await asyncio.gather(*(self.sync_form(form) for form in forms))
+
+# ============================================================================
+# REPORT
+# ============================================================================
+
+def print_summary(results, wall_time):
+    """Print the per-form timing summary"""
+    print("═══════════════════════════════════════")
+    print("⏱️  SYNC SUMMARY")
+    print("═══════════════════════════════════════")
+    print(f"{'Form':<28} {'Status':<18} {'Rows':>5} {'Fetch':>7} {'Sheets':>7} {'Total':>7}")
+    for r in sorted(results, key=lambda r: r['total_s'], reverse=True):
+        print(f"{r['name'][:28]:<28} {r['status']:<18} {r['responses']:>5} "
+              f"{r['fetch_s']:>6.1f}s {r['sheets_s']:>6.1f}s {r['total_s']:>6.1f}s")
+        if r['error']:
+            print(f"   └─ {r['error']}")
+
+    serial_time = sum(r['total_s'] for r in results)
+    slowest = max((r['total_s'] for r in results), default=0.0)
+    print()
+    print(f"📊 Rows synced: {sum(r['responses'] for r in results)}")
+    print(f"⏱️  Wall time: {wall_time:.1f}s (slowest form {slowest:.1f}s, serial sum {serial_time:.1f}s)")
+    typeform_sync.get_session().print_stats()
+
+# ============================================================================
+# MAIN
+# ============================================================================
+
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Sync many Typeform forms to Google Sheets concurrently')
+    parser.add_argument('config', help='JSON config listing form → sheet/campaign mappings')
+    parser.add_argument('--only', action='append', metavar='NAME',
+                        help='Sync only the named form (repeatable)')
+    parser.add_argument('--since-hours', type=int, default=24,
+                        help='Window used for forms without a cursor yet (default: 24)')
+    return parser.parse_args()
+
+def main():
+    """Main execution"""
+    args = parse_args()
+
+    print("═══════════════════════════════════════")
+    print("📝 TYPEFORM → GOOGLE SHEETS MULTI-FORM SYNC")
+    print("═══════════════════════════════════════")
+    print()
+
+    config = load_config(args.config)
+    forms = config['forms']
+    if args.only:
+        forms = [form for form in forms if form['name'] in args.only]
+    print(f"🚀 Syncing {len(forms)} forms "
+          f"(Typeform x{config['concurrency']['typeform']}, Sheets x{config['concurrency']['sheets']})")
+    print()
+
+    engine = SyncEngine(config, since_hours=args.since_hours)
+    start = time.perf_counter()
+    results = asyncio.run(engine.run(forms))
+    print()
+    print_summary(results, time.perf_counter() - start)
+
+    if any(r['status'] == 'failed' for r in results):
+        sys.exit(1)
+
+if __name__ == "__main__":
+    main()
@@ -6,13 +6,28 @@ Pulls responses from Typeform contest/giveaway form and syncs to Google Sheets
 Requirements:
   - typeform (pip install typeform)
   - python-dotenv
-  - pandas
   - google-api-python-client
 
 Install: pip install -r requirements.txt
 
 Usage:
   python sync_typeform_to_sheet.py
+  python sync_typeform_to_sheet.py --backfill 2025-11-01 2025-11-15
+  python sync_typeform_to_sheet.py --upsert   # one row per lead_id
+
+Incremental sync:
+  Each run only transfers responses submitted after the per-form cursor
+  stored in lead-management/state/. The cursor is committed only after the
+  Google Sheets append succeeds, so a failed run is retried next time.
+  The first run (no cursor yet) falls back to the last --since-hours.
+
+Field mapping:
+  The form definition is cached next to the cursor and revalidated with its
+  ETag. Sheet columns are matched from field types (email, phone_number)
+  first, then exact field refs, then whole words of the titles of fields of
+  a compatible type, so any form can be synced without renaming its fields.
+  When several fields match a column, the strongest match wins, then the
+  first in form order.
 
 Environment Variables (in .env):
   - TYPEFORM_API_TOKEN
@@ -25,8 +40,10 @@ Date: 2025-11-25
 
 import os
 import sys
-import pandas as pd
-from datetime import datetime, timedelta
+import json
+import re
+import argparse
+from datetime import datetime, timedelta, timezone
 from dotenv import load_dotenv
 
 # Try to import required libraries
@@ -37,6 +54,13 @@ except ImportError:
     print("📦 Install with: pip install requests")
     sys.exit(1)
 
+# Shared pooled HTTP session (automations/lib/http_session.py)
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..', 'lib'))
+from http_session import get_session
+
+from sheets_upsert import upsert_rows
+from lead_backup import write_backup
+
 try:
     from google.oauth2 import service_account
     from googleapiclient.discovery import build
@@ -63,8 +87,56 @@ SERVICE_ACCOUNT_FILE = os.getenv('GOOGLE_SERVICE_ACCOUNT_FILE', '../apify-automa
 # Typeform API endpoint
 TYPEFORM_API_BASE = 'https://api.typeform.com'
 
-# Output directory for CSV backups
-OUTPUT_DIR = 'lead-management/imports'
+# Directory holding the per-form incremental sync cursors
+STATE_DIR = 'lead-management/state'
+
+# Typeform max responses per request
+PAGE_SIZE = 1000
+
+# Lead attribution written for every response (overridable per form in
+# the multi-form config, see sync_typeform_multi.py)
+DEFAULT_CAMPAIGN = {
+    'source': 'Contest - Typeform',
+    'campaign_name': os.getenv('TYPEFORM_CAMPAIGN_NAME', 'Winter Coat Giveaway Nov 2025'),
+    'ad_name': 'Organic Entry',
+    'country': 'Canada'
+}
+
+# Sheet columns filled from form answers, with the field refs / title
+# words recognised for each
+COLUMN_ALIASES = {
+    'first_name': ['first_name', 'firstname', 'first name', 'prenom', 'prénom'],
+    'last_name': ['last_name', 'lastname', 'last name', 'surname', 'nom'],
+    'email': ['email', 'e-mail', 'email_address', 'mail'],
+    'phone': ['phone', 'phone_number', 'telephone', 'téléphone', 'mobile'],
+    'city': ['city', 'location', 'ville'],
+    'interest': ['interest', 'product_interest', 'intérêt', 'interet'],
+    'budget': ['budget', 'budget_range', 'price_range']
+}
+
+# Typeform field types that identify a column on their own
+FIELD_TYPE_COLUMNS = {
+    'email': 'email',
+    'phone_number': 'phone'
+}
+
+# Typeform field types a column can be read from (refs and titles of other
+# types are not matched: a "City" rating or an "Email me offers" yes/no is
+# not the city or the email)
+TEXT_TYPES = {'short_text', 'long_text'}
+CHOICE_TYPES = {'multiple_choice', 'dropdown', 'picture_choice'}
+COLUMN_FIELD_TYPES = {
+    'first_name': TEXT_TYPES,
+    'last_name': TEXT_TYPES,
+    'email': {'email'} | TEXT_TYPES,
+    'phone': {'phone_number', 'number'} | TEXT_TYPES,
+    'city': TEXT_TYPES | CHOICE_TYPES,
+    'interest': TEXT_TYPES | CHOICE_TYPES,
+    'budget': {'number', 'opinion_scale'} | TEXT_TYPES | CHOICE_TYPES
+}
+
+# Match strengths, strongest first
+MATCH_TYPE, MATCH_REF, MATCH_TITLE, MATCH_TITLE_WORD = 4, 3, 2, 1
 
 # ============================================================================
 # VALIDATION
@@ -95,49 +167,290 @@ def validate_config():
 # TYPEFORM API
 # ============================================================================
 
-def get_typeform_responses(since_hours=24):
-    """Fetch Typeform responses from the last X hours"""
-    try:
-        # Calculate timestamp (since parameter)
-        since_time = datetime.now() - timedelta(hours=since_hours)
-        since_timestamp = since_time.isoformat() + 'Z'
+def format_typeform_time(dt):
+    """Format a datetime as the UTC timestamp expected by the Typeform API"""
+    return dt.astimezone(timezone.utc).strftime('%Y-%m-%dT%H:%M:%SZ')
 
-        print(f"📅 Fetching responses since: {since_time.strftime('%Y-%m-%d %H:%M:%S')}")
+def parse_typeform_time(value):
+    """Parse a Typeform timestamp (e.g. 2025-11-25T14:03:11Z) as aware UTC datetime"""
+    return datetime.fromisoformat(value.replace('Z', '+00:00')).astimezone(timezone.utc)
 
-        # Make API request
-        url = f"{TYPEFORM_API_BASE}/forms/{TYPEFORM_FORM_ID}/responses"
+def get_typeform_responses(since, until=None, form_id=None):
+    """Fetch all Typeform responses submitted between since and until (UTC)"""
+    form_id = form_id or TYPEFORM_FORM_ID
+    try:
+        print(f"📅 Fetching responses since: {format_typeform_time(since)}"
+              + (f" until: {format_typeform_time(until)}" if until else ""))
+
+        url = f"{TYPEFORM_API_BASE}/forms/{form_id}/responses"
         headers = {
             'Authorization': f'Bearer {TYPEFORM_API_TOKEN}'
         }
         params = {
-            'page_size': 1000,  # Max responses per request
-            'since': since_timestamp
+            'page_size': PAGE_SIZE,
+            'since': format_typeform_time(since),
+            'completed': 'true'
         }
+        if until:
+            params['until'] = format_typeform_time(until)
 
-        response = requests.get(url, headers=headers, params=params)
-        response.raise_for_status()
+        # Responses come newest first; page backwards with the `before` token
+        responses = []
+        while True:
+            response = get_session().get(url, headers=headers, params=params)
+            response.raise_for_status()
 
-        data = response.json()
-        responses = data.get('items', [])
+            items = response.json().get('items', [])
+            responses.extend(items)
+            if len(items) < PAGE_SIZE:
+                break
+            params['before'] = items[-1].get('token')
 
-        print(f"📥 Found {len(responses)} responses from last {since_hours} hours")
+        # Oldest first so the cursor can advance in submission order
+        responses.sort(key=lambda r: r.get('submitted_at', ''))
+
+        print(f"📥 Found {len(responses)} responses")
         return responses
 
     except requests.exceptions.HTTPError as e:
         if e.response.status_code == 401:
             print("❌ ERROR: Invalid Typeform API token")
         elif e.response.status_code == 404:
-            print("❌ ERROR: Typeform form not found. Check TYPEFORM_FORM_ID")
+            print(f"❌ ERROR: Typeform form {form_id} not found. Check TYPEFORM_FORM_ID")
         else:
             print(f"❌ ERROR fetching Typeform responses: {e}")
-        return []
+        return None
     except Exception as e:
         print(f"❌ ERROR: {e}")
-        return []
+        return None
+
+# ============================================================================
+# INCREMENTAL CURSOR
+# ============================================================================
+
+def cursor_path(form_id):
+    """Path of the persisted cursor file for a form"""
+    return os.path.join(STATE_DIR, f"typeform-cursor-{form_id}.json")
+
+def load_cursor(form_id):
+    """Load the last committed cursor for a form, or None on first run
+
+    The cursor holds the submitted_at of the newest transferred response and
+    the tokens of every response sharing that exact timestamp, so responses
+    submitted in the same second are neither duplicated nor skipped.
+    """
+    path = cursor_path(form_id)
+    if not os.path.exists(path):
+        return None
+
+    try:
+        with open(path, 'r') as f:
+            cursor = json.load(f)
+        cursor['submitted_at'] = parse_typeform_time(cursor['submitted_at'])
+        cursor['tokens'] = set(cursor.get('tokens', []))
+        return cursor
+    except Exception as e:
+        print(f"⚠️  Ignoring unreadable cursor {path}: {e}")
+        return None
+
+def advance_cursor(cursor, responses):
+    """Return the cursor moved past the given (oldest-first) responses"""
+    if not responses:
+        return cursor
+
+    last_submitted = responses[-1]['submitted_at']
+    last_time = parse_typeform_time(last_submitted)
+    tokens = {response_token(r) for r in responses if r['submitted_at'] == last_submitted}
+
+    if cursor and cursor['submitted_at'] == last_time:
+        tokens |= cursor['tokens']
+
+    return {'submitted_at': last_time, 'tokens': tokens}
+
+def commit_cursor(form_id, cursor):
+    """Atomically persist the cursor for a form"""
+    os.makedirs(STATE_DIR, exist_ok=True)
+    path = cursor_path(form_id)
+    tmp_path = f"{path}.tmp"
+
+    with open(tmp_path, 'w') as f:
+        json.dump({
+            'form_id': form_id,
+            'submitted_at': format_typeform_time(cursor['submitted_at']),
+            'tokens': sorted(cursor['tokens']),
+            'committed_at': format_typeform_time(datetime.now(timezone.utc))
+        }, f, indent=2)
+    os.replace(tmp_path, path)
+
+    print(f"📌 Cursor committed: {format_typeform_time(cursor['submitted_at'])}")
+
+def response_token(response):
+    """Unique token of a Typeform response"""
+    return response.get('token') or response.get('response_id', '')
+
+def filter_new_responses(responses, cursor):
+    """Drop responses already transferred according to the cursor"""
+    if not cursor:
+        return responses
+
+    new_responses = []
+    for response in responses:
+        submitted_at = parse_typeform_time(response['submitted_at'])
+        if submitted_at < cursor['submitted_at']:
+            continue
+        if submitted_at == cursor['submitted_at'] and response_token(response) in cursor['tokens']:
+            continue
+        new_responses.append(response)
+
+    return new_responses
+
+# ============================================================================
+# FORM DEFINITION
+# ============================================================================
+
+def form_cache_path(form_id):
+    """Path of the cached form definition for a form"""
+    return os.path.join(STATE_DIR, f"typeform-form-{form_id}.json")
+
+def get_form_definition(form_id):
+    """Fetch the form definition, revalidating the on-disk copy with its ETag
 
-def extract_response_data(responses):
-    """Extract and structure response data"""
+    Returns the cached definition on 304 Not Modified or when the API is
+    unreachable, and None when no definition is available at all.
+    """
+    path = form_cache_path(form_id)
+    cached = None
+    if os.path.exists(path):
+        try:
+            with open(path, 'r') as f:
+                cached = json.load(f)
+        except Exception as e:
+            print(f"⚠️  Ignoring unreadable form cache {path}: {e}")
+
+    headers = {'Authorization': f'Bearer {TYPEFORM_API_TOKEN}'}
+    if cached and cached.get('etag'):
+        headers['If-None-Match'] = cached['etag']
+
+    try:
+        response = get_session().get(f"{TYPEFORM_API_BASE}/forms/{form_id}", headers=headers)
+        if response.status_code == 304 and cached:
+            print("📋 Form definition unchanged (cached)")
+            return cached['definition']
+        response.raise_for_status()
+
+        definition = response.json()
+        os.makedirs(STATE_DIR, exist_ok=True)
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w') as f:
+            json.dump({
+                'etag': response.headers.get('ETag'),
+                'fetched_at': format_typeform_time(datetime.now(timezone.utc)),
+                'definition': definition
+            }, f)
+        os.replace(tmp_path, path)
+
+        print(f"📋 Form definition fetched: {definition.get('title', form_id)}")
+        return definition
+
+    except Exception as e:
+        if cached:
+            print(f"⚠️  Could not revalidate form definition ({e}), using cache")
+            return cached['definition']
+        print(f"⚠️  Could not fetch form definition: {e}")
+        return None
+
+def iter_form_fields(fields):
+    """Yield every field of a form, descending into question groups"""
+    for field in fields:
+        yield field
+        yield from iter_form_fields(field.get('properties', {}).get('fields', []))
+
+def alias_pattern(alias):
+    """Regex matching an alias as whole words of a title"""
+    return re.compile(rf'(?<!\w){re.escape(alias)}(?!\w)')
+
+TITLE_PATTERNS = {column: [alias_pattern(alias) for alias in aliases]
+                  for column, aliases in COLUMN_ALIASES.items()}
+
+def match_column(ref, title, field_type):
+    """Find the sheet column for a form field as (column, strength), or (None, 0)
+
+    The field type decides first (an email field is the email); refs must
+    equal an alias and titles must contain one as whole words ('mail' does
+    not match "Gmail", 'nom' does not match "Prénom"), and both only count
+    for fields of a type compatible with the column.
+    """
+    if field_type in FIELD_TYPE_COLUMNS:
+        return FIELD_TYPE_COLUMNS[field_type], MATCH_TYPE
+
+    ref = (ref or '').lower()
+    title = ' '.join((title or '').lower().split())
+    compatible = [column for column, types in COLUMN_FIELD_TYPES.items()
+                  if field_type is None or field_type in types]
+
+    for column in compatible:
+        if ref in COLUMN_ALIASES[column]:
+            return column, MATCH_REF
+    for column in compatible:
+        if title in COLUMN_ALIASES[column]:
+            return column, MATCH_TITLE
+    for column in compatible:
+        if any(pattern.search(title) for pattern in TITLE_PATTERNS[column]):
+            return column, MATCH_TITLE_WORD
+    return None, 0
+
+def build_field_map(definition):
+    """Precompute the field ref -> sheet column table for a form
+
+    Each column goes to its strongest match, the first in form order on a
+    tie (a later "confirm your email" does not overwrite it). Without a
+    definition, the legacy convention (field refs named after the columns)
+    is used.
+    """
+    if not definition:
+        return {alias: column for column, aliases in COLUMN_ALIASES.items() for alias in aliases}
+
+    best = {}
+    for field in iter_form_fields(definition.get('fields', [])):
+        column, strength = match_column(field.get('ref'), field.get('title'), field.get('type'))
+        if column and strength > best.get(column, (0, None))[0]:
+            best[column] = (strength, field.get('ref'))
+
+    return {ref: column for column, (strength, ref) in best.items()}
+
+# Answer type -> value extractor
+ANSWER_EXTRACTORS = {
+    'text': lambda a: a.get('text', ''),
+    'email': lambda a: a.get('email', ''),
+    'phone_number': lambda a: a.get('phone_number', ''),
+    'url': lambda a: a.get('url', ''),
+    'file_url': lambda a: a.get('file_url', ''),
+    'date': lambda a: a.get('date', ''),
+    'number': lambda a: str(a.get('number', '')),
+    'boolean': lambda a: 'Yes' if a.get('boolean') else 'No',
+    'choice': lambda a: a.get('choice', {}).get('label') or a.get('choice', {}).get('other', ''),
+    'choices': lambda a: ', '.join(
+        a.get('choices', {}).get('labels', []) + ([a['choices']['other']] if a.get('choices', {}).get('other') else [])
+    ),
+    'payment': lambda a: a.get('payment', {}).get('amount', ''),
+}
+
+def extract_answer(answer):
+    """Extract the value of an answer with the extractor for its type"""
+    answer_type = answer.get('type', '')
+    extractor = ANSWER_EXTRACTORS.get(answer_type)
+    if extractor:
+        return extractor(answer)
+    # Generic fallback
+    return str(answer.get(answer_type, ''))
+
+def extract_response_data(responses, definition=None, campaign=None):
+    """Extract and structure response data, returning (rows, tokens of failed responses)"""
     structured_responses = []
+    failed_tokens = []
+    campaign = {**DEFAULT_CAMPAIGN, **(campaign or {})}
+    field_map = build_field_map(definition)
+    form_name = (definition or {}).get('title', 'Contest Entry Form')
 
     for response in responses:
         try:
@@ -146,53 +459,54 @@ def extract_response_data(responses):
             submitted_at = response.get('submitted_at', '')
             landed_at = response.get('landed_at', '')
 
-            # Extract answers
+            # Extract answers of mapped fields only
             answers = {}
             for answer in response.get('answers', []):
-                field_ref = answer.get('field', {}).get('ref', '')
-                field_type = answer.get('type', '')
-
-                # Extract value based on type
-                if field_type == 'email':
-                    answers[field_ref] = answer.get('email', '')
-                elif field_type == 'text':
-                    answers[field_ref] = answer.get('text', '')
-                elif field_type == 'choice':
-                    answers[field_ref] = answer.get('choice', {}).get('label', '')
-                elif field_type == 'choices':
-                    labels = [c.get('label', '') for c in answer.get('choices', {}).get('labels', [])]
-                    answers[field_ref] = ', '.join(labels)
-                elif field_type == 'phone_number':
-                    answers[field_ref] = answer.get('phone_number', '')
-                else:
-                    # Generic fallback
-                    answers[field_ref] = str(answer.get(field_type, ''))
+                column = field_map.get(answer.get('field', {}).get('ref'))
+                if column and column not in answers:
+                    answers[column] = extract_answer(answer)
 
             # Structure according to Google Sheets format
             structured_response = {
                 'lead_id': response_id,
                 'created_time': submitted_at,
-                'source': 'Contest - Typeform',
-                'campaign_name': 'Winter Coat Giveaway Nov 2025',
-                'ad_name': 'Organic Entry',
-                'form_name': 'Contest Entry Form',
+                'source': campaign['source'],
+                'campaign_name': campaign['campaign_name'],
+                'ad_name': campaign['ad_name'],
+                'form_name': form_name,
                 'first_name': answers.get('first_name', ''),
                 'last_name': answers.get('last_name', ''),
                 'email': answers.get('email', ''),
                 'phone': answers.get('phone', ''),
-                'city': answers.get('city', answers.get('location', '')),
-                'country': 'Canada',
-                'interest': answers.get('interest', answers.get('product_interest', '')),
-                'budget': answers.get('budget', answers.get('budget_range', ''))
+                'city': answers.get('city', ''),
+                'country': campaign['country'],
+                'interest': answers.get('interest', ''),
+                'budget': answers.get('budget', '')
             }
 
             structured_responses.append(structured_response)
 
         except Exception as e:
             print(f"⚠️  Error processing response {response.get('response_id', 'unknown')}: {e}")
+            failed_tokens.append(response_token(response))
             continue
 
-    return structured_responses
+    return structured_responses, failed_tokens
+
+def hold_back_failed(responses, structured, failed_tokens):
+    """Keep only the responses before the earliest failure so the cursor stays below it.
+
+    Rows before the first failure line up one-to-one with the (oldest-first)
+    responses; everything from the failure on is left for the next run.
+    """
+    if not failed_tokens:
+        return responses, structured
+
+    failed = set(failed_tokens)
+    cut = next(i for i, r in enumerate(responses) if response_token(r) in failed)
+    print(f"⚠️  {len(failed_tokens)} response(s) failed, holding the cursor at "
+          f"{responses[cut]['submitted_at']} ({len(responses) - cut} left for the next run)")
+    return responses[:cut], structured[:cut]
 
 # ============================================================================
 # GOOGLE SHEETS
@@ -211,12 +525,14 @@ def get_sheets_client():
         print(f"❌ ERROR initializing Google Sheets client: {e}")
         return None
 
-def append_to_sheet(responses):
-    """Append responses directly to Google Sheets RAW LEADS tab"""
+def append_to_sheet(responses, upsert=False, spreadsheet_id=None):
+    """Append (or upsert by lead_id) responses directly to Google Sheets RAW LEADS tab"""
     if not responses:
         print("⚠️  No responses to append")
         return False
 
+    spreadsheet_id = spreadsheet_id or GOOGLE_SHEETS_ID
+
     try:
         sheets = get_sheets_client()
         if not sheets:
@@ -247,6 +563,10 @@ def append_to_sheet(responses):
             ]
             rows.append(row)
 
+        # Upsert mode: update existing lead rows, append only new ones
+        if upsert:
+            return upsert_rows(sheets, spreadsheet_id, rows)
+
         # Append to RAW LEADS tab
         range_name = 'RAW LEADS!A:R'
         body = {
@@ -254,7 +574,7 @@ def append_to_sheet(responses):
         }
 
         result = sheets.values().append(
-            spreadsheetId=GOOGLE_SHEETS_ID,
+            spreadsheetId=spreadsheet_id,
             range=range_name,
             valueInputOption='USER_ENTERED',
             insertDataOption='INSERT_ROWS',
@@ -271,38 +591,40 @@ def append_to_sheet(responses):
         print(f"❌ ERROR appending to Google Sheets: {e}")
         return False
 
-def export_to_csv_backup(responses):
-    """Export responses to CSV as backup"""
+def export_to_csv_backup(responses, name='typeform'):
+    """Append responses to the compressed, partitioned lead backup"""
     if not responses:
         return None
 
-    try:
-        # Create DataFrame
-        df = pd.DataFrame(responses)
-
-        # Generate filename with date
-        date_str = datetime.now().strftime('%Y-%m-%d')
-        filename = f"{OUTPUT_DIR}/typeform-leads-{date_str}.csv"
-
-        # Ensure directory exists
-        os.makedirs(OUTPUT_DIR, exist_ok=True)
-
-        # Export to CSV
-        df.to_csv(filename, index=False)
-
-        print(f"💾 CSV backup saved: {filename}")
-        return filename
-
-    except Exception as e:
-        print(f"⚠️  Error saving CSV backup: {e}")
-        return None
+    written = write_backup(responses, source=name)
+    return written[0] if written else None
 
 # ============================================================================
 # MAIN
 # ============================================================================
 
+def parse_args():
+    """Parse command line arguments"""
+    parser = argparse.ArgumentParser(description='Sync Typeform responses to Google Sheets')
+    parser.add_argument('--since-hours', type=int, default=24,
+                        help='Window used on the first run, before a cursor exists (default: 24)')
+    parser.add_argument('--backfill', nargs=2, metavar=('START', 'END'),
+                        help='Re-sync responses between two UTC dates/times (ISO 8601); the cursor is left untouched')
+    parser.add_argument('--upsert', action='store_true',
+                        help='Update rows of leads already in RAW LEADS instead of appending duplicates')
+    return parser.parse_args()
+
+def parse_backfill_bound(value):
+    """Parse a --backfill bound; naive values are interpreted as UTC"""
+    dt = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    if dt.tzinfo is None:
+        dt = dt.replace(tzinfo=timezone.utc)
+    return dt
+
 def main():
     """Main execution"""
+    args = parse_args()
+
     print("═══════════════════════════════════════")
     print("📝 TYPEFORM → GOOGLE SHEETS SYNC")
     print("═══════════════════════════════════════")
@@ -312,38 +634,83 @@ def main():
     validate_config()
     print()
 
-    # Fetch Typeform responses (last 24 hours)
+    # Determine the window to fetch
+    cursor = None
+    until = None
+    if args.backfill:
+        try:
+            since, until = (parse_backfill_bound(v) for v in args.backfill)
+        except ValueError as e:
+            print(f"❌ ERROR: Invalid --backfill range: {e}")
+            sys.exit(1)
+        print(f"⏪ Backfill mode: {format_typeform_time(since)} → {format_typeform_time(until)}")
+    else:
+        cursor = load_cursor(TYPEFORM_FORM_ID)
+        if cursor:
+            # Overlap by a second: same-second responses are filtered by token
+            since = cursor['submitted_at'] - timedelta(seconds=1)
+            print(f"📌 Resuming from cursor: {format_typeform_time(cursor['submitted_at'])}")
+        else:
+            since = datetime.now(timezone.utc) - timedelta(hours=args.since_hours)
+            print(f"📌 No cursor yet, fetching last {args.since_hours} hours")
+    print()
+
+    # Fetch Typeform responses
     print("📥 Fetching Typeform responses...")
-    responses_raw = get_typeform_responses(since_hours=24)
+    responses_raw = get_typeform_responses(since, until)
     print()
 
+    get_session().print_stats()
+    if responses_raw is None:
+        print("❌ Sync failed")
+        sys.exit(1)
+
+    responses_raw = filter_new_responses(responses_raw, cursor)
     if not responses_raw:
-        print("✅ No new responses in the last 24 hours")
+        print("✅ No new responses")
         print("═══════════════════════════════════════")
         sys.exit(0)
 
     # Extract and structure
     print("🔄 Processing responses...")
-    responses_structured = extract_response_data(responses_raw)
+    definition = get_form_definition(TYPEFORM_FORM_ID)
+    responses_structured, failed_tokens = extract_response_data(responses_raw, definition)
     print(f"✅ Processed {len(responses_structured)} responses")
+    if not args.backfill:
+        responses_raw, responses_structured = hold_back_failed(
+            responses_raw, responses_structured, failed_tokens)
     print()
 
+    if not responses_structured:
+        print("❌ Sync failed: no response could be processed")
+        sys.exit(1)
+
     # Append to Google Sheets
     print("📤 Syncing to Google Sheets...")
-    success = append_to_sheet(responses_structured)
+    success = append_to_sheet(responses_structured, upsert=args.upsert)
     print()
 
-    # Create CSV backup
-    print("💾 Creating CSV backup...")
-    csv_file = export_to_csv_backup(responses_structured)
+    # Only move the cursor once the rows are safely in the sheet
+    if success and not args.backfill:
+        commit_cursor(TYPEFORM_FORM_ID, advance_cursor(cursor, responses_raw))
+        print()
+
+    # Append to the partitioned backup
+    print("💾 Writing backup...")
+    backup_file = export_to_csv_backup(responses_structured)
     print()
 
+    if failed_tokens:
+        print(f"❌ Sync incomplete: {len(failed_tokens)} response(s) could not be processed")
+        print(f"   Tokens: {', '.join(failed_tokens)}")
+        sys.exit(1)
+
     if success:
         print("═══════════════════════════════════════")
         print("✅ TYPEFORM SYNC COMPLETED")
         print(f"📊 Total responses: {len(responses_structured)}")
-        if csv_file:
-            print(f"💾 Backup: {csv_file}")
+        if backup_file:
+            print(f"💾 Backup: {backup_file}")
         print()
         print("📋 View Google Sheet:")
         print(f"   https://docs.google.com/spreadsheets/d/{GOOGLE_SHEETS_ID}")